@@ -0,0 +1,21 @@
+"""
+Prometheus metrics of the app. Under gunicorn every worker writes them to its own files in the
+`prometheus_multiproc_dir` directory (see `config/gunicorn.py`) and `/metrics` aggregates all of them.
+"""
+from prometheus_client import Counter, Histogram
+
+HTTP_REQUESTS = Counter(
+    'secure_url_http_requests_total', 'Number of handled requests.', ['view', 'method', 'status'])
+HTTP_REQUEST_DURATION = Histogram(
+    'secure_url_http_request_duration_seconds', 'Time of handling requests.', ['view'],
+    buckets=(.005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10))
+DB_QUERIES = Counter(
+    'secure_url_db_queries_total', 'Number of SQL queries made while handling requests.', ['view', 'database'])
+DB_QUERY_DURATION = Counter(
+    'secure_url_db_query_duration_seconds_total', 'Time of SQL queries made while handling requests.',
+    ['view', 'database'])
+
+ACCESS_LOGS_WRITTEN = Counter(
+    'secure_url_access_logs_written_total', 'Number of access logs stored in the database.')
+USER_AGENT_LOGS_WRITTEN = Counter(
+    'secure_url_user_agent_logs_written_total', 'Number of user agent logs created or updated.', ['operation'])
@@ -0,0 +1,66 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .metrics import DB_QUERIES, DB_QUERY_DURATION, HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+# requests not resolved to a view (404s) share one label, so random paths don't create new series
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryTimer:
+    """
+    Execute wrapper counting SQL queries of a database connection and their time.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.queries += 1
+
+
+class MetricsMiddleware:
+    """
+    Records the number and latency of requests and the number and time of their SQL queries per resolved URL name.
+    Should be the first middleware, so the time of the other ones is included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_timers = {}
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                query_timers[connection.alias] = QueryTimer()
+                stack.enter_context(connection.execute_wrapper(query_timers[connection.alias]))
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - start
+        view = self._get_view_label(request)
+
+        HTTP_REQUESTS.labels(view, request.method, response.status_code).inc()
+        HTTP_REQUEST_DURATION.labels(view).observe(duration)
+        for database, query_timer in query_timers.items():
+            if query_timer.queries:
+                DB_QUERIES.labels(view, database).inc(query_timer.queries)
+                DB_QUERY_DURATION.labels(view, database).inc(query_timer.duration)
+
+        return response
+
+    @staticmethod
+    def _get_view_label(request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return UNRESOLVED_VIEW
+        return resolver_match.url_name or resolver_match.view_name
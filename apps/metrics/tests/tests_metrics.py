@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls.base import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from apps.secure_url.access_log import write_access_logs
+from apps.secure_url.models import SecuredEntity
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.metrics_url = reverse('metrics')
+        self.user = get_user_model().objects.create_user(username='test', password='123qweasd')
+
+    def _get_sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_counted_per_url_name(self):
+        self.client.login(username='test', password='123qweasd')
+        requests = self._get_sample('secure_url_http_requests_total', view='home', method='GET', status='200')
+        observed = self._get_sample('secure_url_http_request_duration_seconds_count', view='home')
+        queries = self._get_sample('secure_url_db_queries_total', view='home', database='default')
+
+        self.client.get(reverse('home'))
+
+        self.assertEqual(requests + 1, self._get_sample(
+            'secure_url_http_requests_total', view='home', method='GET', status='200'))
+        self.assertEqual(observed + 1, self._get_sample('secure_url_http_request_duration_seconds_count', view='home'))
+        # the session and the user are loaded
+        self.assertLessEqual(queries + 2, self._get_sample('secure_url_db_queries_total', view='home',
+                                                           database='default'))
+
+    def test_unresolved_requests_share_one_label(self):
+        requests = self._get_sample('secure_url_http_requests_total', view='<unresolved>', method='GET', status='404')
+
+        self.client.get('/not-found/')
+        self.client.get('/not-found-either/')
+
+        self.assertEqual(requests + 2, self._get_sample(
+            'secure_url_http_requests_total', view='<unresolved>', method='GET', status='404'))
+
+    def test_access_log_writes_are_counted(self):
+        secured_entity = SecuredEntity.objects.create(user=self.user, url='https://example.com/')
+        written = self._get_sample('secure_url_access_logs_written_total')
+
+        write_access_logs([(secured_entity.pk, datetime(2019, 3, 1, tzinfo=timezone.utc))] * 3)
+
+        self.assertEqual(written + 3, self._get_sample('secure_url_access_logs_written_total'))
+
+    @override_settings(USER_AGENT_LOG_WINDOW=None)
+    def test_user_agent_log_writes_are_counted(self):
+        self.client.login(username='test', password='123qweasd')
+        created = self._get_sample('secure_url_user_agent_logs_written_total', operation='create')
+
+        self.client.get(reverse('home'), HTTP_USER_AGENT='Test Browser')
+
+        self.assertEqual(created + 1, self._get_sample('secure_url_user_agent_logs_written_total', operation='create'))
+
+    @override_settings(METRICS_BEARER_TOKEN='secret')
+    def test_metrics_are_exposed_in_prometheus_format(self):
+        response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'# TYPE secure_url_http_request_duration_seconds histogram', response.content)
+
+    @override_settings(METRICS_BEARER_TOKEN='secret')
+    def test_metrics_require_bearer_token_if_set(self):
+        self.assertEqual(401, self.client.get(self.metrics_url).status_code)
+        self.assertEqual(401, self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer wrong').status_code)
+        self.assertEqual(200, self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer secret').status_code)
+
+    @override_settings(METRICS_BEARER_TOKEN=None)
+    def test_metrics_without_bearer_token_are_hidden_unless_debug(self):
+        self.assertEqual(404, self.client.get(self.metrics_url).status_code)
+        with self.settings(DEBUG=True):
+            self.assertEqual(200, self.client.get(self.metrics_url).status_code)
+
+    @override_settings(METRICS_BEARER_TOKEN='secret')
+    def test_metrics_of_all_processes_are_aggregated_in_multiprocess_mode(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            environ = dict(os.environ, prometheus_multiproc_dir=metrics_dir)
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', 'from apps.metrics.metrics import ACCESS_LOGS_WRITTEN; '
+                                                      'ACCESS_LOGS_WRITTEN.inc(2)'],
+                               cwd=settings.BASE_DIR, env=environ, check=True)
+
+            with mock.patch.dict(os.environ, prometheus_multiproc_dir=metrics_dir):
+                response = self.client.get(self.metrics_url, HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertIn(b'secure_url_access_logs_written_total 4.0', response.content)
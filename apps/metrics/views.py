@@ -0,0 +1,29 @@
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+
+def metrics_view(request):
+    """
+    Exposes the metrics in the Prometheus text format - aggregated over all gunicorn workers in the multiprocess mode.
+    Scrapes have to send `METRICS_BEARER_TOKEN` in the `Authorization: Bearer ...` header. Without the token the
+    metrics are exposed only with `DEBUG` on - otherwise anyone could read the traffic of the views.
+    """
+    if not settings.METRICS_BEARER_TOKEN:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''),
+                                   'Bearer {}'.format(settings.METRICS_BEARER_TOKEN)):
+        return HttpResponse(status=401)
+
+    if 'prometheus_multiproc_dir' in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
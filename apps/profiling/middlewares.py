@@ -0,0 +1,40 @@
+from django.conf import settings
+
+from .profiler import RequestProfile
+from .store import get_profile_store
+from .triggers import get_profiling_trigger
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests picked by `get_profiling_trigger` and stores the profiles in the `ProfileStore`, the id is sent
+    in the `X-Profile-Id` header. Has to be placed after the `AuthenticationMiddleware`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = get_profiling_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profile = RequestProfile(settings.PROFILING_SAMPLE_INTERVAL)
+        response = profile.run(self.get_response, request)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        response['X-Profile-Id'] = get_profile_store().save(
+            profile, trigger=trigger, method=request.method, path=get_redacted_path(request),
+            view=resolver_match.view_name if resolver_match else None, status=response.status_code,
+            user=request.user.get_username() if request.user.is_authenticated else None)
+        return response
+
+
+def get_redacted_path(request):
+    """
+    The path with the values of the query string left out - they can carry secrets (e.g. signed download grants), which
+    must not end up in the stored profiles.
+    """
+    if not request.GET:
+        return request.path
+    return '{}?{}'.format(request.path, '&'.join('{}=*'.format(name) for name in request.GET))
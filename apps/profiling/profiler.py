@@ -0,0 +1,103 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+SITE_PACKAGES = '{0}site-packages{0}'.format(os.sep)
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of another thread every `interval` seconds - the counts of the stacks make a flame graph.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfile:
+    """
+    Profile of a single call (a request): deterministic `cProfile` stats, stacks sampled every `sample_interval`
+    seconds and the executed SQL.
+
+    Parameters of the SQL are not kept - they end up on the disk and they can contain secrets.
+    """
+
+    def __init__(self, sample_interval=0.005):
+        self.sample_interval = sample_interval
+        self.stats = None
+        self.stacks = Counter()
+        self.queries = []
+        self.duration = None
+
+    def run(self, function, *args, **kwargs):
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self._get_query_recorder(connection.alias)))
+
+            sampler.start()
+            profiler.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.disable()
+                sampler.stop()
+                self.duration = time.perf_counter() - start
+                self.stats = pstats.Stats(profiler)
+                self.stacks = sampler.stacks
+
+    def _get_query_recorder(self, alias):
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append({'database': alias, 'sql': sql, 'many': many,
+                                     'duration': time.perf_counter() - start})
+
+        return record_query
+
+
+def collapse_stack(frame):
+    """
+    Formats the stack of `frame` as a line of the collapsed stack format (`outer;...;inner`) used by flame graph tools.
+    """
+    functions = []
+    while frame is not None:
+        code = frame.f_code
+        functions.append('{} ({}:{})'.format(code.co_name, _shorten_path(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(functions))
+
+
+def _shorten_path(path):
+    if SITE_PACKAGES in path:
+        return path.split(SITE_PACKAGES, 1)[1]
+    if path.startswith(settings.BASE_DIR + os.sep):
+        return os.path.relpath(path, settings.BASE_DIR)
+    return path
@@ -0,0 +1,114 @@
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+PROFILE_ID_RE = re.compile(r'^\d{8}T\d{12}-[0-9a-f]{8}$')
+META_FILE = 'meta.json'
+PSTATS_FILE = 'profile.prof'
+PSTATS_TEXT_FILE = 'profile.txt'
+STACKS_FILE = 'stacks.collapsed'
+DOWNLOADABLE_FILES = (PSTATS_FILE, PSTATS_TEXT_FILE, STACKS_FILE)
+PSTATS_TEXT_LIMIT = 60
+
+
+class ProfileStore:
+    """
+    Ring buffer of request profiles on the disk - one directory per profile, the oldest ones beyond `max_profiles`
+    are removed whenever a new one is saved. Profiles are written to a temporary directory and renamed into place,
+    so workers never see half-written ones.
+    """
+
+    def __init__(self, directory, max_profiles=100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, profile, **meta):
+        """
+        Stores the `RequestProfile` with the request details in `meta` and returns its id.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        now = timezone.now()
+        # ids sort by the time of the request
+        profile_id = '{:%Y%m%dT%H%M%S%f}-{}'.format(now.astimezone(timezone.utc), uuid.uuid4().hex[:8])
+
+        temp_directory = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            profile.stats.dump_stats(os.path.join(temp_directory, PSTATS_FILE))
+
+            pstats_text = io.StringIO()
+            profile.stats.stream = pstats_text
+            profile.stats.sort_stats('cumulative').print_stats(PSTATS_TEXT_LIMIT)
+            with open(os.path.join(temp_directory, PSTATS_TEXT_FILE), 'w') as pstats_text_file:
+                pstats_text_file.write(pstats_text.getvalue())
+
+            with open(os.path.join(temp_directory, STACKS_FILE), 'w') as stacks_file:
+                for stack, count in profile.stacks.most_common():
+                    stacks_file.write('{} {}\n'.format(stack, count))
+
+            with open(os.path.join(temp_directory, META_FILE), 'w') as meta_file:
+                json.dump(dict(meta, id=profile_id, created=now.isoformat(), duration=profile.duration,
+                               samples=sum(profile.stacks.values()), queries=profile.queries,
+                               query_duration=sum(query['duration'] for query in profile.queries)), meta_file)
+
+            os.rename(temp_directory, os.path.join(self.directory, profile_id))
+        except BaseException:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+            raise
+
+        self._prune()
+        return profile_id
+
+    def list(self):
+        """
+        Meta data of the stored profiles, the newest first.
+        """
+        profiles = []
+        for profile_id in reversed(self._get_profile_ids()):
+            meta = self.get(profile_id)
+            if meta is not None:
+                profiles.append(meta)
+        return profiles
+
+    def get(self, profile_id):
+        try:
+            with open(self.get_path(profile_id, META_FILE)) as meta_file:
+                return json.load(meta_file)
+        except (FileNotFoundError, ValueError):
+            # removed by another worker in the meantime
+            return None
+
+    def get_path(self, profile_id, file_name):
+        if not PROFILE_ID_RE.match(profile_id) or file_name not in DOWNLOADABLE_FILES + (META_FILE,):
+            raise ValueError('Invalid profile file {}/{}.'.format(profile_id, file_name))
+        return os.path.join(self.directory, profile_id, file_name)
+
+    def _get_profile_ids(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if PROFILE_ID_RE.match(name))
+
+    def _prune(self):
+        profile_ids = self._get_profile_ids()
+        for profile_id in profile_ids[:max(0, len(profile_ids) - self.max_profiles)]:
+            shutil.rmtree(os.path.join(self.directory, profile_id), ignore_errors=True)
+
+
+@lru_cache(maxsize=None)
+def get_profile_store():
+    return ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
+
+
+@receiver(setting_changed)
+def reset_profile_store(setting, **kwargs):
+    if setting.startswith('PROFILING_'):
+        get_profile_store.cache_clear()
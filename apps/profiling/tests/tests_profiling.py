@@ -0,0 +1,137 @@
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.test import TestCase, override_settings
+from django.urls.base import reverse
+
+from ..profiler import RequestProfile, collapse_stack
+from ..store import ProfileStore, get_profile_store
+from ..triggers import TOKEN_SALT, make_profiling_token
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        profiling_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profiling_dir.cleanup)
+
+        settings_override = override_settings(PROFILING_DIR=profiling_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.home_url = reverse('home')
+        self.staff_user = get_user_model().objects.create_user(username='staff', password='123qweasd', is_staff=True)
+        self.user = get_user_model().objects.create_user(username='test', password='123qweasd')
+
+    def test_requests_are_not_profiled_by_default(self):
+        self.client.login(username='staff', password='123qweasd')
+
+        response = self.client.get(self.home_url)
+
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual([], get_profile_store().list())
+
+    @override_settings(USER_AGENT_LOG_WINDOW=None)
+    def test_staff_user_profiles_request_with_query_flag(self):
+        self.client.login(username='staff', password='123qweasd')
+
+        response = self.client.get(self.home_url, {'_profile': '1'}, HTTP_USER_AGENT='Test Browser')
+
+        profile = get_profile_store().get(response['X-Profile-Id'])
+        self.assertEqual('staff', profile['trigger'])
+        self.assertEqual('home', profile['view'])
+        self.assertEqual('staff', profile['user'])
+        self.assertEqual(200, profile['status'])
+        self.assertTrue(any('user_agent_watchdog_useragentlog' in query['sql'] for query in profile['queries']))
+        for file_name in ('profile.prof', 'profile.txt', 'stacks.collapsed'):
+            self.assertTrue(os.path.exists(get_profile_store().get_path(profile['id'], file_name)))
+
+    def test_values_of_query_string_are_not_stored(self):
+        self.client.login(username='staff', password='123qweasd')
+
+        response = self.client.get(self.home_url, {'_profile': '1', 'grant': 'secret'})
+
+        profile = get_profile_store().get(response['X-Profile-Id'])
+        self.assertEqual('{}?_profile=*&grant=*'.format(self.home_url), profile['path'])
+
+    def test_other_users_can_not_profile_requests(self):
+        self.client.login(username='test', password='123qweasd')
+
+        response = self.client.get(self.home_url, {'_profile': '1'}, HTTP_X_PROFILE='1')
+
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_signed_token_profiles_request_without_session(self):
+        response = self.client.get(reverse('accounts-login'), HTTP_X_PROFILE=make_profiling_token(self.staff_user))
+
+        self.assertEqual('token', get_profile_store().get(response['X-Profile-Id'])['trigger'])
+
+    def test_token_of_user_who_is_not_staff_is_rejected(self):
+        for token in (signing.dumps(self.user.pk, salt=TOKEN_SALT), 'forged', signing.dumps(self.staff_user.pk)):
+            response = self.client.get(reverse('accounts-login'), HTTP_X_PROFILE=token)
+
+            self.assertNotIn('X-Profile-Id', response)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.5)
+    def test_requests_are_sampled_with_sample_rate(self):
+        with mock.patch('random.random', side_effect=[0.4, 0.6]):
+            sampled = self.client.get(reverse('accounts-login'))
+            not_sampled = self.client.get(reverse('accounts-login'))
+
+        self.assertEqual('sampled', get_profile_store().get(sampled['X-Profile-Id'])['trigger'])
+        self.assertNotIn('X-Profile-Id', not_sampled)
+
+    def test_store_keeps_only_newest_profiles(self):
+        profile_store = ProfileStore(get_profile_store().directory, max_profiles=2)
+        profile_ids = []
+        for _ in range(3):
+            profile = RequestProfile()
+            profile.run(lambda: None)
+            profile_ids.append(profile_store.save(profile, path='/'))
+
+        self.assertEqual(profile_ids[:0:-1], [meta['id'] for meta in profile_store.list()])
+        self.assertIsNone(profile_store.get(profile_ids[0]))
+
+    def test_sampled_stacks_are_collapsed_from_the_outermost_frame(self):
+        def slow():
+            time.sleep(0.05)
+
+        profile = RequestProfile(sample_interval=0.001)
+        profile.run(slow)
+
+        stack, _ = profile.stacks.most_common(1)[0]
+        self.assertTrue(stack.split(';')[-1].startswith('slow ('))
+        self.assertIn('tests_profiling.py', collapse_stack(sys._getframe()))
+
+    def test_profiles_are_browsable_by_staff_in_admin(self):
+        self.client.login(username='staff', password='123qweasd')
+        profile_id = self.client.get(self.home_url, {'_profile': '1'})['X-Profile-Id']
+
+        list_response = self.client.get(reverse('profiling:profile-list-view'))
+        detail_response = self.client.get(reverse('profiling:profile-detail-view', args=(profile_id,)))
+        file_response = self.client.get(reverse('profiling:profile-file-view', args=(profile_id, 'stacks.collapsed')))
+
+        self.assertContains(list_response, reverse('profiling:profile-detail-view', args=(profile_id,)))
+        self.assertContains(detail_response, 'function calls')
+        self.assertEqual(200, file_response.status_code)
+        self.assertEqual(404, self.client.get(
+            reverse('profiling:profile-file-view', args=(profile_id, 'meta.json'))).status_code)
+        self.assertContains(self.client.get(reverse('admin:index')), reverse('profiling:profile-list-view'))
+
+    def test_admin_issues_profiling_token(self):
+        self.client.login(username='staff', password='123qweasd')
+
+        response = self.client.post(reverse('profiling:profile-list-view'))
+
+        self.assertEqual(self.staff_user.pk, signing.loads(response.context['token'], salt=TOKEN_SALT))
+
+    def test_profiles_are_not_browsable_by_other_users(self):
+        self.client.login(username='test', password='123qweasd')
+
+        response = self.client.get(reverse('profiling:profile-list-view'))
+
+        self.assertEqual(302, response.status_code)
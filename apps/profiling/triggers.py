@@ -0,0 +1,49 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_FLAG = '_profile'
+TOKEN_SALT = 'profiling.token'
+
+
+class ProfilingTriggers:
+    STAFF = 'staff'
+    TOKEN = 'token'
+    SAMPLED = 'sampled'
+
+
+def make_profiling_token(user):
+    """
+    Signed token for the `X-Profile` header - it makes requests profiled without a session (e.g. API requests with
+    basic authentication) for `PROFILING_TOKEN_MAX_AGE`.
+    """
+    return signing.dumps(user.pk, salt=TOKEN_SALT)
+
+
+def get_profiling_trigger(request):
+    """
+    Returns why the request should be profiled or `None`:
+    * a logged in staff user asked for it with `?_profile=1` or `X-Profile: 1`,
+    * the `X-Profile` header holds a token issued to a staff user,
+    * it was picked at random with the `PROFILING_SAMPLE_RATE` probability.
+    """
+    header = request.META.get(PROFILE_HEADER)
+    if header == '1' or request.GET.get(PROFILE_QUERY_FLAG) == '1':
+        if request.user.is_authenticated and request.user.is_staff:
+            return ProfilingTriggers.STAFF
+    elif header:
+        try:
+            user_id = signing.loads(header, salt=TOKEN_SALT,
+                                    max_age=settings.PROFILING_TOKEN_MAX_AGE.total_seconds())
+        except signing.BadSignature:
+            user_id = None
+        # users who lost the staff status since can't profile anymore
+        if user_id is not None and get_user_model().objects.filter(pk=user_id, is_active=True, is_staff=True).exists():
+            return ProfilingTriggers.TOKEN
+
+    if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return ProfilingTriggers.SAMPLED
+    return None
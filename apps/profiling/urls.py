@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.urls import path
+from django.views.decorators.http import require_http_methods
+
+from .views import profile_detail_view, profile_file_view, profile_list_view
+
+app_name = 'profiling'
+
+# browsed from the admin - only by staff users
+urlpatterns = [
+    path('', admin.site.admin_view(require_http_methods(['GET', 'POST'])(profile_list_view)),
+         name='profile-list-view'),
+    path('<str:profile_id>/', admin.site.admin_view(profile_detail_view), name='profile-detail-view'),
+    path('<str:profile_id>/<str:file_name>', admin.site.admin_view(profile_file_view), name='profile-file-view'),
+]
@@ -0,0 +1,46 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.utils.translation import gettext as _
+
+from .store import DOWNLOADABLE_FILES, PSTATS_TEXT_FILE, get_profile_store
+from .triggers import make_profiling_token
+
+
+def profile_list_view(request):
+    """
+    Lists the stored profiles, the newest first. POST issues a profiling token for the `X-Profile` header.
+    """
+    context = dict(admin.site.each_context(request), title=_('Request profiles'),
+                   profiles=get_profile_store().list())
+    if request.method == 'POST':
+        context['token'] = make_profiling_token(request.user)
+    return TemplateResponse(request, 'profiling/profile_list.html', context)
+
+
+def profile_detail_view(request, profile_id):
+    profile_store = get_profile_store()
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise Http404
+
+    try:
+        with open(profile_store.get_path(profile_id, PSTATS_TEXT_FILE)) as pstats_text_file:
+            pstats_text = pstats_text_file.read()
+    except FileNotFoundError:
+        raise Http404
+
+    return TemplateResponse(request, 'profiling/profile_detail.html', dict(
+        admin.site.each_context(request), title=_('Request profile {}').format(profile_id), profile=profile,
+        pstats_text=pstats_text, files=DOWNLOADABLE_FILES))
+
+
+def profile_file_view(request, profile_id, file_name):
+    if file_name not in DOWNLOADABLE_FILES:
+        raise Http404
+
+    try:
+        return FileResponse(open(get_profile_store().get_path(profile_id, file_name), 'rb'), as_attachment=True,
+                            filename='{}-{}'.format(profile_id, file_name))
+    except (ValueError, FileNotFoundError):
+        raise Http404
@@ -0,0 +1,305 @@
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import request_finished, setting_changed
+from django.db import DatabaseError, close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from apps.metrics.metrics import ACCESS_LOGS_WRITTEN
+from .models import SecuredEntity, SecuredEntityAccessLog
+from .stats import get_visit_date, record_daily_visits
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FILE_RE = re.compile(r'^access-log-(?P<pid>\d+)(-\d+)?\.(spool|flushing)$')
+
+
+def write_access_logs(events, batch_size=500):
+    """
+    Stores (secured_entity_id, created) access events with bulk inserts in a single transaction and updates the
+    daily stats rollup.
+
+    Events of secured entities removed since the access happened are skipped.
+    """
+    events = list(events)
+    if not events:
+        return 0
+
+    written = 0
+
+    with transaction.atomic():
+        for start in range(0, len(events), batch_size):
+            batch = events[start:start + batch_size]
+            entity_types = dict(SecuredEntity.objects.filter(pk__in={event[0] for event in batch})
+                                .order_by().values_list('pk', 'type'))
+            batch = [event for event in batch if event[0] in entity_types]
+
+            SecuredEntityAccessLog.objects.bulk_create([
+                SecuredEntityAccessLog(secured_entity_id=secured_entity_id, created=created)
+                for secured_entity_id, created in batch])
+            record_daily_visits((get_visit_date(created), secured_entity_id, entity_types[secured_entity_id])
+                                for secured_entity_id, created in batch)
+            written += len(batch)
+
+    ACCESS_LOGS_WRITTEN.inc(written)
+    return written
+
+
+def read_spool_file(path):
+    events = []
+    with open(path, encoding='utf-8') as spool_file:
+        for line in spool_file:
+            try:
+                event = json.loads(line)
+                events.append((uuid.UUID(event['id']), parse_datetime(event['created'])))
+            except (ValueError, KeyError):
+                # the last line could be cut in half when the process was killed while writing it
+                logger.warning('Skipping malformed access log spool line in %s: %r', path, line)
+    return events
+
+
+def drain_spool_file(path, batch_size=500):
+    written = write_access_logs(read_spool_file(path), batch_size=batch_size)
+    os.remove(path)
+    return written
+
+
+def find_orphaned_spool_files(spool_dir, include_alive=False):
+    """
+    Lists spool files left behind by processes which are not running anymore (e.g. killed or crashed workers).
+    """
+    if not os.path.isdir(spool_dir):
+        return []
+
+    spool_files = []
+    for file_name in sorted(os.listdir(spool_dir)):
+        match = SPOOL_FILE_RE.match(file_name)
+        if match and (include_alive or not _is_process_alive(int(match.group('pid')))):
+            spool_files.append(os.path.join(spool_dir, file_name))
+    return spool_files
+
+
+def _is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AccessLogSink:
+    """
+    Base class of access log sinks. Views only enqueue access events, the sink decides when they are stored.
+
+    Events are never stored by `enqueue` itself - due ones are stored once the response has been sent
+    (`request_finished`) and, with `background_flush`, by a thread of the process, so they are stored in time also
+    when no more requests come.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=5, background_flush=False, **kwargs):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.background_flush = background_flush
+        self._flush_thread_pid = None
+        self._flush_thread_lock = threading.Lock()
+
+    def enqueue(self, secured_entity_id):
+        raise NotImplementedError
+
+    def flush(self):
+        return 0
+
+    def get_flush_delay(self):
+        """
+        Seconds until the pending events are due to be stored (0 when they are due already), `None` without events.
+        """
+        return None
+
+    def flush_if_due(self):
+        if self.get_flush_delay() == 0:
+            return self.flush()
+        return 0
+
+    def _get_flush_delay(self, pending, oldest_event_time):
+        if not pending:
+            return None
+        if pending >= self.batch_size:
+            return 0
+        return max(0, oldest_event_time + self.flush_interval - time.monotonic())
+
+    def _start_flush_thread(self):
+        # once per process - gunicorn forks the workers after the sink could have been created
+        if not self.background_flush or self._flush_thread_pid == os.getpid():
+            return
+
+        with self._flush_thread_lock:
+            if self._flush_thread_pid != os.getpid():
+                self._flush_thread_pid = os.getpid()
+                threading.Thread(target=self._run_flush_thread, name='access-log-flush', daemon=True).start()
+
+    def _run_flush_thread(self):
+        while True:
+            delay = self.get_flush_delay()
+            time.sleep(self.flush_interval if delay is None else max(delay, 0.01))
+            try:
+                self.flush_if_due()
+            except Exception:
+                logger.exception('Could not store access log events.')
+            finally:
+                # the thread has its own database connection
+                close_old_connections()
+
+
+class DirectAccessLogSink(AccessLogSink):
+    """
+    Stores every access event right away, inside of the request.
+    """
+
+    def enqueue(self, secured_entity_id):
+        write_access_logs([(secured_entity_id, timezone.now())])
+
+
+class BufferedAccessLogSink(AccessLogSink):
+    """
+    Keeps access events in memory and stores them in batches when `batch_size` events are pending or the oldest one
+    waited for `flush_interval` seconds. Pending events are lost when the process is killed.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._events = []
+        self._oldest_event_time = None
+        atexit.register(self.flush)
+
+    def enqueue(self, secured_entity_id):
+        self._start_flush_thread()
+        with self._lock:
+            if not self._events:
+                self._oldest_event_time = time.monotonic()
+            self._events.append((secured_entity_id, timezone.now()))
+
+    def get_flush_delay(self):
+        with self._lock:
+            return self._get_flush_delay(len(self._events), self._oldest_event_time)
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+
+        try:
+            return write_access_logs(events, batch_size=self.batch_size)
+        except DatabaseError:
+            logger.exception('Could not store %s access log events, they will be retried.', len(events))
+            with self._lock:
+                self._events[:0] = events
+            return 0
+
+
+class SpoolAccessLogSink(AccessLogSink):
+    """
+    Appends access events to a per process spool file and stores them in batches when `batch_size` events are
+    pending or the oldest one waited for `flush_interval` seconds.
+
+    Spool files which could not be stored (e.g. the database was down) are retried by the next flush of the process.
+    Spool files survive a crash of the process, `manage.py drain_access_log_spool` stores the leftovers.
+    """
+
+    def __init__(self, spool_dir, **kwargs):
+        super().__init__(**kwargs)
+        self.spool_dir = spool_dir
+        self._lock = threading.Lock()
+        # only one flush of the process drains the spool files at a time
+        self._flush_lock = threading.Lock()
+        self._pending = 0
+        self._oldest_event_time = None
+        os.makedirs(self.spool_dir, exist_ok=True)
+        atexit.register(self.flush)
+
+    @property
+    def spool_path(self):
+        # computed on each call because gunicorn forks the workers after the sink could have been created
+        return os.path.join(self.spool_dir, 'access-log-{}.spool'.format(os.getpid()))
+
+    def enqueue(self, secured_entity_id):
+        line = json.dumps({'id': str(secured_entity_id), 'created': timezone.now().isoformat()})
+
+        self._start_flush_thread()
+        with self._lock:
+            with open(self.spool_path, 'a', encoding='utf-8') as spool_file:
+                spool_file.write(line + '\n')
+
+            if not self._pending:
+                self._oldest_event_time = time.monotonic()
+            self._pending += 1
+
+    def get_flush_delay(self):
+        with self._lock:
+            return self._get_flush_delay(self._pending, self._oldest_event_time)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                # events of spool files which failed to be stored before are still counted as pending
+                flushed = self._pending
+                spool_path = self.spool_path
+                if os.path.exists(spool_path):
+                    # new events go to a fresh spool file while this one is being stored
+                    flushing_path = '{}-{}.flushing'.format(spool_path[:-len('.spool')], int(time.time() * 1000000))
+                    os.rename(spool_path, flushing_path)
+                flushed_time = time.monotonic()
+
+            written = 0
+            for flushing_path in self._get_flushing_paths():
+                try:
+                    written += drain_spool_file(flushing_path, batch_size=self.batch_size)
+                except DatabaseError:
+                    # the events stay pending (and due), so the next flush retries
+                    logger.exception('Could not store access log spool %s, it will be retried.', flushing_path)
+                    return written
+
+            with self._lock:
+                self._pending -= flushed
+                # events enqueued while the spool files were stored came after the rename
+                self._oldest_event_time = flushed_time if self._pending else None
+            return written
+
+    def _get_flushing_paths(self):
+        pid = os.getpid()
+        flushing_paths = []
+        for file_name in sorted(os.listdir(self.spool_dir)):
+            match = SPOOL_FILE_RE.match(file_name)
+            if match and int(match.group('pid')) == pid and file_name.endswith('.flushing'):
+                flushing_paths.append(os.path.join(self.spool_dir, file_name))
+        return flushing_paths
+
+
+@lru_cache(maxsize=None)
+def get_access_log_sink():
+    sink_class = import_string(settings.SECURED_ENTITY_ACCESS_LOG_SINK)
+    return sink_class(**settings.SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS)
+
+
+@receiver(request_finished)
+def flush_due_access_logs(**kwargs):
+    # after the response was sent, so the request which fills up the batch doesn't wait for it to be stored
+    get_access_log_sink().flush_if_due()
+
+
+@receiver(setting_changed)
+def reset_access_log_sink(setting, **kwargs):
+    if setting.startswith('SECURED_ENTITY_ACCESS_LOG_SINK'):
+        get_access_log_sink.cache_clear()
@@ -1,8 +1,10 @@
 from django.utils.translation import gettext as _
 
+from .bulk import bulk_regenerate_passwords
+
+
 def regenerate_passwords(modeladmin, request, queryset):
-    for obj in queryset.all():
-        obj.regenerate_password()
+    count = bulk_regenerate_passwords(queryset)
 
     modeladmin.message_user(request, _('Passwords have been regenerated for %(count)s secured entities.') %
-                            {'count': queryset.count()})
+                            {'count': count})
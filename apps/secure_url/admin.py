@@ -1,17 +1,33 @@
 from django.contrib import admin
 from django.urls.base import reverse
 from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy as _
 
 from .actions import regenerate_passwords
 from .models import SecuredEntity, SecuredEntityAccessLog
 
 
+class AccessibleListFilter(admin.SimpleListFilter):
+    title = _('is accessible')
+    parameter_name = 'accessible'
+
+    def lookups(self, request, model_admin):
+        return (('1', _('Yes')), ('0', _('No')))
+
+    def queryset(self, request, queryset):
+        if self.value() == '1':
+            return queryset.accessible()
+        if self.value() == '0':
+            return queryset.expired()
+        return queryset
+
+
 @admin.register(SecuredEntity)
 class SecuredEntityAdmin(admin.ModelAdmin):
-    list_display = ('user', 'created', 'is_accessible')
-    list_filter = ('user', 'created')
+    list_display = ('user', 'created', 'expires_at', 'is_accessible')
+    list_filter = ('user', AccessibleListFilter, 'created')
     actions = (regenerate_passwords,)
-    fields = ('user', 'url', 'file', 'password', 'secure_url', 'created')
+    fields = ('user', 'url', 'file', 'password', 'secure_url', 'created', 'expires_at')
     readonly_fields = ('user', 'url', 'file', 'password', 'secure_url', 'created')
 
     @mark_safe
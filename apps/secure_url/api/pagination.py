@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from ..pagination import InvalidCursor, paginate_by_keyset
+
+
+class SecuredEntityKeysetPagination(BasePagination):
+    """
+    Stable cursor pagination over (-created, id) - each page costs the same, no matter how deep the client scrolls.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.SECURED_ENTITY_LIST_PAGE_SIZE
+
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        try:
+            page, self.next_cursor = paginate_by_keyset(queryset, request.query_params.get(self.cursor_query_param),
+                                                        self.get_page_size(request))
+        except InvalidCursor as e:
+            raise NotFound(str(e))
+
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(name=self.cursor_query_param, required=False, location='query',
+                          schema=coreschema.String(description='The pagination cursor value.')),
+            coreapi.Field(name=self.page_size_query_param, required=False, location='query',
+                          schema=coreschema.Integer(description='Number of results to return per page.')),
+        ]
@@ -1,34 +1,174 @@
+from django.conf import settings
+from django.core.validators import URLValidator
+from django.utils import timezone
+from django.utils.translation import gettext as _
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
-from ..models import SecuredEntity
-from ..validators import validate_access_to_secured_entity, validate_secured_entity
+from ..constants import StatsGranularity
+from ..models import SecuredEntity, SecuredEntityUpload
+from ..uploads import start_upload
+from ..validators import validate_access_to_secured_entity, validate_accessible_time, validate_secured_entity
 
 
 class SecuredEntitySerializer(serializers.ModelSerializer):
     access_url = serializers.SerializerMethodField()
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    accessible_time = serializers.DurationField(write_only=True, required=False,
+                                                validators=[validate_accessible_time])
 
     def validate(self, attrs):
         return validate_secured_entity(attrs)
 
+    def create(self, validated_data):
+        validated_data['expires_at'] = timezone.now() + validated_data.pop(
+            'accessible_time', settings.SECURED_ENTITY_ACCESSIBLE_TIME)
+        return super().create(validated_data)
+
     def get_access_url(self, obj):
         return self.context['request'].build_absolute_uri(
             reverse('secure_url.api:secured-entity-get-access-api-view', args=(obj.pk,)))
 
     class Meta:
         model = SecuredEntity
-        fields = ('id', 'url', 'file', 'type', 'created', 'password', 'is_accessible', 'access_url', 'user')
-        read_only_fields = ('type', 'created', 'password', 'is_accessible', 'access_url', 'user')
+        fields = ('id', 'url', 'file', 'type', 'created', 'expires_at', 'password', 'is_accessible', 'access_url',
+                  'user', 'accessible_time')
+        read_only_fields = ('type', 'created', 'expires_at', 'password', 'is_accessible', 'access_url', 'user')
         extra_kwargs = {
             'url': {'write_only': True},
             'file': {'write_only': True}
         }
 
 
+class SecuredEntityBulkItemSerializer(serializers.Serializer):
+    url = serializers.CharField(validators=[URLValidator()])
+    accessible_time = serializers.DurationField(required=False, validators=[validate_accessible_time])
+
+
+class SecuredEntityBulkCreateSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_items(self, value):
+        if len(value) > settings.SECURED_ENTITY_BULK_CREATE_MAX_ITEMS:
+            raise serializers.ValidationError(_('At most %(count)s items can be created at once.') % {
+                'count': settings.SECURED_ENTITY_BULK_CREATE_MAX_ITEMS})
+        return value
+
+
+class SecuredEntityBulkRegeneratePasswordsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    accessible = serializers.NullBooleanField(required=False)
+    created_from = serializers.DateTimeField(required=False)
+    created_to = serializers.DateTimeField(required=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.SECURED_ENTITY_BULK_REGENERATE_MAX_IDS:
+            raise serializers.ValidationError(_('At most %(count)s ids can be given at once.') % {
+                'count': settings.SECURED_ENTITY_BULK_REGENERATE_MAX_IDS})
+        return value
+
+    def validate(self, data):
+        # an empty request would regenerate all the passwords of the user, it has to be asked for explicitly
+        if not any(data.get(field) is not None for field in self.fields):
+            raise serializers.ValidationError(_('Give ids or at least one filter.'))
+        return data
+
+
+class SecuredEntityUploadSerializer(serializers.ModelSerializer):
+    file_name = serializers.CharField(write_only=True, max_length=64)
+    upload_url = serializers.SerializerMethodField()
+
+    def get_upload_url(self, obj):
+        return self.context['request'].build_absolute_uri(
+            reverse('secure_url.api:secured-entity-upload-api-view', args=(obj.pk,)))
+
+    def validate_size(self, value):
+        if value > settings.SECURED_ENTITY_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(_('At most %(size)s bytes can be uploaded.') % {
+                'size': settings.SECURED_ENTITY_UPLOAD_MAX_SIZE})
+        return value
+
+    def create(self, validated_data):
+        return start_upload(self.context['request'].user, validated_data['file_name'], validated_data['size'])
+
+    class Meta:
+        model = SecuredEntityUpload
+        fields = ('id', 'file_name', 'size', 'offset', 'upload_url')
+        read_only_fields = ('offset',)
+        extra_kwargs = {
+            'size': {'min_value': 1}
+        }
+
+
+class SecuredEntityUploadFinalizeSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False)
+
+
+class SecuredEntityPreflightSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=64)
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$')
+
+    def validate_sha256(self, value):
+        return value.lower()
+
+
+class SecuredEntityRowsSerializer:
+    """
+    Read only counterpart of `SecuredEntitySerializer` for lists - works on `.values(*source_fields)` rows and computes
+    the access url prefix and current time once per response instead of once per secured entity. The output is the
+    same as the one of `SecuredEntitySerializer(many=True)`.
+    """
+    source_fields = ('id', 'password_salt', 'type', 'created', 'expires_at')
+    _pk_placeholder = '00000000-0000-0000-0000-000000000000'
+
+    def __init__(self, rows, context):
+        self.rows = rows
+        self.context = context
+
+    @property
+    def data(self):
+        access_url_prefix, access_url_suffix = self.context['request'].build_absolute_uri(
+            reverse('secure_url.api:secured-entity-get-access-api-view', args=(self._pk_placeholder,))
+        ).split(self._pk_placeholder)
+        datetime_field = serializers.DateTimeField()
+        now = timezone.now()
+
+        return [{
+            'id': str(row['id']),
+            'type': row['type'],
+            'created': datetime_field.to_representation(row['created']),
+            'expires_at': datetime_field.to_representation(row['expires_at']),
+            'password': SecuredEntity.make_password(row['password_salt'], row['id']),
+            'is_accessible': row['expires_at'] > now,
+            'access_url': '{}{}{}'.format(access_url_prefix, row['id'], access_url_suffix),
+        } for row in self.rows]
+
+
 class SecuredEntityAccessSerializer(serializers.Serializer):
     password = serializers.CharField()
 
     def validate(self, data):
         validate_access_to_secured_entity(data, self.context['secured_entity'])
         return data
+
+
+class SecuredEntityDateRangeQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def get_fields(self):
+        # `from` and `to` are not valid python identifiers for the declared fields
+        fields = super().get_fields()
+        fields['from'] = fields.pop('date_from')
+        fields['to'] = fields.pop('date_to')
+        return fields
+
+    def validate(self, data):
+        if data.get('from') and data.get('to') and data['from'] > data['to']:
+            raise serializers.ValidationError({'to': _('Has to be the same or later day than from.')})
+        return data
+
+
+class SecuredEntityStatsQuerySerializer(SecuredEntityDateRangeQuerySerializer):
+    granularity = serializers.ChoiceField(choices=StatsGranularity.get_choices(), default=StatsGranularity.DAY)
@@ -4,10 +4,21 @@ from base64 import b64encode
 from PIL import Image
 from django.contrib.auth import get_user_model
 from rest_framework.reverse import reverse
+from django.test import override_settings
 from rest_framework.test import APITestCase
 
+from ...access_log import get_access_log_sink
+from ...tests.mixins import TemporaryMediaRootMixin
 
-class BaseApiTestCase(APITestCase):
+
+# throttling is tested on its own, other tests make many access attempts from the same address (buckets are kept in
+# the process, so they don't outlive the test run) - access logs are stored in the thread of the test (the test
+# database transaction is not visible to other threads)
+@override_settings(SECURED_ENTITY_ACCESS_LOG_SINK='apps.secure_url.access_log.BufferedAccessLogSink',
+                   SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS={}, SECURED_ENTITY_ACCESS_THROTTLE_RATES={},
+                   SECURED_ENTITY_ACCESS_THROTTLE='apps.secure_url.throttling.LocMemThrottle',
+                   SECURED_ENTITY_ACCESS_THROTTLE_OPTIONS={})
+class BaseApiTestCase(TemporaryMediaRootMixin, APITestCase):
     def setUp(self):
         username = 'test'
         password = '123qweasd'
@@ -23,6 +34,9 @@ class BaseApiTestCase(APITestCase):
             'url': 'https://www.facebook.com/'
         }
 
+    def tearDown(self):
+        get_access_log_sink().flush()
+
     def _get_tmp_file(self):
         tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
 
@@ -1,6 +1,6 @@
 from datetime import timedelta
 
-from django.conf import settings
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 
@@ -83,7 +83,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -95,7 +95,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -106,7 +106,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -118,7 +118,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -176,13 +176,15 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
                                     **self.extra_with_permissions)
 
         self.assertIn('secured_entity', response.data)
-        self.assertIn('http://testserver/media/secure_url/files/', response.data['secured_entity'])
+        self.assertIn('http://testserver{}?grant='.format(
+            reverse('secure_url:secured-entity-download-view', args=(self.secured_entity.pk,))),
+            response.data['secured_entity'])
 
     def test_access_secured_entity_from_file_correct_password_just_before_deadline_results_in_200__authorized(self):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -194,19 +196,21 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
 
         self.assertIn('secured_entity', response.data)
-        self.assertIn('http://testserver/media/secure_url/files/', response.data['secured_entity'])
+        self.assertIn('http://testserver{}?grant='.format(
+            reverse('secure_url:secured-entity-download-view', args=(self.secured_entity.pk,))),
+            response.data['secured_entity'])
 
     def test_access_secured_entity_from_file_correct_password_just_after_deadline_results_in_400__authorized(self):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -218,7 +222,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra_with_permissions)
@@ -281,7 +285,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -293,7 +297,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -304,7 +308,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -316,7 +320,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -374,13 +378,15 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
                                     **self.extra)
 
         self.assertIn('secured_entity', response.data)
-        self.assertIn('http://testserver/media/secure_url/files/', response.data['secured_entity'])
+        self.assertIn('http://testserver{}?grant='.format(
+            reverse('secure_url:secured-entity-download-view', args=(self.secured_entity.pk,))),
+            response.data['secured_entity'])
 
     def test_access_secured_entity_from_file_correct_password_just_before_deadline_results_in_200__unauthorized(self):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -392,19 +398,21 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
 
         self.assertIn('secured_entity', response.data)
-        self.assertIn('http://testserver/media/secure_url/files/', response.data['secured_entity'])
+        self.assertIn('http://testserver{}?grant='.format(
+            reverse('secure_url:secured-entity-download-view', args=(self.secured_entity.pk,))),
+            response.data['secured_entity'])
 
     def test_access_secured_entity_from_file_correct_password_just_after_deadline_results_in_400__unauthorized(self):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -416,7 +424,7 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
                                     **self.extra)
@@ -426,3 +434,65 @@ class SecuredEntityAccessApiTest(BaseApiTestCase):
                 "Sorry, this secured entity is no longer available."
             ]
         }, response.data)
+
+    def test_access_secured_entity_from_url_correct_password_executes_one_query__unauthorized(self):
+        self._create_secured_entity_from_url()
+
+        # one narrow SELECT of the secured entity, the access log is only enqueued
+        with self.assertNumQueries(1):
+            self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
+                             **self.extra)
+
+    def test_access_secured_entity_from_url_wrong_password_executes_one_query__unauthorized(self):
+        self._create_secured_entity_from_url()
+
+        with self.assertNumQueries(1):
+            self.client.post(self.access_url, {'password': 'xxx'}, format='json', **self.extra)
+
+    @override_settings(SECURED_ENTITY_CACHE='default')
+    def test_access_secured_entity_again_is_served_from_cache__unauthorized(self):
+        self._create_secured_entity_from_url()
+        self.client.post(self.access_url, {'password': 'xxx'}, format='json', **self.extra)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.access_url, {'password': self.response.data['password']},
+                                        format='json', **self.extra)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_RATES={'secured_entity': (2, 60)})
+    def test_access_secured_entity_is_throttled_after_wrong_passwords_only(self):
+        self._create_secured_entity_from_url()
+
+        for _ in range(3):
+            response = self.client.post(self.access_url, {'password': self.response.data['password']},
+                                        format='json', **self.extra)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for _ in range(2):
+            response = self.client.post(self.access_url, {'password': 'wrong'}, format='json', **self.extra)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.post(self.access_url, {'password': self.response.data['password']}, format='json',
+                                    **self.extra)
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_RATES={'ip': (2, 60)})
+    def test_access_secured_entity_is_throttled_by_ip_without_database_queries(self):
+        self._create_secured_entity_from_url()
+        other_access_url = reverse('secure_url.api:secured-entity-get-access-api-view', args=(
+            self.client.post(self.list_create_url, self.data_with_url, format='json',
+                             **self.extra_with_permissions).data['id'],))
+
+        for access_url in (self.access_url, other_access_url):
+            self.client.post(access_url, {'password': 'wrong'}, format='json', **self.extra)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.access_url, {'password': self.secured_entity.password}, format='json',
+                                        **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+        self.assertEqual('30', response['Retry-After'])
+
+        response = self.client.post(self.access_url, {'password': self.secured_entity.password}, format='json',
+                                    REMOTE_ADDR='10.0.0.1', **self.extra)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
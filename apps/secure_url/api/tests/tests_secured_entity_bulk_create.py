@@ -0,0 +1,86 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...constants import SecuredEntityTypes
+from ...models import SecuredEntity
+
+
+class SecuredEntityBulkCreateApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.bulk_create_url = reverse('secure_url.api:secured-entity-bulk-create-api-view')
+        self.items = [{'url': 'https://example.com/{}'.format(index)} for index in range(5)]
+
+    def _bulk_create(self, items):
+        return self.client.post(self.bulk_create_url, {'items': items}, format='json', **self.extra_with_permissions)
+
+    def test_bulk_create_has_to_be_authenticated(self):
+        response = self.client.post(self.bulk_create_url, {'items': self.items}, format='json', **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_bulk_create_creates_secured_links_in_input_order(self):
+        response = self._bulk_create(self.items)
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        secured_entities = {str(pk): secured_entity for pk, secured_entity in
+                            SecuredEntity.objects.in_bulk([item['id'] for item in response.data['items']]).items()}
+        self.assertListEqual([item['url'] for item in self.items],
+                             [secured_entities[item['id']].url for item in response.data['items']])
+        for item in response.data['items']:
+            secured_entity = secured_entities[item['id']]
+            self.assertEqual(secured_entity.password, item['password'])
+            self.assertEqual(SecuredEntityTypes.LINK, secured_entity.type)
+            self.assertEqual(self.user, secured_entity.user)
+            self.assertEqual('http://testserver{}'.format(
+                reverse('secure_url.api:secured-entity-get-access-api-view', args=(item['id'],))),
+                item['access_url'])
+
+    def test_bulk_create_assigns_unique_password_salts(self):
+        self._bulk_create(self.items)
+
+        self.assertEqual(len(self.items), len(set(SecuredEntity.objects.values_list('password_salt', flat=True))))
+
+    def test_bulk_created_secured_links_are_accessible(self):
+        item = self._bulk_create(self.items).data['items'][0]
+
+        response = self.client.post(reverse('secure_url.api:secured-entity-get-access-api-view', args=(item['id'],)),
+                                    {'password': item['password']}, format='json', **self.extra)
+
+        self.assertEqual({'secured_entity': self.items[0]['url']}, response.data)
+
+    def test_bulk_create_reports_errors_of_invalid_items(self):
+        items = [self.items[0], {'url': 'xxx'}, self.items[1], {'url': self.items[2]['url'], 'accessible_time': '60'}]
+
+        response = self._bulk_create(items)
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(2, SecuredEntity.objects.count())
+        self.assertIn('id', response.data['items'][0])
+        self.assertEqual({'url': ['Enter a valid URL.']}, response.data['items'][1]['errors'])
+        self.assertIn('id', response.data['items'][2])
+        self.assertIn('accessible_time', response.data['items'][3]['errors'])
+
+    def test_bulk_create_without_valid_items_results_in_400(self):
+        response = self._bulk_create([{'url': 'xxx'}, {}])
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(2, len(response.data['items']))
+        self.assertFalse(SecuredEntity.objects.exists())
+
+    @override_settings(SECURED_ENTITY_BULK_CREATE_MAX_ITEMS=4)
+    def test_bulk_create_of_too_many_items_results_in_400(self):
+        response = self._bulk_create(self.items)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(SecuredEntity.objects.exists())
+
+    def test_bulk_create_uses_single_insert(self):
+        self._bulk_create(self.items[:1])
+
+        with self.assertNumQueries(4):
+            # authentication and the insert in a transaction (savepoint within the test case)
+            self._bulk_create(self.items)
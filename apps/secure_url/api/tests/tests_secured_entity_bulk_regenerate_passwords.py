@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...models import SecuredEntity
+
+
+class SecuredEntityBulkRegeneratePasswordsApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.regenerate_passwords_url = reverse('secure_url.api:secured-entity-bulk-regenerate-passwords-api-view')
+        self.secured_entities = [SecuredEntity.objects.create(user=self.user,
+                                                              url='https://example.com/{}'.format(index))
+                                 for index in range(4)]
+        self.passwords = self._get_passwords()
+
+    def _get_passwords(self):
+        return {secured_entity.pk: secured_entity.password for secured_entity in SecuredEntity.objects.all()}
+
+    def _regenerate_passwords(self, data):
+        return self.client.post(self.regenerate_passwords_url, data, format='json', **self.extra_with_permissions)
+
+    def _assert_regenerated(self, regenerated_secured_entities):
+        passwords = self._get_passwords()
+        for secured_entity in self.secured_entities:
+            if secured_entity in regenerated_secured_entities:
+                self.assertNotEqual(self.passwords[secured_entity.pk], passwords[secured_entity.pk])
+            else:
+                self.assertEqual(self.passwords[secured_entity.pk], passwords[secured_entity.pk])
+
+    def test_regenerate_passwords_has_to_be_authenticated(self):
+        response = self.client.post(self.regenerate_passwords_url, {'accessible': True}, format='json', **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self._assert_regenerated([])
+
+    def test_regenerate_passwords_by_ids(self):
+        response = self._regenerate_passwords({'ids': [str(self.secured_entities[0].pk),
+                                                       str(self.secured_entities[2].pk)]})
+
+        self.assertEqual({'regenerated': 2}, response.data)
+        self._assert_regenerated([self.secured_entities[0], self.secured_entities[2]])
+
+    def test_regenerate_passwords_by_filter(self):
+        SecuredEntity.objects.filter(pk=self.secured_entities[1].pk).update(expires_at=timezone.now())
+
+        response = self._regenerate_passwords({'accessible': True})
+
+        self.assertEqual({'regenerated': 3}, response.data)
+        self._assert_regenerated([self.secured_entities[0], self.secured_entities[2], self.secured_entities[3]])
+
+    def test_regenerate_passwords_by_created(self):
+        SecuredEntity.objects.filter(pk=self.secured_entities[3].pk).update(
+            created=timezone.now() - timedelta(days=2))
+
+        response = self._regenerate_passwords({'created_to': timezone.now() - timedelta(days=1)})
+
+        self.assertEqual({'regenerated': 1}, response.data)
+        self._assert_regenerated([self.secured_entities[3]])
+
+    def test_regenerate_passwords_skips_secured_entities_of_other_users(self):
+        other_secured_entity = SecuredEntity.objects.create(
+            user=get_user_model().objects.create_user(username='other'), url='https://example.com/other')
+
+        response = self._regenerate_passwords({'ids': [str(other_secured_entity.pk)]})
+
+        self.assertEqual({'regenerated': 0}, response.data)
+        self.assertEqual(other_secured_entity.password, SecuredEntity.objects.get(pk=other_secured_entity.pk).password)
+
+    def test_regenerate_passwords_without_ids_and_filters_results_in_400(self):
+        response = self._regenerate_passwords({})
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self._assert_regenerated([])
+
+    @override_settings(SECURED_ENTITY_BULK_REGENERATE_MAX_IDS=1)
+    def test_regenerate_passwords_of_too_many_ids_results_in_400(self):
+        response = self._regenerate_passwords({'ids': [str(self.secured_entities[0].pk),
+                                                       str(self.secured_entities[1].pk)]})
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self._assert_regenerated([])
+
+    def test_regenerated_passwords_give_access(self):
+        self._regenerate_passwords({'accessible': True})
+        secured_entity = SecuredEntity.objects.get(pk=self.secured_entities[0].pk)
+
+        response = self.client.post(reverse('secure_url.api:secured-entity-get-access-api-view',
+                                            args=(secured_entity.pk,)),
+                                    {'password': secured_entity.password}, format='json', **self.extra)
+
+        self.assertEqual({'secured_entity': secured_entity.url}, response.data)
+
+    def test_regenerate_passwords_updates_in_batches(self):
+        with self.assertNumQueries(4):
+            # authentication, selection of the batch, its update and selection of the next (empty) batch
+            self._regenerate_passwords({'accessible': True})
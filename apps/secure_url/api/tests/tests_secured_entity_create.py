@@ -1,3 +1,7 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 
@@ -67,7 +71,7 @@ class SecuredEntityCreateApiTest(BaseApiTestCase):
         response = self.client.post(self.list_create_url, self.data_with_url, format='json',
                                     **self.extra_with_permissions)
 
-        self.assertListEqual(['id', 'type', 'created', 'password', 'is_accessible', 'access_url'],
+        self.assertListEqual(['id', 'type', 'created', 'expires_at', 'password', 'is_accessible', 'access_url'],
                              list(response.data.keys()))
         self.assertEqual(SecuredEntityTypes.LINK, response.data['type'])
         self.assertTrue(response.data['is_accessible'])
@@ -107,7 +111,7 @@ class SecuredEntityCreateApiTest(BaseApiTestCase):
             response = self.client.post(self.list_create_url, {'file': file}, format='multipart',
                                         **self.extra_with_permissions)
 
-        self.assertListEqual(['id', 'type', 'created', 'password', 'is_accessible', 'access_url'],
+        self.assertListEqual(['id', 'type', 'created', 'expires_at', 'password', 'is_accessible', 'access_url'],
                              list(response.data.keys()))
         self.assertEqual(SecuredEntityTypes.FILE, response.data['type'])
         self.assertTrue(response.data['is_accessible'])
@@ -139,3 +143,29 @@ class SecuredEntityCreateApiTest(BaseApiTestCase):
                 "You cannot provide both url or file."
             ]
         }, response.data)
+
+    def test_create_secured_entity_with_accessible_time_sets_expires_at(self):
+        before = timezone.now()
+
+        response = self.client.post(self.list_create_url, dict(self.data_with_url, accessible_time='3600'),
+                                    format='json', **self.extra_with_permissions)
+
+        expires_at = SecuredEntity.objects.get(pk=response.data['id']).expires_at
+        self.assertTrue(before + timedelta(hours=1) <= expires_at <= timezone.now() + timedelta(hours=1))
+
+    def test_create_secured_entity_without_accessible_time_uses_default(self):
+        before = timezone.now()
+
+        response = self.client.post(self.list_create_url, self.data_with_url, format='json',
+                                    **self.extra_with_permissions)
+
+        expires_at = SecuredEntity.objects.get(pk=response.data['id']).expires_at
+        self.assertTrue(before + settings.SECURED_ENTITY_ACCESSIBLE_TIME <= expires_at <=
+                        timezone.now() + settings.SECURED_ENTITY_ACCESSIBLE_TIME)
+
+    def test_create_secured_entity_with_accessible_time_out_of_bounds_results_in_400(self):
+        response = self.client.post(self.list_create_url, dict(self.data_with_url, accessible_time='60'),
+                                    format='json', **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('accessible_time', response.data)
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...models import SecuredEntity, SecuredEntityAccessLog
+
+
+class SecuredEntityExportApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.link = SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        other_user = get_user_model().objects.create_user(username='other')
+        self.other_link = SecuredEntity.objects.create(user=other_user, url=self.data_with_url['url'])
+
+        SecuredEntityAccessLog.objects.bulk_create([
+            SecuredEntityAccessLog(secured_entity=secured_entity,
+                                   created=datetime(2019, 3, day, 12, tzinfo=timezone.utc))
+            for secured_entity in (self.link, self.other_link) for day in (1, 2, 3)])
+        self.access_logs = list(SecuredEntityAccessLog.objects.order_by('pk'))
+
+    def _get_export_url(self, kind, export_format):
+        return reverse('secure_url.api:secured-entity-export-api-view',
+                       kwargs={'kind': kind, 'export_format': export_format})
+
+    def _get(self, url, data=None):
+        response = self.client.get(url, data, **self.extra_with_permissions)
+        content = b''.join(response.streaming_content).decode('utf-8') if response.streaming else response.content
+        return response, content
+
+    def test_export_has_to_be_authenticated(self):
+        response = self.client.get(self._get_export_url('access-logs', 'csv'), **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_export_streams_access_logs_of_user_as_csv(self):
+        response, content = self._get(self._get_export_url('access-logs', 'csv'), {'from': '2019-03-02'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEqual('text/csv; charset=utf-8', response['Content-Type'])
+        self.assertEqual([
+            ['id', 'secured_entity_id', 'type', 'created'],
+            [str(self.access_logs[1].pk), str(self.link.pk), 'links', '2019-03-02T12:00:00+00:00'],
+            [str(self.access_logs[2].pk), str(self.link.pk), 'links', '2019-03-03T12:00:00+00:00'],
+        ], list(csv.reader(io.StringIO(content))))
+
+    def test_export_streams_secured_entities_of_user_as_json_lines(self):
+        response, content = self._get(self._get_export_url('secured-entities', 'jsonl'))
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([{
+            'id': str(self.link.pk), 'type': 'links', 'url': self.link.url, 'file': '',
+            'created': self.link.created.isoformat(), 'expires_at': self.link.expires_at.isoformat(),
+        }], [json.loads(line) for line in content.splitlines()])
+
+    def test_export_with_wrong_range_results_in_400(self):
+        response, _ = self._get(self._get_export_url('access-logs', 'jsonl'),
+                                {'from': '2019-03-02', 'to': '2019-03-01'})
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_export_command_writes_all_access_logs_in_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'access-logs.jsonl')
+            call_command('export_access_data', 'access-logs', export_format='jsonl', date_to='2019-03-02',
+                         chunk_size=2, output=path, stdout=StringIO())
+
+            with open(path) as export_file:
+                exported = [json.loads(line)['id'] for line in export_file]
+
+        self.assertEqual(sorted(access_log.pk for access_log in self.access_logs if access_log.created.day <= 2),
+                         sorted(exported))
+
+    def test_export_command_filters_by_user(self):
+        stdout = StringIO()
+        call_command('export_access_data', 'secured-entities', username='other', stdout=stdout)
+
+        self.assertEqual(['id', str(self.other_link.pk)],
+                         [row[0] for row in csv.reader(io.StringIO(stdout.getvalue()))])
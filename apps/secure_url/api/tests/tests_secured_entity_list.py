@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from .tests_base import BaseApiTestCase
+from ..serializers import SecuredEntitySerializer
+from ...models import SecuredEntity
+
+
+@override_settings(SECURED_ENTITY_LIST_PAGE_SIZE=2)
+class SecuredEntityListApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        created = timezone.now()
+        self.secured_entities = [SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+                                 for _ in range(5)]
+        # two of them share the creation time, the id keeps the order stable
+        for index, secured_entity in enumerate(self.secured_entities):
+            secured_entity.created = created - timedelta(minutes=min(index, 3))
+            secured_entity.save(update_fields=['created'])
+
+        self.expected_ids = [str(secured_entity.pk) for secured_entity in
+                             SecuredEntity.objects.order_by('-created', '-id')]
+
+    def _get_all_pages(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url, **self.extra_with_permissions)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_list_secured_entities_has_to_be_authenticated(self):
+        response = self.client.get(self.list_create_url, **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_list_secured_entities_returns_first_page(self):
+        response = self.client.get(self.list_create_url, **self.extra_with_permissions)
+
+        self.assertListEqual(self.expected_ids[:2], [item['id'] for item in response.data['results']])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_list_secured_entities_pages_cover_all_secured_entities_once(self):
+        self.assertListEqual(self.expected_ids, self._get_all_pages(self.list_create_url))
+
+    def test_list_secured_entities_page_size_can_be_changed(self):
+        response = self.client.get(self.list_create_url, {'page_size': 10}, **self.extra_with_permissions)
+
+        self.assertEqual(5, len(response.data['results']))
+        self.assertIsNone(response.data['next'])
+
+    def test_list_secured_entities_page_does_not_depend_on_new_secured_entities(self):
+        response = self.client.get(self.list_create_url, **self.extra_with_permissions)
+        SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+
+        response = self.client.get(response.data['next'], **self.extra_with_permissions)
+
+        self.assertListEqual(self.expected_ids[2:4], [item['id'] for item in response.data['results']])
+
+    def test_list_secured_entities_with_invalid_cursor_results_in_404(self):
+        response = self.client.get(self.list_create_url, {'cursor': 'xxx'}, **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_list_secured_entities_output_is_the_same_as_of_model_serializer(self):
+        # one of them is not accessible anymore
+        SecuredEntity.objects.filter(pk=self.secured_entities[0].pk).update(
+            expires_at=timezone.now() - timedelta(hours=1))
+
+        response = self.client.get(self.list_create_url, {'page_size': 10}, **self.extra_with_permissions)
+        expected_data = SecuredEntitySerializer(SecuredEntity.objects.order_by('-created', '-id'), many=True,
+                                                context={'request': response.wsgi_request}).data
+
+        self.assertEqual(JSONRenderer().render(expected_data), JSONRenderer().render(response.data['results']))
+
+    def test_list_accessible_secured_entities(self):
+        SecuredEntity.objects.filter(pk=self.secured_entities[0].pk).update(
+            expires_at=timezone.now() - timedelta(hours=1))
+
+        accessible_ids = self._get_all_pages('{}?accessible=true'.format(self.list_create_url))
+        expired_ids = self._get_all_pages('{}?accessible=false'.format(self.list_create_url))
+
+        self.assertListEqual([expected_id for expected_id in self.expected_ids
+                              if expected_id != str(self.secured_entities[0].pk)], accessible_ids)
+        self.assertListEqual([str(self.secured_entities[0].pk)], expired_ids)
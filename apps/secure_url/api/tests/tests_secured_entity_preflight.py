@@ -0,0 +1,78 @@
+import hashlib
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...models import SecuredEntity, SecuredFileBlob
+
+
+class SecuredEntityPreflightApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.content = os.urandom(100)
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+        self.preflight_url = reverse('secure_url.api:secured-entity-preflight-api-view')
+        self.data = {'file_name': 'test.bin', 'size': len(self.content), 'sha256': self.sha256}
+
+    def test_preflight_has_to_be_authenticated(self):
+        response = self.client.post(self.preflight_url, self.data, format='json', **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_preflight_of_unknown_content_results_in_404(self):
+        response = self.client.post(self.preflight_url, self.data, format='json', **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertFalse(SecuredEntity.objects.exists())
+
+    def test_preflight_of_stored_content_creates_secured_entity_without_upload(self):
+        stored_secured_entity = SecuredEntity.objects.create(user=self.user,
+                                                             file=SimpleUploadedFile('other.bin', self.content))
+
+        response = self.client.post(self.preflight_url, self.data, format='json', **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        secured_entity = SecuredEntity.objects.get(pk=response.data['id'])
+        self.assertEqual(stored_secured_entity.file.path, secured_entity.file.path)
+        self.assertEqual('test.bin', os.path.basename(secured_entity.file.name))
+        self.assertEqual(2, SecuredFileBlob.objects.get(pk=self.sha256).references)
+
+    def test_preflight_of_stored_content_with_other_size_results_in_404(self):
+        SecuredEntity.objects.create(user=self.user, file=SimpleUploadedFile('other.bin', self.content))
+
+        response = self.client.post(self.preflight_url, dict(self.data, size=101), format='json',
+                                    **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_preflight_of_content_stored_only_by_other_user_results_in_404(self):
+        other_user = get_user_model().objects.create_user(username='other')
+        SecuredEntity.objects.create(user=other_user, file=SimpleUploadedFile('private.bin', self.content))
+
+        response = self.client.post(self.preflight_url, self.data, format='json', **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertFalse(SecuredEntity.objects.filter(user=self.user).exists())
+        self.assertEqual(1, SecuredFileBlob.objects.get(pk=self.sha256).references)
+
+    def test_preflight_of_content_of_other_user_results_in_same_404_as_unknown_content(self):
+        other_user = get_user_model().objects.create_user(username='other')
+        SecuredEntity.objects.create(user=other_user, file=SimpleUploadedFile('private.bin', self.content))
+        unknown_content_response = self.client.post(self.preflight_url, dict(self.data, sha256='0' * 64),
+                                                    format='json', **self.extra_with_permissions)
+
+        response = self.client.post(self.preflight_url, self.data, format='json', **self.extra_with_permissions)
+
+        self.assertEqual(unknown_content_response.status_code, response.status_code)
+        self.assertEqual(unknown_content_response.data, response.data)
+
+    def test_preflight_with_invalid_sha256_results_in_400(self):
+        response = self.client.post(self.preflight_url, dict(self.data, sha256='xxx'), format='json',
+                                    **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
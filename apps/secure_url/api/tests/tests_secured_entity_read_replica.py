@@ -0,0 +1,71 @@
+from django.core.cache import caches
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...models import SecuredEntity
+
+
+@override_settings(SECURED_ENTITY_READ_REPLICAS=['replica'])
+class SecuredEntityReadReplicaApiTest(BaseApiTestCase):
+    # `replica` is a separate test database, so rows written to `default` only stand in for not yet replicated ones
+    multi_db = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.user.save(using='replica')
+        self.replicated = SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        SecuredEntity.objects.using('replica').bulk_create([SecuredEntity(**SecuredEntity.objects.filter(
+            pk=self.replicated.pk).values()[0])])
+        self.not_replicated = SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        # no own write is recent - the pins of the secured entities created above are dropped
+        caches['shared'].clear()
+
+    def _get_listed_ids(self):
+        response = self.client.get(self.list_create_url, **self.extra_with_permissions)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return {item['id'] for item in response.data['results']}
+
+    def test_list_reads_from_replica(self):
+        self.assertSetEqual({str(self.replicated.pk)}, self._get_listed_ids())
+
+    def test_retrieve_reads_from_replica(self):
+        for secured_entity, status_code in ((self.replicated, status.HTTP_200_OK),
+                                            (self.not_replicated, status.HTTP_404_NOT_FOUND)):
+            response = self.client.get(reverse('secure_url.api:secured-entity-detail', args=(secured_entity.pk,)),
+                                       **self.extra_with_permissions)
+
+            self.assertEqual(status_code, response.status_code)
+
+    def test_stats_read_from_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.client.get(reverse('secure_url.api:secured-entity-stats-api-view'),
+                                       **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(replica_queries.captured_queries)
+
+    def test_list_after_create_reads_own_writes(self):
+        response = self.client.post(self.list_create_url, self.data_with_url, format='json',
+                                    **self.extra_with_permissions)
+
+        self.assertSetEqual({str(self.replicated.pk), str(self.not_replicated.pk), response.data['id']},
+                            self._get_listed_ids())
+
+    def test_list_after_regenerate_password_reads_own_writes(self):
+        response = self.client.post(reverse('secure_url.api:secured-entity-regenerate-password-api-view',
+                                            args=(self.replicated.pk,)), **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn(str(self.not_replicated.pk), self._get_listed_ids())
+
+    def test_create_writes_to_default(self):
+        response = self.client.post(self.list_create_url, self.data_with_url, format='json',
+                                    **self.extra_with_permissions)
+
+        self.assertTrue(SecuredEntity.objects.using('default').filter(pk=response.data['id']).exists())
+        self.assertFalse(SecuredEntity.objects.using('replica').filter(pk=response.data['id']).exists())
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...access_log import get_access_log_sink, write_access_logs
+from ...constants import SecuredEntityTypes
+from ...models import SecuredEntity, SecuredEntityDailyStats
+
+
+class SecuredEntityStatsApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.stats_url = reverse('secure_url.api:secured-entity-stats-api-view')
+        self.link = SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        self.other_link = SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        self.day = datetime(2019, 3, 1, 12, tzinfo=timezone.utc)
+
+    def _access(self, secured_entity):
+        access_url = reverse('secure_url.api:secured-entity-get-access-api-view', args=(secured_entity.pk,))
+        self.client.post(access_url, {'password': secured_entity.password}, format='json', **self.extra)
+
+    def test_stats_has_to_be_authenticated(self):
+        response = self.client.get(self.stats_url, **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_stats_counts_distinct_secured_entities_visited_per_day(self):
+        self._access(self.link)
+        self._access(self.link)
+        self._access(self.other_link)
+        get_access_log_sink().flush()
+
+        response = self.client.get(self.stats_url, **self.extra_with_permissions)
+
+        self.assertDictEqual({timezone.now().strftime('%Y-%m-%d'): {SecuredEntityTypes.FILE: 0,
+                                                                    SecuredEntityTypes.LINK: 2}}, response.data)
+
+    def test_stats_are_updated_incrementally_across_batches(self):
+        write_access_logs([(self.link.pk, self.day)])
+        write_access_logs([(self.link.pk, self.day + timedelta(minutes=1)), (self.other_link.pk, self.day)])
+        write_access_logs([(self.link.pk, self.day + timedelta(days=1))])
+
+        self.assertListEqual([(self.day.date(), SecuredEntityTypes.LINK, 2),
+                              ((self.day + timedelta(days=1)).date(), SecuredEntityTypes.LINK, 1)],
+                             list(SecuredEntityDailyStats.objects.values_list('date', 'type', 'visits')))
+
+    def test_stats_read_only_the_rollup(self):
+        write_access_logs([(self.link.pk, self.day), (self.other_link.pk, self.day)])
+        # the user agent of this client is logged only once per window
+        self.client.get(self.stats_url, **self.extra_with_permissions)
+
+        with self.assertNumQueries(2):
+            # authentication of the user and the rollup
+            self.client.get(self.stats_url, **self.extra_with_permissions)
+
+    def test_rebuild_access_stats_command_recomputes_rollup_from_access_logs(self):
+        write_access_logs([(self.link.pk, self.day), (self.other_link.pk, self.day)])
+        SecuredEntityDailyStats.objects.all().delete()
+
+        call_command('rebuild_access_stats', stdout=StringIO())
+
+        self.assertListEqual([(self.day.date(), SecuredEntityTypes.LINK, 2)],
+                             list(SecuredEntityDailyStats.objects.values_list('date', 'type', 'visits')))
+
+    def test_stats_with_wrong_range_results_in_400(self):
+        response = self.client.get(self.stats_url, {'from': '2019-03-02', 'to': '2019-03-01'},
+                                   **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_stats_with_wrong_granularity_results_in_400(self):
+        response = self.client.get(self.stats_url, {'granularity': 'year'}, **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_stats_are_limited_to_range(self):
+        write_access_logs([(self.link.pk, self.day), (self.link.pk, self.day + timedelta(days=1))])
+
+        response = self.client.get(self.stats_url, {'from': '2019-03-02', 'to': '2019-03-31'},
+                                   **self.extra_with_permissions)
+
+        self.assertDictEqual({'2019-03-02': {SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 1}}, response.data)
+
+    def test_stats_per_week_count_each_secured_entity_once(self):
+        # 2019-03-01 is Friday
+        write_access_logs([(self.link.pk, self.day), (self.other_link.pk, self.day),
+                           (self.link.pk, self.day + timedelta(days=1)),
+                           (self.link.pk, self.day + timedelta(days=3))])
+
+        response = self.client.get(self.stats_url, {'granularity': 'week'}, **self.extra_with_permissions)
+
+        self.assertDictEqual({'2019-02-25': {SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 2},
+                              '2019-03-04': {SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 1}}, response.data)
+
+    def test_stats_per_month_count_each_secured_entity_once(self):
+        write_access_logs([(self.link.pk, self.day), (self.other_link.pk, self.day + timedelta(days=1)),
+                           (self.link.pk, self.day + timedelta(days=2))])
+
+        response = self.client.get(self.stats_url, {'granularity': 'month'}, **self.extra_with_permissions)
+
+        self.assertDictEqual({'2019-03': {SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 2}}, response.data)
+
+    def test_stats_for_whole_range_count_each_secured_entity_once(self):
+        write_access_logs([(self.link.pk, self.day), (self.link.pk, self.day + timedelta(days=40))])
+
+        response = self.client.get(self.stats_url, {'from': '2019-02-01', 'to': '2019-04-30', 'granularity': 'range'},
+                                   **self.extra_with_permissions)
+
+        self.assertDictEqual({'2019-02-01/2019-04-30': {SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 1}},
+                             response.data)
+
+    def test_rebuild_access_stats_command_recomputes_sketches(self):
+        write_access_logs([(self.link.pk, self.day), (self.link.pk, self.day + timedelta(days=1))])
+        SecuredEntityDailyStats.objects.all().delete()
+
+        call_command('rebuild_access_stats', stdout=StringIO())
+        response = self.client.get(self.stats_url, {'granularity': 'month'}, **self.extra_with_permissions)
+
+        self.assertDictEqual({'2019-03': {SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 1}}, response.data)
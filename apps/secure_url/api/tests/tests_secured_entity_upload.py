@@ -0,0 +1,241 @@
+import hashlib
+import io
+import os
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .tests_base import BaseApiTestCase
+from ...constants import SecuredEntityTypes
+from ...models import SecuredEntity, SecuredEntityUpload
+from ...uploads import UploadInterrupted, UploadOffsetMismatch, _upload_digests, finalize_upload, write_chunk
+
+
+class SecuredEntityUploadApiTest(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.content = os.urandom(1000)
+        self.upload_create_url = reverse('secure_url.api:secured-entity-upload-create-api-view')
+
+    def _start_upload(self):
+        response = self.client.post(self.upload_create_url, {'file_name': 'test.bin', 'size': len(self.content)},
+                                    format='json', **self.extra_with_permissions)
+        upload = SecuredEntityUpload.objects.get(pk=response.data['id'])
+        self.addCleanup(upload.file.storage.delete, upload.file.name)
+        return upload
+
+    def _put_chunk(self, upload, first, last, **extra):
+        return self.client.put(reverse('secure_url.api:secured-entity-upload-api-view', args=(upload.pk,)),
+                               self.content[first:last + 1], content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE='bytes {}-{}/{}'.format(first, last, len(self.content)),
+                               **dict(self.extra_with_permissions, **extra))
+
+    def _finalize(self, upload, data=None):
+        return self.client.post(reverse('secure_url.api:secured-entity-upload-finalize-api-view', args=(upload.pk,)),
+                                data or {}, format='json', **self.extra_with_permissions)
+
+    def test_start_upload_has_to_be_authenticated(self):
+        response = self.client.post(self.upload_create_url, {'file_name': 'test.bin', 'size': 10}, format='json',
+                                    **self.extra)
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    @override_settings(SECURED_ENTITY_UPLOAD_MAX_SIZE=999)
+    def test_start_upload_of_file_over_max_size_results_in_400(self):
+        response = self.client.post(self.upload_create_url, {'file_name': 'test.bin', 'size': len(self.content)},
+                                    format='json', **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('size', response.data)
+        self.assertFalse(SecuredEntityUpload.objects.exists())
+
+    def test_start_upload_reserves_file_in_its_final_location(self):
+        upload = self._start_upload()
+
+        self.assertTrue(upload.file.name.startswith('secure_url/files/test'))
+        self.assertEqual(0, upload.offset)
+        self.assertEqual(0, os.path.getsize(upload.file.path))
+
+    def test_start_uploads_of_files_with_the_same_name_reserves_different_files(self):
+        self.assertNotEqual(self._start_upload().file.name, self._start_upload().file.name)
+
+    def test_upload_in_chunks_creates_file_secured_entity(self):
+        upload = self._start_upload()
+
+        self.assertEqual(400, self._put_chunk(upload, 0, 399).data['offset'])
+        self.assertEqual(1000, self._put_chunk(upload, 400, 999).data['offset'])
+        response = self._finalize(upload)
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(), response.data['sha256'])
+        secured_entity = SecuredEntity.objects.get(pk=response.data['id'])
+        self.assertEqual(SecuredEntityTypes.FILE, secured_entity.type)
+        self.assertEqual('test.bin', os.path.basename(secured_entity.file.name))
+        self.assertFalse(os.path.exists(upload.file.path))
+        with secured_entity.file.open('rb') as file:
+            self.assertEqual(self.content, file.read())
+        self.assertFalse(SecuredEntityUpload.objects.filter(pk=upload.pk).exists())
+
+    def test_upload_chunk_not_starting_at_offset_results_in_409(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 399)
+
+        response = self._put_chunk(upload, 500, 999)
+
+        self.assertEqual(status.HTTP_409_CONFLICT, response.status_code)
+        self.assertEqual(400, response.data['offset'])
+
+    def test_upload_chunk_without_content_range_results_in_400(self):
+        upload = self._start_upload()
+
+        response = self.client.put(reverse('secure_url.api:secured-entity-upload-api-view', args=(upload.pk,)),
+                                   self.content, content_type='application/octet-stream',
+                                   **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_upload_chunk_not_matching_checksum_is_discarded(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 399)
+
+        response = self._put_chunk(upload, 400, 999, HTTP_X_CONTENT_SHA256=hashlib.sha256(b'other').hexdigest())
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        upload.refresh_from_db()
+        self.assertEqual(400, upload.offset)
+        self.assertEqual(400, os.path.getsize(upload.file.path))
+
+    def test_upload_chunk_matching_checksum_is_written(self):
+        upload = self._start_upload()
+
+        response = self._put_chunk(upload, 0, 999,
+                                   HTTP_X_CONTENT_SHA256=hashlib.sha256(self.content).hexdigest())
+
+        self.assertEqual(1000, response.data['offset'])
+
+    def test_interleaved_chunks_at_the_same_offset_do_not_overwrite_each_other(self):
+        other_content = os.urandom(400)
+        test = self
+
+        class InterleavedStream(io.BytesIO):
+            def read(self, size=-1):
+                # another request writes a chunk at the same offset while this one is being received
+                with test.assertRaises(UploadOffsetMismatch):
+                    write_chunk(SecuredEntityUpload.objects.get(pk=upload.pk), io.BytesIO(other_content), 0, 400,
+                                hashlib.sha256(b'other').hexdigest())
+                return super().read(size)
+
+        upload = self._start_upload()
+
+        write_chunk(upload, InterleavedStream(self.content[:400]), 0, 400)
+
+        self.assertEqual(400, SecuredEntityUpload.objects.get(pk=upload.pk).offset)
+        with open(upload.file.path, 'rb') as file:
+            self.assertEqual(self.content[:400], file.read())
+
+    def test_chunk_at_the_offset_written_in_the_meantime_does_not_touch_file(self):
+        upload = self._start_upload()
+        stale_upload = SecuredEntityUpload.objects.get(pk=upload.pk)
+        write_chunk(upload, io.BytesIO(self.content[:400]), 0, 400)
+
+        with self.assertRaises(UploadOffsetMismatch):
+            write_chunk(stale_upload, io.BytesIO(os.urandom(400)), 0, 400, hashlib.sha256(b'other').hexdigest())
+
+        self.assertEqual(1000, self._put_chunk(upload, 400, 999).data['offset'])
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(), self._finalize(upload).data['sha256'])
+
+    def test_interrupted_upload_is_resumed_from_offset(self):
+        upload = self._start_upload()
+        # the connection drops after 300 bytes of the chunk
+        write_chunk(upload, io.BytesIO(self.content[:300]), 0, 1000)
+
+        response = self.client.get(reverse('secure_url.api:secured-entity-upload-api-view', args=(upload.pk,)),
+                                   **self.extra_with_permissions)
+        self._put_chunk(upload, response.data['offset'], 999)
+
+        self.assertEqual(300, response.data['offset'])
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(), self._finalize(upload).data['sha256'])
+
+    def test_chunk_failing_to_be_read_keeps_received_bytes_and_raises(self):
+        class DroppedStream(io.BytesIO):
+            def read(self, size=-1):
+                block = super().read(size)
+                if not block:
+                    raise OSError('connection reset')
+                return block
+
+        upload = self._start_upload()
+
+        with self.assertRaises(UploadInterrupted):
+            write_chunk(upload, DroppedStream(self.content[:300]), 0, 1000)
+
+        self.assertEqual(300, SecuredEntityUpload.objects.get(pk=upload.pk).offset)
+        self.assertEqual(1000, self._put_chunk(upload, 300, 999).data['offset'])
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(), self._finalize(upload).data['sha256'])
+
+    def test_upload_chunk_failing_to_be_read_results_in_400_with_offset(self):
+        upload = self._start_upload()
+
+        with mock.patch('apps.secure_url.api.views.write_chunk', side_effect=UploadInterrupted()):
+            response = self._put_chunk(upload, 0, 999)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(0, response.data['offset'])
+
+    def test_finalize_upload_finalized_in_the_meantime_raises_does_not_exist(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 999)
+        finalize_upload(SecuredEntityUpload.objects.get(pk=upload.pk))
+
+        with self.assertRaises(SecuredEntityUpload.DoesNotExist):
+            finalize_upload(upload)
+
+        self.assertEqual(1, SecuredEntity.objects.count())
+
+    def test_finalize_upload_without_running_checksum_reads_the_file(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 999)
+        _upload_digests.pop(upload.pk, 1000)
+
+        self.assertEqual(hashlib.sha256(self.content).hexdigest(), self._finalize(upload).data['sha256'])
+
+    def test_finalize_incomplete_upload_results_in_409(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 399)
+
+        response = self._finalize(upload)
+
+        self.assertEqual(status.HTTP_409_CONFLICT, response.status_code)
+        self.assertEqual(400, response.data['offset'])
+
+    def test_finalize_upload_not_matching_checksum_results_in_400(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 999)
+
+        response = self._finalize(upload, {'sha256': hashlib.sha256(b'other').hexdigest()})
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(SecuredEntity.objects.exists())
+
+    def test_upload_of_other_user_results_in_404(self):
+        upload = SecuredEntityUpload.objects.create(user=get_user_model().objects.create_user(username='other'),
+                                                    file='secure_url/files/other.bin', size=10)
+
+        response = self._put_chunk(upload, 0, 9)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_abort_upload_removes_file(self):
+        upload = self._start_upload()
+        self._put_chunk(upload, 0, 399)
+
+        response = self.client.delete(reverse('secure_url.api:secured-entity-upload-api-view', args=(upload.pk,)),
+                                      **self.extra_with_permissions)
+
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertFalse(os.path.exists(upload.file.path))
+        self.assertFalse(SecuredEntityUpload.objects.filter(pk=upload.pk).exists())
@@ -0,0 +1,17 @@
+from rest_framework.throttling import BaseThrottle
+
+from ..throttling import get_access_wait
+
+
+class SecuredEntityAccessThrottle(BaseThrottle):
+    """
+    Token buckets of the client IP and of the accessed secured entity (see `get_access_wait`) - checked before the
+    secured entity is loaded, so rejected attempts don't touch the database. Failed guesses are recorded by the view.
+    """
+
+    def allow_request(self, request, view):
+        self._wait = get_access_wait(request, view.kwargs['pk'])
+        return not self._wait
+
+    def wait(self):
+        return self._wait
@@ -2,16 +2,29 @@ from django.urls import path, re_path
 from rest_framework.routers import DefaultRouter
 
 from .views import SecuredEntityStatsApiView, SecuredEntityCreateListRetrieveApiViewSet, \
-    SecuredEntityRegeneratePasswordApiView, SecuredEntityAccessApiView
+    SecuredEntityRegeneratePasswordApiView, SecuredEntityAccessApiView, SecuredEntityUploadCreateApiView, \
+    SecuredEntityUploadApiView, SecuredEntityUploadFinalizeApiView, SecuredEntityPreflightApiView, \
+    SecuredEntityBulkCreateApiView, SecuredEntityBulkRegeneratePasswordsApiView, SecuredEntityExportApiView
 
 app_name = 'secure_url.api'
 
 urlpatterns = [
     path('stats/', SecuredEntityStatsApiView.as_view(), name='secured-entity-stats-api-view'),
+    re_path(r'^export/(?P<kind>access-logs|secured-entities)\.(?P<export_format>csv|jsonl)$',
+            SecuredEntityExportApiView.as_view(), name='secured-entity-export-api-view'),
     re_path(r'^regenerate-password/(?P<pk>[a-zA-Z0-9-]{36})/?$', SecuredEntityRegeneratePasswordApiView.as_view(),
             name='secured-entity-regenerate-password-api-view'),
+    path('regenerate-passwords/', SecuredEntityBulkRegeneratePasswordsApiView.as_view(),
+         name='secured-entity-bulk-regenerate-passwords-api-view'),
     re_path(r'^get-access/(?P<pk>[a-zA-Z0-9-]{36})/?$', SecuredEntityAccessApiView.as_view(),
             name='secured-entity-get-access-api-view'),
+    path('bulk/', SecuredEntityBulkCreateApiView.as_view(), name='secured-entity-bulk-create-api-view'),
+    path('preflight/', SecuredEntityPreflightApiView.as_view(), name='secured-entity-preflight-api-view'),
+    path('uploads/', SecuredEntityUploadCreateApiView.as_view(), name='secured-entity-upload-create-api-view'),
+    re_path(r'^uploads/(?P<pk>[a-zA-Z0-9-]{36})/?$', SecuredEntityUploadApiView.as_view(),
+            name='secured-entity-upload-api-view'),
+    re_path(r'^uploads/(?P<pk>[a-zA-Z0-9-]{36})/finalize/?$', SecuredEntityUploadFinalizeApiView.as_view(),
+            name='secured-entity-upload-finalize-api-view'),
 ]
 
 secured_entity_api_router = DefaultRouter()
@@ -1,14 +1,35 @@
-from django.db import connection
-from rest_framework.generics import get_object_or_404
+import re
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import CreateAPIView, get_object_or_404
 from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
-from .serializers import SecuredEntitySerializer, SecuredEntityAccessSerializer
-from ..constants import SecuredEntityTypes
-from ..models import SecuredEntityAccessLog, SecuredEntity
+from .pagination import SecuredEntityKeysetPagination
+from .serializers import SecuredEntitySerializer, SecuredEntityAccessSerializer, SecuredEntityRowsSerializer, \
+    SecuredEntityStatsQuerySerializer, SecuredEntityUploadSerializer, SecuredEntityUploadFinalizeSerializer, \
+    SecuredEntityPreflightSerializer, SecuredEntityBulkCreateSerializer, SecuredEntityBulkItemSerializer, \
+    SecuredEntityBulkRegeneratePasswordsSerializer, SecuredEntityDateRangeQuerySerializer
+from .throttling import SecuredEntityAccessThrottle
+from ..access_log import get_access_log_sink
+from ..bulk import bulk_create_secured_links, bulk_regenerate_passwords
+from ..db_router import pin_to_primary, use_read_replica
+from ..entity_cache import get_secured_entity_or_404
+from ..export import CONTENT_TYPES, get_export_queryset, stream_export
+from ..models import SecuredEntity, SecuredEntityUpload, SecuredFileBlob
+from ..stats import prepare_stats
+from ..throttling import record_failed_access
+from ..uploads import ChecksumMismatch, UploadIncomplete, UploadInterrupted, UploadOffsetMismatch, abort_upload, \
+    finalize_upload, write_chunk
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (?P<first>\d+)-(?P<last>\d+)/(?P<size>\d+)$')
 
 
 class SecuredEntityCreateListRetrieveApiViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet):
@@ -16,13 +37,80 @@ class SecuredEntityCreateListRetrieveApiViewSet(CreateModelMixin, ListModelMixin
     Api view set to: create, retrieve, list secured entities.
 
     @:param id - primary key of secured entity item
+    @:param cursor - cursor of the list page (taken from `next` of the previous page)
+    @:param page_size - number of secured entities on the list page
+    @:param accessible - lists only accessible (true) or expired (false) secured entities
+    @:param accessible_time - how long the created secured entity is accessible for ([DD] [HH:[MM:]]ss), optional
     """
     permission_classes = (IsAuthenticated,)
     serializer_class = SecuredEntitySerializer
+    pagination_class = SecuredEntityKeysetPagination
 
     def get_queryset(self):
         return SecuredEntity.objects.filter(user=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        with use_read_replica(request.user):
+            return super().retrieve(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        with use_read_replica(request.user):
+            return self._list(request)
+
+    def _list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        accessible = request.query_params.get('accessible')
+        if accessible in ('true', '1'):
+            queryset = queryset.accessible()
+        elif accessible in ('false', '0'):
+            queryset = queryset.expired()
+
+        queryset = queryset.values(*SecuredEntityRowsSerializer.source_fields)
+        page = self.paginate_queryset(queryset)
+
+        return self.get_paginated_response(SecuredEntityRowsSerializer(page, self.get_serializer_context()).data)
+
+
+class SecuredEntityBulkCreateApiView(APIView):
+    """
+    Creates many secured links at once. Results are in the order of the items - the created secured entity or
+    `errors` of an invalid item. Valid items are created even if some others are not.
+
+    @:param items - list of {"url": ..., "accessible_time": ... (optional, [DD] [HH:[MM:]]ss)}
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        bulk_serializer = SecuredEntityBulkCreateSerializer(data=request.data)
+        bulk_serializer.is_valid(raise_exception=True)
+
+        # a single item serializer validates all of them, binding its fields once
+        item_serializer = SecuredEntityBulkItemSerializer()
+        valid_items, errors = [], {}
+        for index, item in enumerate(bulk_serializer.validated_data['items']):
+            try:
+                valid_items.append(item_serializer.run_validation(item))
+            except ValidationError as e:
+                errors[index] = e.detail
+
+        if not valid_items:
+            return Response({'items': [{'errors': errors[index]} for index in sorted(errors)]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        secured_entities = bulk_create_secured_links(request.user, valid_items)
+        created = iter(SecuredEntityRowsSerializer([{
+            'id': secured_entity.pk,
+            'password_salt': secured_entity.password_salt,
+            'type': secured_entity.type,
+            'created': secured_entity.created,
+            'expires_at': secured_entity.expires_at,
+        } for secured_entity in secured_entities], {'request': request}).data)
+
+        return Response({'items': [{'errors': errors[index]} if index in errors else next(created)
+                                   for index in range(len(bulk_serializer.validated_data['items']))]},
+                        status=status.HTTP_201_CREATED)
+
 
 class SecuredEntityAccessApiView(APIView):
     """
@@ -31,15 +119,21 @@ class SecuredEntityAccessApiView(APIView):
     @:param id - primary key of secured entity item
     @:param password - password for specific secured entity
     """
+    # the view doesn't need the user - it's not looked up (in the session or the database) before the throttle
+    authentication_classes = ()
     permission_classes = (AllowAny,)
+    throttle_classes = (SecuredEntityAccessThrottle,)
 
     def post(self, request, pk):
-        secured_entity = get_object_or_404(SecuredEntity, pk=pk)
+        secured_entity = get_secured_entity_or_404(pk)
 
         access_serializer = SecuredEntityAccessSerializer(data=request.data, context={'secured_entity': secured_entity})
-        access_serializer.is_valid(raise_exception=True)
+        if not access_serializer.is_valid():
+            if 'password' in access_serializer.errors:
+                record_failed_access(secured_entity.pk)
+            raise ValidationError(access_serializer.errors)
 
-        SecuredEntityAccessLog.objects.create(secured_entity=secured_entity)
+        get_access_log_sink().enqueue(secured_entity.pk)
 
         return Response({'secured_entity': request.build_absolute_uri(secured_entity.get_redirect_url())})
 
@@ -53,45 +147,213 @@ class SecuredEntityRegeneratePasswordApiView(APIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, pk):
-        secured_entity = get_object_or_404(SecuredEntity, pk=pk, user=request.user)
+        secured_entity = get_secured_entity_or_404(pk, user=request.user)
         secured_entity.regenerate_password()
-        return Response(SecuredEntitySerializer(secured_entity).data)
+        return Response(SecuredEntitySerializer(secured_entity, context={'request': request}).data)
+
+
+class SecuredEntityBulkRegeneratePasswordsApiView(APIView):
+    """
+    Regenerates passwords for many secured entities at once - the ones with given ids or matching all given filters.
+    Ids of other users' secured entities are skipped.
+
+    @:param ids - list of primary keys of secured entities
+    @:param accessible - only accessible (true) or expired (false) secured entities
+    @:param created_from - only secured entities created at or after the given time
+    @:param created_to - only secured entities created before the given time
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        serializer = SecuredEntityBulkRegeneratePasswordsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = SecuredEntity.objects.filter(user=request.user)
+        if data.get('ids'):
+            queryset = queryset.filter(pk__in=data['ids'])
+        if data.get('accessible') is not None:
+            queryset = queryset.accessible() if data['accessible'] else queryset.expired()
+        if data.get('created_from'):
+            queryset = queryset.filter(created__gte=data['created_from'])
+        if data.get('created_to'):
+            queryset = queryset.filter(created__lt=data['created_to'])
+
+        regenerated = bulk_regenerate_passwords(queryset)
+        pin_to_primary(request.user.pk)
+        return Response({'regenerated': regenerated})
 
 
 class SecuredEntityStatsApiView(APIView):
     """
     Generates the stats for number of unique visits for links or files.
+
+    @:param from - first day of stats (YYYY-MM-DD), optional
+    @:param to - last day of stats (YYYY-MM-DD), optional
+    @:param granularity - one of: day (default, exact), week, month, range (estimated with ~1.6% standard error)
     """
     permission_classes = (IsAuthenticated,)
 
-    def _prepare_stats(self):
-        # Since there is no proper support for GROUP BY in django ORM the raw query is used here.
-        # Its efficient but could be risky while changing database engine.
-        raw_query = """
-            SELECT
-                DATE({secured_entity_access_log_table}.created) as created_date,
-                {secured_entity_table}.type as type,
-                COUNT(DISTINCT {secured_entity_access_log_table}.secured_entity_id)
-            FROM {secured_entity_access_log_table}
-            JOIN {secured_entity_table} ON {secured_entity_table}.id = {secured_entity_access_log_table}.secured_entity_id
-            GROUP BY created_date, type
-            ORDER BY created_date;
-        """.format(secured_entity_table=SecuredEntity._meta.db_table,
-                   secured_entity_access_log_table=SecuredEntityAccessLog._meta.db_table)
-
-        stats = {}
-        with connection.cursor() as cursor:
-            cursor.execute(raw_query)
-
-            for stat_item in cursor.fetchall():
-                # required because in Heroku stat_item[0] is a datetime.date object...
-                date = stat_item[0] if isinstance(stat_item[0], str) else stat_item[0].strftime('%Y-%m-%d')
-
-                daily_stats = stats.setdefault(date, {SecuredEntityTypes.FILE: 0,
-                                                      SecuredEntityTypes.LINK: 0})
-                daily_stats[stat_item[1]] = stat_item[2]
-
-        return stats
-
     def get(self, request):
-        return Response(self._prepare_stats())
+        query_serializer = SecuredEntityStatsQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+
+        # Stats are read from the daily rollup maintained while the access logs are written, so the cost depends on
+        # the number of days and not on the number of access logs.
+        with use_read_replica(request.user):
+            return Response(prepare_stats(query_serializer.validated_data.get('from'),
+                                          query_serializer.validated_data.get('to'),
+                                          query_serializer.validated_data['granularity']))
+
+
+class SecuredEntityExportApiView(APIView):
+    """
+    Streams access logs or secured entities of the user as CSV or JSON lines - rows are read in chunks while the
+    response is sent, so exports of any size start right away and take constant memory.
+
+    @:param kind - access-logs or secured-entities (in the path)
+    @:param export_format - csv or jsonl (the extension in the path)
+    @:param from - first day of the export (YYYY-MM-DD), optional
+    @:param to - last day of the export (YYYY-MM-DD), optional
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, kind, export_format):
+        query_serializer = SecuredEntityDateRangeQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+
+        queryset = get_export_queryset(kind, request.user, query_serializer.validated_data.get('from'),
+                                       query_serializer.validated_data.get('to'))
+        # the rows are read after the view returns - the database is chosen now
+        with use_read_replica(request.user):
+            queryset = queryset.using(queryset.db)
+
+        response = StreamingHttpResponse(stream_export(kind, queryset, export_format),
+                                         content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(kind, export_format)
+        return response
+
+
+class SecuredEntityUploadCreateApiView(CreateAPIView):
+    """
+    Starts a chunked upload of a file secured entity - PUT the file in chunks to the returned `upload_url` and
+    finalize it afterwards.
+
+    @:param file_name - name of the uploaded file
+    @:param size - size of the uploaded file in bytes
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = SecuredEntityUploadSerializer
+
+
+class SecuredEntityUploadApiView(APIView):
+    """
+    Chunked upload of a file secured entity. GET returns the `offset` an interrupted upload is resumed from, PUT writes
+    a chunk (raw bytes) and DELETE aborts the upload.
+
+    @:param id - primary key of the upload
+    @:param Content-Range - header of PUT: `bytes <first byte>-<last byte>/<size>`, the first byte has to be `offset`
+    @:param X-Content-SHA256 - optional header of PUT: hex SHA-256 of the chunk, a chunk not matching it is discarded
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get_object(self, pk):
+        return get_object_or_404(SecuredEntityUpload, pk=pk, user=self.request.user)
+
+    def get(self, request, pk):
+        upload = self.get_object(pk)
+        return Response(SecuredEntityUploadSerializer(upload, context={'request': request}).data)
+
+    def put(self, request, pk):
+        upload = self.get_object(pk)
+
+        content_range = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if content_range is None or int(content_range.group('size')) != upload.size:
+            raise ValidationError({'Content-Range': _('Has to be `bytes <first>-<last>/{}`.').format(upload.size)})
+
+        first, last = int(content_range.group('first')), int(content_range.group('last'))
+        if last < first or last >= upload.size or int(request.META.get('CONTENT_LENGTH') or 0) != last - first + 1:
+            raise ValidationError({'Content-Range': _('Does not match the length of the chunk.')})
+
+        try:
+            write_chunk(upload, request.stream, first, last - first + 1, request.META.get('HTTP_X_CONTENT_SHA256'))
+        except UploadOffsetMismatch:
+            upload.refresh_from_db(fields=('offset',))
+            return Response({'detail': _('Chunk has to start at the offset.'), 'offset': upload.offset},
+                            status=status.HTTP_409_CONFLICT)
+        except ChecksumMismatch:
+            raise ValidationError({'X-Content-SHA256': _('Does not match the chunk.')})
+        except UploadInterrupted:
+            return Response({'detail': _('Chunk was not received completely, resume from the offset.'),
+                             'offset': upload.offset}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(SecuredEntityUploadSerializer(upload, context={'request': request}).data)
+
+    def delete(self, request, pk):
+        abort_upload(self.get_object(pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SecuredEntityUploadFinalizeApiView(APIView):
+    """
+    Creates the file secured entity from a complete chunked upload.
+
+    @:param id - primary key of the upload
+    @:param sha256 - optional hex SHA-256 of the whole file, the upload is not finalized if it does not match
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, pk):
+        upload = get_object_or_404(SecuredEntityUpload, pk=pk, user=request.user)
+
+        finalize_serializer = SecuredEntityUploadFinalizeSerializer(data=request.data)
+        finalize_serializer.is_valid(raise_exception=True)
+
+        try:
+            secured_entity, sha256 = finalize_upload(upload, finalize_serializer.validated_data.get('sha256'))
+        except SecuredEntityUpload.DoesNotExist:
+            # finalized by a concurrent request
+            raise NotFound()
+        except UploadIncomplete:
+            return Response({'detail': _('Upload is not complete.'), 'offset': upload.offset},
+                            status=status.HTTP_409_CONFLICT)
+        except ChecksumMismatch:
+            raise ValidationError({'sha256': _('Does not match the uploaded file.')})
+
+        return Response(dict(SecuredEntitySerializer(secured_entity, context={'request': request}).data,
+                             sha256=sha256), status=status.HTTP_201_CREATED)
+
+
+class SecuredEntityPreflightApiView(APIView):
+    """
+    Creates the file secured entity without uploading the file if the user stored the same content (SHA-256 and size)
+    in one of their secured entities already, responds with 404 otherwise - upload the file then. The content of other
+    users is never referenced (knowing the hash of a file doesn't give a copy of it) and tells the same 404, so it
+    doesn't reveal whether anyone stored it.
+
+    @:param file_name - name of the file
+    @:param size - size of the file in bytes
+    @:param sha256 - hex SHA-256 of the file
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        preflight_serializer = SecuredEntityPreflightSerializer(data=request.data)
+        preflight_serializer.is_valid(raise_exception=True)
+        sha256 = preflight_serializer.validated_data['sha256']
+
+        if not SecuredFileBlob.objects.filter(pk=sha256, size=preflight_serializer.validated_data['size']).exists() \
+                or not SecuredEntity.objects.filter(user=request.user).with_content(sha256).exists():
+            return Response({'detail': _('File is not stored yet, upload it.')}, status=status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic():
+            try:
+                name = SecuredEntity._meta.get_field('file').storage.reference(
+                    sha256, preflight_serializer.validated_data['file_name'])
+            except FileNotFoundError:
+                # the last reference was removed in the meantime
+                return Response({'detail': _('File is not stored yet, upload it.')}, status=status.HTTP_404_NOT_FOUND)
+
+            secured_entity = SecuredEntity.objects.create(user=request.user, file=name)
+        return Response(dict(SecuredEntitySerializer(secured_entity, context={'request': request}).data,
+                             sha256=sha256), status=status.HTTP_201_CREATED)
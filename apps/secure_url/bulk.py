@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, CharField, Value, When
+from django.utils import timezone
+
+from .constants import SecuredEntityTypes
+from .db_router import pin_to_primary
+from .models import SecuredEntity, secured_entities_updated
+
+BULK_CREATE_BATCH_SIZE = 500
+BULK_REGENERATE_BATCH_SIZE = 1000
+
+
+def bulk_create_secured_links(user, items, batch_size=BULK_CREATE_BATCH_SIZE):
+    """
+    Creates secured links from validated `items` (dicts with `url` and optional `accessible_time`) with `bulk_create`
+    in a single transaction. Returns the created secured entities in the order of `items`.
+    """
+    now = timezone.now()
+    password_salts = SecuredEntity.generate_password_salts(len(items))
+
+    secured_entities = [SecuredEntity(
+        user=user, url=item['url'], type=SecuredEntityTypes.LINK, password_salt=password_salt,
+        expires_at=now + item.get('accessible_time', settings.SECURED_ENTITY_ACCESSIBLE_TIME)
+    ) for item, password_salt in zip(items, password_salts)]
+
+    with transaction.atomic():
+        # ids are generated in python (uuid4), so they are known without reading the rows back on every database
+        SecuredEntity.objects.bulk_create(secured_entities, batch_size=batch_size)
+    pin_to_primary(user.pk)
+
+    return secured_entities
+
+
+def bulk_regenerate_passwords(queryset, batch_size=BULK_REGENERATE_BATCH_SIZE):
+    """
+    Regenerates passwords of all secured entities in `queryset`, `batch_size` at a time. Returns the number of
+    regenerated passwords.
+
+    Salts are generated in memory and every batch is written with a single UPDATE (`CASE pk WHEN ... THEN salt`) in its
+    own short transaction, instead of a `save()` per secured entity. Batches are walked by the primary key, so the
+    selection doesn't get slower with every batch.
+    """
+    connection = connections[queryset.db]
+    # every secured entity takes two parameters of the CASE and one of the IN list
+    batch_size = min(batch_size, connection.ops.bulk_batch_size(['pk', 'password_salt', 'pk'], [None] * batch_size))
+    queryset = queryset.order_by('pk')
+
+    regenerated, last_pk = 0, None
+    while True:
+        batch = queryset.filter(pk__gt=last_pk) if last_pk else queryset
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return regenerated
+
+        password_salts = SecuredEntity.generate_password_salts(len(pks))
+        regenerated += SecuredEntity.objects.using(queryset.db).filter(pk__in=pks).update(password_salt=Case(
+            *(When(pk=pk, then=Value(password_salt)) for pk, password_salt in zip(pks, password_salts)),
+            output_field=CharField()))
+        secured_entities_updated.send(sender=SecuredEntity, pks=pks)
+        last_pk = pks[-1]
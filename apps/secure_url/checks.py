@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .throttling import CacheThrottle, LocMemThrottle, get_access_throttle
+
+# caches kept in (or not even in) the memory of the process - every worker would see different entries
+PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_process_cache(cache_alias):
+    return settings.CACHES.get(cache_alias, {}).get('BACKEND') in PROCESS_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_entity_cache(app_configs, **kwargs):
+    """
+    Saving a secured entity replaces its version key in the cache - with a cache of the process, the other workers keep
+    reading the old record (e.g. accepting the old password) until it expires.
+    """
+    if settings.SECURED_ENTITY_CACHE is not None and is_process_cache(settings.SECURED_ENTITY_CACHE):
+        return [Error(
+            "SECURED_ENTITY_CACHE uses the cache '{}' of the process.".format(settings.SECURED_ENTITY_CACHE),
+            hint='Use a cache shared by all workers (e.g. memcached) or turn the cache off with None.',
+            id='secure_url.E002',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_read_replica_cache(app_configs, **kwargs):
+    """
+    A user's next request can come to any worker - pins to the primary database kept in a cache of the process would
+    let it read from a lagging replica right after a write.
+    """
+    if settings.SECURED_ENTITY_READ_REPLICAS and is_process_cache(settings.SECURED_ENTITY_READ_REPLICA_CACHE):
+        return [Error(
+            "SECURED_ENTITY_READ_REPLICA_CACHE uses the cache '{}' of the process.".format(
+                settings.SECURED_ENTITY_READ_REPLICA_CACHE),
+            hint='Use a cache shared by all workers (e.g. the database cache or memcached).',
+            id='secure_url.E003',
+        )]
+    return []
+
+
+@register(Tags.caches)
+def check_access_throttle(app_configs, **kwargs):
+    """
+    With buckets of the process every worker allows the full rate, so the password guesses are multiplied by the
+    number of workers. Only fine for the single process of the development server.
+    """
+    if settings.DEBUG or not settings.SECURED_ENTITY_ACCESS_THROTTLE_RATES:
+        return []
+
+    throttle = get_access_throttle()
+    if isinstance(throttle, LocMemThrottle) or (isinstance(throttle, CacheThrottle)
+                                                and is_process_cache(throttle.cache_alias)):
+        return [Error(
+            'SECURED_ENTITY_ACCESS_THROTTLE keeps the token buckets in the process.',
+            hint="Use 'apps.secure_url.throttling.FileThrottle' or 'CacheThrottle' on a cache shared by all workers.",
+            id='secure_url.E004',
+        )]
+    return []
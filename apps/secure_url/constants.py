@@ -11,3 +11,43 @@ class SecuredEntityTypes(object):
             (cls.LINK, _("Link")),
             (cls.FILE, _("File"))
         )
+
+
+class StatsGranularity(object):
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    RANGE = 'range'
+
+    @classmethod
+    def get_choices(cls):
+        return (
+            (cls.DAY, _("Day")),
+            (cls.WEEK, _("Week")),
+            (cls.MONTH, _("Month")),
+            (cls.RANGE, _("Whole range"))
+        )
+
+
+class ExportKind(object):
+    ACCESS_LOGS = 'access-logs'
+    SECURED_ENTITIES = 'secured-entities'
+
+    @classmethod
+    def get_choices(cls):
+        return (
+            (cls.ACCESS_LOGS, _("Access logs")),
+            (cls.SECURED_ENTITIES, _("Secured entities"))
+        )
+
+
+class ExportFormat(object):
+    CSV = 'csv'
+    JSONL = 'jsonl'
+
+    @classmethod
+    def get_choices(cls):
+        return (
+            (cls.CSV, _("CSV")),
+            (cls.JSONL, _("JSON lines"))
+        )
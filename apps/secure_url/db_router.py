@@ -0,0 +1,74 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+PINNED_CACHE_KEY = 'secure_url.db.pinned.{}'
+# `app_label` of the model the database cache backend routes its queries with
+DATABASE_CACHE_APP_LABEL = 'django_cache'
+
+_state = threading.local()
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads made inside `use_read_replica` to one of `SECURED_ENTITY_READ_REPLICAS`, everything else (and all
+    writes) to the default database. The database cache is always read from the default database, where it's written.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == DATABASE_CACHE_APP_LABEL:
+            return None
+        if getattr(_state, 'use_replica', False) and settings.SECURED_ENTITY_READ_REPLICAS:
+            return random.choice(settings.SECURED_ENTITY_READ_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # instances read from a replica are saved to the default database, explicit writes elsewhere (e.g. `migrate
+        # --database`) are left alone
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in settings.SECURED_ENTITY_READ_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.SECURED_ENTITY_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+@contextmanager
+def use_read_replica(user):
+    """
+    Reads made inside are sent to a read replica - unless `user` changed their secured entities recently, then they go
+    to the default database, so they see their own writes even if the replicas are lagging behind.
+    """
+    previous = getattr(_state, 'use_replica', False)
+    _state.use_replica = not is_pinned_to_primary(user.pk)
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+def pin_to_primary(user_id):
+    """
+    Sends reads of the user to the default database for `SECURED_ENTITY_READ_REPLICA_STICKINESS` (longer than the
+    replication lag).
+    """
+    if settings.SECURED_ENTITY_READ_REPLICAS and user_id is not None:
+        _get_pin_cache().set(PINNED_CACHE_KEY.format(user_id), True,
+                             timeout=settings.SECURED_ENTITY_READ_REPLICA_STICKINESS.total_seconds())
+
+
+def is_pinned_to_primary(user_id):
+    return bool(settings.SECURED_ENTITY_READ_REPLICAS) and \
+        _get_pin_cache().get(PINNED_CACHE_KEY.format(user_id), False)
+
+
+def _get_pin_cache():
+    return caches[settings.SECURED_ENTITY_READ_REPLICA_CACHE]
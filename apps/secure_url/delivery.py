@@ -0,0 +1,178 @@
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.module_loading import import_string
+
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(range_header, size):
+    """
+    Returns (start, end) of a single `bytes` range, None when the whole file should be sent (no, multipart or
+    malformed range) or raises RangeNotSatisfiable.
+    """
+    match = RANGE_RE.match(range_header.strip()) if range_header else None
+    if match is None or not (match.group('start') or match.group('end')):
+        return None
+
+    if not match.group('start'):
+        # suffix range - last N bytes
+        suffix_length = int(match.group('end'))
+        if not suffix_length:
+            raise RangeNotSatisfiable()
+        return max(size - suffix_length, 0), size - 1
+
+    start = int(match.group('start'))
+    end = min(int(match.group('end')), size - 1) if match.group('end') else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end < start:
+        return None
+    return start, end
+
+
+class FileRange:
+    """
+    File-like object exposing `length` bytes of an open file from its current position.
+
+    It keeps `fileno()`, so WSGI servers with `wsgi.file_wrapper` (e.g. gunicorn) send it with zero-copy
+    `os.sendfile` limited by the Content-Length of the response.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+
+        data = self.file.read(self.remaining if size is None or size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class FileDelivery:
+    """
+    Base class of file delivery backends - they build the response sending the file stored under `path` (absolute
+    path) / `name` (path relative to MEDIA_ROOT).
+    """
+
+    def __init__(self, **kwargs):
+        pass
+
+    def serve(self, request, path, name):
+        raise NotImplementedError
+
+    def _set_file_headers(self, response, name):
+        content_type, encoding = mimetypes.guess_type(name)
+        response['Content-Type'] = content_type if content_type and not encoding else 'application/octet-stream'
+        response['Content-Disposition'] = "attachment; filename*=utf-8''{}".format(quote(os.path.basename(name)))
+        return response
+
+
+class XAccelRedirectFileDelivery(FileDelivery):
+    """
+    Lets nginx send the file - `internal_prefix` has to be an `internal` location aliased to MEDIA_ROOT.
+    """
+
+    def __init__(self, internal_prefix='/protected-media/', **kwargs):
+        super().__init__(**kwargs)
+        self.internal_prefix = internal_prefix
+
+    def serve(self, request, path, name):
+        response = HttpResponse()
+        # relative to MEDIA_ROOT from the path - names of content addressed files are not paths on the disk
+        response['X-Accel-Redirect'] = '{}{}'.format(
+            self.internal_prefix, quote(os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')))
+        return self._set_file_headers(response, name)
+
+
+class XSendfileFileDelivery(FileDelivery):
+    """
+    Lets Apache (mod_xsendfile) or lighttpd send the file.
+    """
+
+    def serve(self, request, path, name):
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return self._set_file_headers(response, name)
+
+
+class StreamingFileDelivery(FileDelivery):
+    """
+    Sends the file by the application server itself, supporting single `Range` requests and `If-Range`.
+    """
+
+    def __init__(self, block_size=1024 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.block_size = block_size
+
+    def serve(self, request, path, name):
+        stat = os.stat(path)
+        etag = '"{:x}-{:x}"'.format(stat.st_size, stat.st_mtime_ns)
+        last_modified = http_date(stat.st_mtime)
+
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */{}'.format(stat.st_size)
+            return response
+
+        if byte_range and not self._if_range_matches(request.META.get('HTTP_IF_RANGE'), etag, stat.st_mtime):
+            byte_range = None
+
+        file = open(path, 'rb')
+        start, end = byte_range or (0, stat.st_size - 1)
+        file.seek(start)
+
+        response = FileResponse(FileRange(file, end - start + 1))
+        response.block_size = self.block_size
+        if byte_range:
+            response.status_code = 206
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, stat.st_size)
+        response['Content-Length'] = max(end - start + 1, 0)
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        return self._set_file_headers(response, name)
+
+    def _if_range_matches(self, if_range, etag, mtime):
+        if not if_range:
+            return True
+        if if_range.startswith(('"', 'W/')):
+            return if_range == etag
+
+        if_range_time = parse_http_date_safe(if_range)
+        return if_range_time is not None and if_range_time == int(mtime)
+
+
+@lru_cache(maxsize=None)
+def get_file_delivery():
+    delivery_class = import_string(settings.SECURED_ENTITY_FILE_DELIVERY)
+    return delivery_class(**settings.SECURED_ENTITY_FILE_DELIVERY_OPTIONS)
+
+
+@receiver(setting_changed)
+def reset_file_delivery(setting, **kwargs):
+    if setting.startswith('SECURED_ENTITY_FILE_DELIVERY'):
+        get_file_delivery.cache_clear()
@@ -0,0 +1,156 @@
+import threading
+import uuid
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.http import Http404
+
+VERSION_KEY = 'secure_url.entity.version.{}'
+RECORD_KEY = 'secure_url.entity.{}.{}'
+STATS_KEY = 'secure_url.entity_cache.{}'
+
+
+class SecuredEntityCache:
+    """
+    Cache-aside layer of secured entities looked up by id, over a Django cache shared by the workers.
+
+    Every secured entity has a version key and its record (a tuple of the field values) is cached under the current
+    version. Saving or deleting the secured entity replaces the version, so records cached before are never read
+    again - even if a worker stores a record it read from the database just before the change.
+
+    Hits and misses are counted in the process and added to shared counters in the cache every `stats_flush_interval`
+    lookups.
+    """
+
+    def __init__(self, cache_alias='default', timeout=3600, stats_flush_interval=100):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.stats_flush_interval = stats_flush_interval
+        self._hits = self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get(self, pk):
+        """
+        Returns the secured entity with `pk` (all fields loaded) or `None` if there is none.
+        """
+        from .models import SecuredEntity
+
+        version = self._get_version(pk)
+        record = self.cache.get(RECORD_KEY.format(pk, version))
+        self._count(hit=record is not None)
+
+        if record is None:
+            queryset = SecuredEntity.objects.filter(pk=pk)
+            record = queryset.values_list(*self._get_field_names()).first()
+            if record is None:
+                return None
+            self.cache.set(RECORD_KEY.format(pk, version), record, timeout=self.timeout)
+
+        return SecuredEntity.from_db(SecuredEntity.objects.db, self._get_field_names(), record)
+
+    def invalidate(self, pks):
+        new_versions = {VERSION_KEY.format(pk): uuid.uuid4().hex for pk in pks}
+        self.cache.set_many(new_versions, timeout=None)
+
+    def get_stats(self):
+        self.flush_stats()
+        stats = self.cache.get_many([STATS_KEY.format('hits'), STATS_KEY.format('misses')])
+        hits, misses = stats.get(STATS_KEY.format('hits'), 0), stats.get(STATS_KEY.format('misses'), 0)
+        return {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses) if hits + misses else 0}
+
+    def flush_stats(self):
+        with self._lock:
+            counts, self._hits, self._misses = {'hits': self._hits, 'misses': self._misses}, 0, 0
+
+        for name, count in counts.items():
+            if count:
+                key = STATS_KEY.format(name)
+                self.cache.add(key, 0, timeout=None)
+                try:
+                    self.cache.incr(key, count)
+                except ValueError:
+                    # evicted between `add` and `incr`
+                    self.cache.set(key, count, timeout=None)
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = self._misses = 0
+        self.cache.delete_many([STATS_KEY.format('hits'), STATS_KEY.format('misses')])
+
+    def _get_version(self, pk):
+        key = VERSION_KEY.format(pk)
+        version = self.cache.get(key)
+        if version is None:
+            # the version was never set or it was evicted - a new one makes sure no older record is read
+            self.cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            flush = self._hits + self._misses >= self.stats_flush_interval
+        if flush:
+            self.flush_stats()
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_field_names():
+        from .models import SecuredEntity
+
+        return tuple(field.attname for field in SecuredEntity._meta.concrete_fields)
+
+
+def get_secured_entity_or_404(pk, user=None):
+    """
+    Returns the secured entity with `pk` (of `user` if given), through the cache if it's enabled.
+    """
+    from .models import SecuredEntity
+
+    entity_cache = get_entity_cache()
+    if entity_cache is None:
+        secured_entity = SecuredEntity.objects.filter(pk=pk).first()
+    else:
+        secured_entity = entity_cache.get(pk)
+
+    if secured_entity is None or (user is not None and secured_entity.user_id != user.pk):
+        raise Http404
+    return secured_entity
+
+
+def invalidate_secured_entities(pks):
+    """
+    Makes cached records of secured entities with `pks` stale - right away and once again when the current transaction
+    is committed, as other workers could cache the old rows until then.
+    """
+    entity_cache = get_entity_cache()
+    if entity_cache is None:
+        return
+
+    pks = list(pks)
+    entity_cache.invalidate(pks)
+    transaction.on_commit(lambda: entity_cache.invalidate(pks))
+
+
+@lru_cache(maxsize=None)
+def get_entity_cache():
+    if settings.SECURED_ENTITY_CACHE is None:
+        return None
+    return SecuredEntityCache(settings.SECURED_ENTITY_CACHE, **settings.SECURED_ENTITY_CACHE_OPTIONS)
+
+
+@receiver(setting_changed)
+def reset_entity_cache(setting, **kwargs):
+    if setting.startswith('SECURED_ENTITY_CACHE') or setting == 'CACHES':
+        get_entity_cache.cache_clear()
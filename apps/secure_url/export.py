@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .constants import ExportFormat, ExportKind
+from .models import SecuredEntity, SecuredEntityAccessLog
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_COLUMNS = {
+    ExportKind.ACCESS_LOGS: (
+        ('id', 'pk'),
+        ('secured_entity_id', 'secured_entity_id'),
+        ('type', 'secured_entity__type'),
+        ('created', 'created'),
+    ),
+    ExportKind.SECURED_ENTITIES: (
+        ('id', 'pk'),
+        ('type', 'type'),
+        ('url', 'url'),
+        ('file', 'file'),
+        ('created', 'created'),
+        ('expires_at', 'expires_at'),
+    ),
+}
+
+CONTENT_TYPES = {
+    ExportFormat.CSV: 'text/csv; charset=utf-8',
+    ExportFormat.JSONL: 'application/x-ndjson; charset=utf-8',
+}
+
+
+def get_export_queryset(kind, user=None, date_from=None, date_to=None):
+    """
+    Rows (tuples in the order of `EXPORT_COLUMNS[kind]`) of access logs or secured entities created between
+    `date_from` and `date_to` (UTC days, both included), of secured entities of `user` if given.
+    """
+    if kind == ExportKind.ACCESS_LOGS:
+        queryset, user_lookup = SecuredEntityAccessLog.objects.order_by('created', 'pk'), 'secured_entity__user'
+    else:
+        queryset, user_lookup = SecuredEntity.objects.order_by('created', 'pk'), 'user'
+
+    if user is not None:
+        queryset = queryset.filter(**{user_lookup: user})
+    if date_from:
+        queryset = queryset.filter(created__gte=datetime.combine(date_from, time.min, tzinfo=timezone.utc))
+    if date_to:
+        queryset = queryset.filter(
+            created__lt=datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc))
+
+    return queryset.values_list(*(lookup for _, lookup in EXPORT_COLUMNS[kind]))
+
+
+def stream_export(kind, queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the export of `queryset` rows as encoded CSV (with a header) or JSON lines.
+
+    Rows are fetched `chunk_size` at a time (with a server-side cursor on PostgreSQL) and each chunk is rendered into
+    a single string, so the memory doesn't grow with the size of the export. The header (or the first chunk) is
+    yielded before the rest is read.
+    """
+    columns = [name for name, _ in EXPORT_COLUMNS[kind]]
+    render_rows = _render_csv_rows if export_format == ExportFormat.CSV else _render_json_rows
+
+    if export_format == ExportFormat.CSV:
+        yield _render_csv_rows([columns]).encode('utf-8')
+
+    rows = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        rows.append([_to_primitive(value) for value in row])
+        if len(rows) >= chunk_size:
+            yield render_rows(rows, columns).encode('utf-8')
+            rows = []
+
+    if rows:
+        yield render_rows(rows, columns).encode('utf-8')
+
+
+def _render_csv_rows(rows, columns=None):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(['' if value is None else value for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _render_json_rows(rows, columns):
+    return ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def _to_primitive(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
@@ -1,14 +1,25 @@
 from django import forms
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
 from .models import SecuredEntity
-from .validators import validate_access_to_secured_entity, validate_secured_entity
+from .validators import validate_access_to_secured_entity, validate_accessible_time, validate_secured_entity
 
 
 class SecuredEntityForm(forms.ModelForm):
+    accessible_time = forms.DurationField(required=False, initial=settings.SECURED_ENTITY_ACCESSIBLE_TIME,
+                                          validators=[validate_accessible_time],
+                                          help_text=_('[days] hours:minutes:seconds'))
 
     def clean(self):
         return validate_secured_entity(self.cleaned_data)
 
+    def save(self, commit=True):
+        self.instance.expires_at = timezone.now() + (self.cleaned_data['accessible_time'] or
+                                                     settings.SECURED_ENTITY_ACCESSIBLE_TIME)
+        return super().save(commit)
+
     class Meta:
         model = SecuredEntity
         fields = ['url', 'file']
@@ -17,8 +28,11 @@ class SecuredEntityForm(forms.ModelForm):
 class SecuredEntityAccessForm(forms.Form):
     password = forms.CharField()
 
+    def __init__(self, *args, secured_entity, **kwargs):
+        self.secured_entity = secured_entity
+        super().__init__(*args, **kwargs)
+
     def clean(self):
         cleaned_data = super().clean()
-        secured_entity = SecuredEntity.objects.get(pk=self.data['id'])
 
-        return validate_access_to_secured_entity(cleaned_data, secured_entity)
+        return validate_access_to_secured_entity(cleaned_data, self.secured_entity)
@@ -0,0 +1,57 @@
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .entity_cache import get_entity_cache
+
+GRANT_SIGNING_SALT = 'secure_url.download'
+
+DownloadGrant = namedtuple('DownloadGrant', ('secured_entity_id', 'file_name', 'expires'))
+
+
+def get_password_salt_fingerprint(password_salt):
+    # tells the password salts apart without revealing them in the (only signed, not encrypted) grant
+    return salted_hmac('secure_url.grant.password_salt', password_salt).hexdigest()[:16]
+
+
+def make_download_grant(secured_entity):
+    """
+    Returns a signed grant to download the file of `secured_entity`. It carries everything the download view needs, so
+    the secured entity doesn't have to be loaded again, and it's valid for `SECURED_ENTITY_DOWNLOAD_GRANT_TTL`, but no
+    longer than the secured entity is accessible.
+    """
+    expires = min(time.time() + settings.SECURED_ENTITY_DOWNLOAD_GRANT_TTL.total_seconds(),
+                  secured_entity.expires_at.timestamp())
+    return signing.dumps([str(secured_entity.pk), secured_entity.file.name, int(expires),
+                          get_password_salt_fingerprint(secured_entity.password_salt)], salt=GRANT_SIGNING_SALT)
+
+
+def verify_download_grant(secured_entity_id, grant):
+    """
+    Returns the `DownloadGrant` of a valid `grant` for `secured_entity_id`, `None` otherwise. The signature is checked
+    in constant time and the grant carries everything needed, so it's verified without a database query.
+
+    With the entity cache on, the password salt fingerprint signed into the grant is compared with the cached secured
+    entity as well - a regenerated password (or a deleted secured entity) revokes issued grants right away. Without it
+    they stay valid until they expire, so `SECURED_ENTITY_DOWNLOAD_GRANT_TTL` is kept short.
+    """
+    try:
+        granted_id, file_name, expires, fingerprint = signing.loads(
+            grant, salt=GRANT_SIGNING_SALT, max_age=settings.SECURED_ENTITY_DOWNLOAD_GRANT_TTL)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+    if granted_id != str(secured_entity_id) or expires <= time.time():
+        return None
+
+    entity_cache = get_entity_cache()
+    if entity_cache is not None:
+        secured_entity = entity_cache.get(granted_id)
+        if secured_entity is None or not constant_time_compare(
+                get_password_salt_fingerprint(secured_entity.password_salt), fingerprint):
+            return None
+
+    return DownloadGrant(granted_id, file_name, expires)
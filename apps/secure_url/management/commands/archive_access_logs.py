@@ -0,0 +1,43 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...partitions import archive_period, get_detached_periods, get_logged_periods, get_period, get_previous_period
+
+
+class Command(BaseCommand):
+    help = 'Archives access logs of closed months into gzip\'d JSON lines files and removes them from the database ' \
+           '(detaches and drops their partitions on PostgreSQL) - run it daily.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int, default=3, help='Number of closed months kept in the '
+                                                                       'database besides the current one.')
+        parser.add_argument('--archive-dir', help='Directory of the archives, SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR '
+                                                  'by default.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Number of access logs read (and deleted) '
+                                                                         'at once.')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months which would be archived.')
+
+    def handle(self, *args, **options):
+        if options['keep_months'] < 0:
+            raise CommandError('--keep-months can\'t be negative.')
+
+        archive_dir = options['archive_dir'] or settings.SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR
+        current_period = get_period(date.today())
+        keep_from = current_period
+        for _ in range(options['keep_months']):
+            keep_from = get_previous_period(keep_from)
+
+        periods = sorted(set(get_logged_periods(keep_from)) | set(get_detached_periods(keep_from)))
+        if options['dry_run']:
+            for period in periods:
+                self.stdout.write('Would archive {:%Y-%m}.'.format(period))
+            return
+
+        for period in periods:
+            path, archived = archive_period(period, archive_dir, options['batch_size'])
+            self.stdout.write('Archived {} access logs of {:%Y-%m}{}.'.format(
+                archived, period, ' to {}'.format(path) if path else ''))
+
+        self.stdout.write(self.style.SUCCESS('Archived {} months.'.format(len(periods))))
@@ -0,0 +1,168 @@
+import json
+import math
+import random
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from ...access_log import get_access_log_sink
+from ...bulk import bulk_create_secured_links
+from ...stats import record_daily_visits
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the create, access, list and stats API endpoints through the test client on a seeded dataset ' \
+           'and reports throughput, p50/p95/p99 latencies and SQL query counts as JSON. Compares them against a ' \
+           'saved baseline with --baseline and fails on regressions. All the synthetic data is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=1000, help='Number of seeded secured entities.')
+        parser.add_argument('--days', type=int, default=90, help='Number of days with seeded daily stats.')
+        parser.add_argument('--requests', type=int, default=200, help='Number of measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=10, help='Number of unmeasured requests per endpoint.')
+        parser.add_argument('--output', help='File to write the results to (e.g. a new baseline), the standard output '
+                                             'by default.')
+        parser.add_argument('--baseline', help='Results of an earlier run to compare with.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown of the p95 '
+                                                                          'latency and the throughput.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        with ExitStack() as stack:
+            archive_dir = stack.enter_context(tempfile.TemporaryDirectory())
+            # the real views without the network, throttling or the spool - access logs are written in batches to
+            # the database as in production, but by the requests (a flush thread couldn't see the open transaction)
+            stack.enter_context(override_settings(
+                ALLOWED_HOSTS=['testserver'], SECURED_ENTITY_ACCESS_THROTTLE_RATES={},
+                SECURED_ENTITY_ACCESS_LOG_SINK='apps.secure_url.access_log.BufferedAccessLogSink',
+                SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS={},
+                SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR=archive_dir))
+            stack.enter_context(transaction.atomic())
+
+            client, secured_entities = self._seed(options)
+            results = {
+                'dataset': {'entities': options['entities'], 'days': options['days']},
+                'endpoints': {name: self._measure(client, request, options['warmup'], options['requests'])
+                              for name, request in self._get_endpoints(secured_entities).items()},
+            }
+
+            get_access_log_sink().flush()
+            transaction.set_rollback(True)
+
+        output = json.dumps(results, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = compare_results(baseline, results, options['tolerance'])
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError('{} regressions against {}.'.format(len(regressions), options['baseline']))
+            self.stderr.write(self.style.SUCCESS('No regressions against {}.'.format(options['baseline'])))
+
+    def _seed(self, options):
+        user = get_user_model().objects.create_user(username='bench-{}'.format(time.time()))
+        secured_entities = bulk_create_secured_links(
+            user, [{'url': 'https://example.com/{}'.format(index)} for index in range(options['entities'])])
+
+        today = date.today()
+        record_daily_visits([(today - timedelta(days=day), secured_entity.pk, secured_entity.type)
+                             for day in range(options['days'])
+                             for secured_entity in random.sample(secured_entities, min(len(secured_entities), 50))])
+
+        client = APIClient()
+        client.force_authenticate(user)
+        return client, secured_entities
+
+    def _get_endpoints(self, secured_entities):
+        list_create_url = reverse('secure_url.api:secured-entity-list')
+        stats_url = reverse('secure_url.api:secured-entity-stats-api-view')
+
+        def access(client):
+            secured_entity = random.choice(secured_entities)
+            return client.post(reverse('secure_url.api:secured-entity-get-access-api-view', args=(secured_entity.pk,)),
+                               {'password': secured_entity.password}, format='json'), 200
+
+        return {
+            'create': lambda client: (client.post(list_create_url, {'url': 'https://example.com/'}, format='json'),
+                                      201),
+            'access': access,
+            'list': lambda client: (client.get(list_create_url), 200),
+            'stats': lambda client: (client.get(stats_url, {'granularity': 'month'}), 200),
+        }
+
+    def _measure(self, client, request, warmup, requests):
+        for _ in range(warmup):
+            request(client)
+
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(requests):
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+                start = time.perf_counter()
+                response, expected_status = request(client)
+                latencies.append(time.perf_counter() - start)
+
+            if response.status_code != expected_status:
+                raise CommandError('{} {} responded with {}.'.format(
+                    response.request['REQUEST_METHOD'], response.request['PATH_INFO'], response.status_code))
+            queries.append(sum(len(context) for context in captured))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        queries.sort()
+        return {
+            'requests': requests,
+            'throughput': round(requests / elapsed, 1),
+            'p50_ms': round(get_percentile(latencies, 50) * 1000, 3),
+            'p95_ms': round(get_percentile(latencies, 95) * 1000, 3),
+            'p99_ms': round(get_percentile(latencies, 99) * 1000, 3),
+            # the median - a request now and then also writes the batch of access logs
+            'queries': get_percentile(queries, 50),
+            'max_queries': queries[-1],
+        }
+
+
+def get_percentile(sorted_values, percentile):
+    """
+    Nearest-rank percentile of the sorted values.
+    """
+    return sorted_values[max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)]
+
+
+def compare_results(baseline, results, tolerance):
+    """
+    Returns descriptions of the endpoints which got slower than the baseline (p95 latency or throughput) by more than
+    `tolerance` or make more queries.
+    """
+    regressions = []
+    for name, before in sorted(baseline['endpoints'].items()):
+        after = results['endpoints'].get(name)
+        if after is None:
+            continue
+
+        if after['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append('{}: p95 latency {} ms, was {} ms'.format(name, after['p95_ms'], before['p95_ms']))
+        if after['throughput'] < before['throughput'] / (1 + tolerance):
+            regressions.append('{}: throughput {}/s, was {}/s'.format(name, after['throughput'], before['throughput']))
+        if after['queries'] > before['queries']:
+            regressions.append('{}: {} queries, was {}'.format(name, after['queries'], before['queries']))
+    return regressions
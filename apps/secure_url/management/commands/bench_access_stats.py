@@ -0,0 +1,113 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...constants import SecuredEntityTypes, StatsGranularity
+from ...models import SecuredEntity, SecuredEntityAccessLog
+from ...stats import prepare_stats, rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Compares the exact COUNT(DISTINCT) stats query with merging HyperLogLog sketches on a synthetic ' \
+           'access log. All the synthetic data is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000000, help='Number of synthetic access logs.')
+        parser.add_argument('--entities', type=int, default=1000000, help='Number of synthetic secured entities.')
+        parser.add_argument('--days', type=int, default=90, help='Number of days the access logs are spread over.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Number of rows inserted at once.')
+
+    def handle(self, *args, **options):
+        date_to = timezone.now().date()
+        date_from = date_to - timedelta(days=options['days'] - 1)
+
+        with transaction.atomic():
+            self._timed('seed', self._seed, options['rows'], options['entities'], date_from, options['days'],
+                        options['batch_size'])
+            self._timed('build rollup', rebuild_daily_stats, date_from, date_to)
+
+            for granularity in (StatsGranularity.MONTH, StatsGranularity.RANGE):
+                exact = self._timed('exact {}'.format(granularity), self._exact_stats, date_from, date_to,
+                                    granularity)
+                estimated = self._timed('sketch {}'.format(granularity), prepare_stats, date_from, date_to,
+                                        granularity)
+                self._report_error(exact, estimated)
+
+            transaction.set_rollback(True)
+
+    def _timed(self, name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.stdout.write('{:<20} {:>10.3f} s'.format(name, time.perf_counter() - start))
+        return result
+
+    def _report_error(self, exact, estimated):
+        for period_key, period_stats in sorted(exact.items()):
+            for entity_type, count in sorted(period_stats.items()):
+                estimate = estimated.get(period_key, {}).get(entity_type, 0)
+                self.stdout.write('    {} {:<6} exact {:>10} estimated {:>10} error {:>6.2f}%'.format(
+                    period_key, entity_type, count, estimate, abs(estimate - count) / max(count, 1) * 100))
+
+    def _seed(self, rows, entities, date_from, days, batch_size):
+        user = get_user_model().objects.create_user(username='bench-access-stats-{}'.format(time.time()))
+        types = (SecuredEntityTypes.LINK, SecuredEntityTypes.FILE)
+
+        secured_entity_ids = [uuid.uuid4() for _ in range(entities)]
+        for start in range(0, entities, batch_size):
+            SecuredEntity.objects.bulk_create([
+                SecuredEntity(id=secured_entity_id, user=user, password_salt='bench', url='https://example.com/',
+                              type=types[index % 2])
+                for index, secured_entity_id in enumerate(secured_entity_ids[start:start + batch_size], start)])
+
+        secured_entity_field = SecuredEntityAccessLog._meta.get_field('secured_entity')
+        db_secured_entity_ids = [secured_entity_field.get_db_prep_value(secured_entity_id, connection)
+                                 for secured_entity_id in secured_entity_ids]
+        first_second = datetime.combine(date_from, datetime.min.time(), tzinfo=timezone.utc)
+        seconds = days * 24 * 60 * 60
+
+        insert_query = 'INSERT INTO {} (secured_entity_id, created) VALUES (%s, %s)'.format(
+            SecuredEntityAccessLog._meta.db_table)
+        with connection.cursor() as cursor:
+            for start in range(0, rows, batch_size):
+                cursor.executemany(insert_query, [
+                    (random.choice(db_secured_entity_ids), connection.ops.adapt_datetimefield_value(
+                        first_second + timedelta(seconds=random.randrange(seconds))))
+                    for _ in range(min(batch_size, rows - start))])
+
+    def _exact_stats(self, date_from, date_to, granularity):
+        raw_query = """
+            SELECT {secured_entity_table}.type, COUNT(DISTINCT {secured_entity_access_log_table}.secured_entity_id)
+            FROM {secured_entity_access_log_table}
+            JOIN {secured_entity_table}
+                ON {secured_entity_table}.id = {secured_entity_access_log_table}.secured_entity_id
+            WHERE {secured_entity_access_log_table}.created >= %s AND {secured_entity_access_log_table}.created < %s
+            GROUP BY {secured_entity_table}.type
+        """.format(secured_entity_table=SecuredEntity._meta.db_table,
+                   secured_entity_access_log_table=SecuredEntityAccessLog._meta.db_table)
+
+        if granularity == StatsGranularity.RANGE:
+            periods = [('{}/{}'.format(date_from, date_to), date_from, date_to + timedelta(days=1))]
+        else:
+            periods = []
+            period_start = date_from
+            while period_start <= date_to:
+                next_month = (period_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+                period_end = min(next_month, date_to + timedelta(days=1))
+                periods.append((period_start.strftime('%Y-%m'), period_start, period_end))
+                period_start = next_month
+
+        stats = {}
+        with connection.cursor() as cursor:
+            for period_key, period_start, period_end in periods:
+                cursor.execute(raw_query, [
+                    connection.ops.adapt_datetimefield_value(
+                        datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc))
+                    for day in (period_start, period_end)])
+                stats[period_key] = dict(cursor.fetchall())
+        return stats
@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from ...models import SecuredEntity
+
+
+class Command(BaseCommand):
+    help = 'Compares creating secured links with single API calls and with the bulk create endpoint. All the ' \
+           'synthetic data is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Number of created secured links.')
+
+    @override_settings(ALLOWED_HOSTS=['testserver'],
+                       SECURED_ENTITY_ACCESS_LOG_SINK='apps.secure_url.access_log.DirectAccessLogSink')
+    def handle(self, *args, **options):
+        items = [{'url': 'https://example.com/{}'.format(index)} for index in range(options['count'])]
+
+        with transaction.atomic():
+            client = APIClient()
+            client.force_authenticate(get_user_model().objects.create_user(
+                username='bench-bulk-create-{}'.format(time.time())))
+
+            self._timed('single calls', options['count'], lambda: [
+                client.post(reverse('secure_url.api:secured-entity-list'), item, format='json') for item in items])
+            self._timed('bulk endpoint', options['count'], lambda: client.post(
+                reverse('secure_url.api:secured-entity-bulk-create-api-view'), {'items': items}, format='json'))
+
+            self.stdout.write('created: {}'.format(SecuredEntity.objects.filter(url__startswith='https://example.com/')
+                                                   .count()))
+            transaction.set_rollback(True)
+
+    def _timed(self, name, count, function):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        self.stdout.write('{:<20} {:>10.3f} s {:>10.0f} secured links/s'.format(name, elapsed, count / elapsed))
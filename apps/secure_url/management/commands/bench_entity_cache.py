@@ -0,0 +1,55 @@
+import random
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+
+from ...bulk import bulk_create_secured_links
+from ...entity_cache import SecuredEntityCache
+from ...models import SecuredEntity
+
+
+class Command(BaseCommand):
+    help = 'Compares secured entity lookups by id from the database and through the entity cache on the locmem and ' \
+           'file based cache backends (local stand-ins of a shared cache). All the synthetic data is rolled back at ' \
+           'the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=1000, help='Number of secured entities.')
+        parser.add_argument('--lookups', type=int, default=20000, help='Number of lookups.')
+        parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of the popularity of secured '
+                                                                    'entities - a few hot links get most lookups.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'bench-locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'bench',
+                             'OPTIONS': {'MAX_ENTRIES': options['entities'] * 3}},
+            'bench-file': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+                           'OPTIONS': {'MAX_ENTRIES': options['entities'] * 3}},
+        }), transaction.atomic():
+            user = get_user_model().objects.create_user(username='bench-entity-cache-{}'.format(time.time()))
+            pks = [secured_entity.pk for secured_entity in bulk_create_secured_links(
+                user, [{'url': 'https://example.com/{}'.format(index)} for index in range(options['entities'])])]
+            weights = [1 / (rank + 1) ** options['skew'] for rank in range(len(pks))]
+            lookups = random.choices(pks, weights, k=options['lookups'])
+
+            self._timed('database', lookups, lambda pk: SecuredEntity.objects.filter(pk=pk).first())
+            for cache_alias in ('bench-locmem', 'bench-file'):
+                entity_cache = SecuredEntityCache(cache_alias)
+                self._timed(cache_alias, lookups, entity_cache.get)
+                stats = entity_cache.get_stats()
+                self.stdout.write('{:<20} {:>10.1%} ({} hits, {} misses)'.format(
+                    '  hit ratio', stats['hit_ratio'], stats['hits'], stats['misses']))
+
+            transaction.set_rollback(True)
+
+    def _timed(self, name, lookups, function):
+        start = time.perf_counter()
+        for pk in lookups:
+            function(pk)
+        elapsed = time.perf_counter() - start
+        self.stdout.write('{:<20} {:>10.3f} s {:>10.0f} lookups/s'.format(name, elapsed, len(lookups) / elapsed))
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from ...delivery import StreamingFileDelivery
+
+
+class Command(BaseCommand):
+    help = 'Measures the throughput of sending a secured file by iterating StreamingFileDelivery responses in Python ' \
+           'and by the zero-copy os.sendfile WSGI servers use for them. The synthetic file is removed at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1024, help='Size of the synthetic file in MB.')
+        parser.add_argument('--block-size', type=int, default=1024 * 1024, help='Block size of the streaming in bytes.')
+
+    def handle(self, *args, **options):
+        size = options['size'] * 1024 * 1024
+        delivery = StreamingFileDelivery(block_size=options['block_size'])
+        request_factory = RequestFactory()
+
+        with tempfile.NamedTemporaryFile(suffix='.bin') as file:
+            block = os.urandom(1024 * 1024)
+            for _ in range(options['size']):
+                file.write(block)
+            file.flush()
+
+            self._timed('python streaming', size, self._stream,
+                        delivery.serve(request_factory.get('/'), file.name, 'bench.bin'))
+            self._timed('python range', size // 2, self._stream, delivery.serve(
+                request_factory.get('/', HTTP_RANGE='bytes={}-'.format(size // 2)), file.name, 'bench.bin'))
+            self._timed('os.sendfile', size, self._sendfile,
+                        delivery.serve(request_factory.get('/'), file.name, 'bench.bin'))
+
+    def _timed(self, name, size, function, *args):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        self.stdout.write('{:<20} {:>10.3f} s {:>10.1f} MB/s'.format(name, elapsed, size / 1024 / 1024 / elapsed))
+
+    def _stream(self, response):
+        with open(os.devnull, 'wb') as devnull:
+            for chunk in response.streaming_content:
+                devnull.write(chunk)
+        response.close()
+
+    def _sendfile(self, response):
+        file_range = response.file_to_stream
+        remaining = int(response['Content-Length'])
+        offset = file_range.file.tell()
+
+        with open(os.devnull, 'wb') as devnull:
+            while remaining > 0:
+                sent = os.sendfile(devnull.fileno(), file_range.fileno(), offset, remaining)
+                if not sent:
+                    break
+                offset += sent
+                remaining -= sent
+        response.close()
@@ -0,0 +1,44 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from ...api.serializers import SecuredEntityRowsSerializer, SecuredEntitySerializer
+from ...models import SecuredEntity
+
+
+class Command(BaseCommand):
+    help = 'Compares serializing secured entities with SecuredEntitySerializer and SecuredEntityRowsSerializer. ' \
+           'All the synthetic data is rolled back at the end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=100000, help='Number of serialized secured entities.')
+
+    def handle(self, *args, **options):
+        context = {'request': RequestFactory().get('/')}
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username='bench-list-{}'.format(time.time()))
+            SecuredEntity.objects.bulk_create([
+                SecuredEntity(id=uuid.uuid4(), user=user, password_salt=uuid.uuid4().hex, url='https://example.com/')
+                for _ in range(options['entities'])], batch_size=500)
+            queryset = SecuredEntity.objects.filter(user=user).order_by('-created', '-id')
+
+            model_output = self._timed('model serializer', lambda: JSONRenderer().render(
+                SecuredEntitySerializer(queryset, many=True, context=context).data))
+            rows_output = self._timed('rows serializer', lambda: JSONRenderer().render(
+                SecuredEntityRowsSerializer(queryset.values(*SecuredEntityRowsSerializer.source_fields),
+                                            context).data))
+
+            self.stdout.write('identical output: {}'.format(model_output == rows_output))
+            transaction.set_rollback(True)
+
+    def _timed(self, name, function):
+        start = time.perf_counter()
+        result = function()
+        self.stdout.write('{:<20} {:>10.3f} s'.format(name, time.perf_counter() - start))
+        return result
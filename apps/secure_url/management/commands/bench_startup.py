@@ -0,0 +1,95 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# what a gunicorn worker does on boot - loads the WSGI application (settings, apps, middleware) and the URLconf
+WORKER_BOOT_SCRIPT = '''
+import json, resource, sys, time
+start = time.perf_counter()
+from config.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+boot = time.perf_counter() - start
+rss = None
+try:
+    with open('/proc/self/status') as status:
+        rss = next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+except (OSError, StopIteration):
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'boot': boot, 'rss': rss, 'modules': len(sys.modules)}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Compares boot time, RSS and imported modules of a freshly started worker with the development and the ' \
+           'production settings profiles and breaks the import time down by top level packages (-X importtime).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=['config.settings.development',
+                                                              'config.settings.production'],
+                            help='Settings modules to compare.')
+        parser.add_argument('--runs', type=int, default=5, help='Number of worker boots per profile (medians are '
+                                                                'reported).')
+        parser.add_argument('--top', type=int, default=15, help='Number of the slowest packages to import.')
+
+    def handle(self, *args, **options):
+        results = {profile: self._measure(profile, options['runs']) for profile in options['profiles']}
+
+        for profile, result in results.items():
+            self.stdout.write(profile)
+            self.stdout.write('{:<20} {:>10.3f} s'.format('  boot', result['boot']))
+            self.stdout.write('{:<20} {:>10.1f} MB'.format('  worker RSS', result['rss'] / 1024))
+            self.stdout.write('{:<20} {:>10}'.format('  modules', result['modules']))
+
+        self.stdout.write('\nimport time (self, ms) by package:')
+        header = ''.join('{:>14}'.format(profile.rsplit('.', 1)[-1]) for profile in results)
+        self.stdout.write('{:<30}'.format('') + header)
+        import_times = [result['import_times'] for result in results.values()]
+        slowest = sum(import_times, Counter()).most_common(options['top'])
+        for package, _ in slowest:
+            row = ''.join('{:>14.1f}'.format(times[package] / 1000) for times in import_times)
+            self.stdout.write('{:<30}'.format(package) + row)
+
+    def _measure(self, profile, runs):
+        environ = dict(os.environ, DJANGO_SETTINGS_MODULE=profile)
+        # the production profile refuses to boot without a key of its own
+        environ.setdefault('SECRET_KEY', 'bench-startup')
+        boots = [self._boot(environ) for _ in range(runs)]
+
+        # a separate boot - the import time reporting slows the imports down
+        output = self._run([sys.executable, '-X', 'importtime', '-c', WORKER_BOOT_SCRIPT], environ)
+        return {
+            'boot': statistics.median(boot['boot'] for boot in boots),
+            'rss': statistics.median(boot['rss'] for boot in boots),
+            'modules': boots[0]['modules'],
+            'import_times': parse_import_times(output.stderr),
+        }
+
+    def _boot(self, environ):
+        return json.loads(self._run([sys.executable, '-c', WORKER_BOOT_SCRIPT], environ).stdout)
+
+    def _run(self, command, environ):
+        completed = subprocess.run(command, cwd=settings.BASE_DIR, env=environ, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, universal_newlines=True)
+        if completed.returncode:
+            raise CommandError('Worker boot failed:\n{}'.format(completed.stderr[-2000:]))
+        return completed
+
+
+def parse_import_times(importtime_output):
+    """
+    Sums the self import times (in microseconds) of `-X importtime` output by top level packages.
+    """
+    import_times = Counter()
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_time, _, module = line[len('import time:'):].split('|')
+        import_times[module.strip().split('.')[0]] += int(self_time)
+    return import_times
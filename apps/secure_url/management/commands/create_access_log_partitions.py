@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...partitions import ensure_partitions, get_upcoming_periods, is_partitioned
+
+
+class Command(BaseCommand):
+    help = 'Creates partitions of the access log for the current and the upcoming months (on PostgreSQL) - runs on ' \
+           'release and should run daily, so the partitions are there long before they are needed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3, help='Number of upcoming months to create the '
+                                                                        'partitions for.')
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead can\'t be negative.')
+
+        if not is_partitioned():
+            self.stdout.write('The access log is not partitioned.')
+            return
+
+        created = ensure_partitions(get_upcoming_periods(options['months_ahead']))
+        for period in created:
+            self.stdout.write('Created the partition of {:%Y-%m}.'.format(period))
+
+        self.stdout.write(self.style.SUCCESS('Created {} partitions.'.format(len(created))))
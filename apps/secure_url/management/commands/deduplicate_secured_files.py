@@ -0,0 +1,40 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import SecuredEntity, SecuredFileBlob
+from ...storage import BLOBS_DIR
+from ...uploads import file_sha256
+
+
+class Command(BaseCommand):
+    help = 'Moves files of secured entities stored before the content addressed storage into it, so every distinct ' \
+           'content is kept on the disk once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of secured entities loaded at once.')
+
+    def handle(self, *args, **options):
+        storage = SecuredEntity._meta.get_field('file').storage
+        queryset = SecuredEntity.objects.exclude(file__isnull=True).exclude(file='') \
+            .exclude(file__startswith='{}/'.format(BLOBS_DIR)).order_by('pk').values_list('pk', 'file')
+
+        moved = freed = 0
+        start = time.perf_counter()
+        for pk, name in queryset.iterator(chunk_size=options['batch_size']):
+            path = storage.path(name)
+            if not os.path.exists(path):
+                self.stderr.write('Missing file of {}: {}'.format(pk, name))
+                continue
+
+            sha256 = file_sha256(path)
+            if SecuredFileBlob.objects.filter(pk=sha256).exists():
+                freed += os.path.getsize(path)
+            with transaction.atomic():
+                SecuredEntity.objects.filter(pk=pk).update(file=storage.store(path, sha256, name))
+            moved += 1
+
+        duration = time.perf_counter() - start
+        self.stdout.write('Moved {} files, freed {} bytes in {:.3f} s'.format(moved, freed, duration))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...access_log import drain_spool_file, find_orphaned_spool_files
+
+
+class Command(BaseCommand):
+    help = 'Stores access logs left in spool files by workers which are not running anymore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spool-dir', default=settings.SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS.get('spool_dir'),
+                            help='Directory with access log spool files.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of access logs stored with a single INSERT.')
+        parser.add_argument('--include-alive', action='store_true',
+                            help='Drain also spool files of running processes (e.g. when pids were reused).')
+
+    def handle(self, *args, **options):
+        if not options['spool_dir']:
+            self.stdout.write('No spool directory configured.')
+            return
+
+        total = 0
+        for spool_path in find_orphaned_spool_files(options['spool_dir'], include_alive=options['include_alive']):
+            written = drain_spool_file(spool_path, batch_size=options['batch_size'])
+            total += written
+            self.stdout.write('{}: {} access logs stored.'.format(spool_path, written))
+
+        self.stdout.write(self.style.SUCCESS('Drained {} access logs.'.format(total)))
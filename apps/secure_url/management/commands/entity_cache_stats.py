@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...entity_cache import get_entity_cache
+
+
+class Command(BaseCommand):
+    help = 'Prints hits and misses of the secured entity cache counted by all the workers sharing the cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Resets the counters after printing them.')
+
+    def handle(self, *args, **options):
+        entity_cache = get_entity_cache()
+        if entity_cache is None:
+            raise CommandError('The secured entity cache is turned off (SECURED_ENTITY_CACHE is None).')
+
+        stats = entity_cache.get_stats()
+        self.stdout.write('hits: {hits}, misses: {misses}, hit ratio: {hit_ratio:.1%}'.format(**stats))
+
+        if options['reset']:
+            entity_cache.reset_stats()
@@ -0,0 +1,53 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from ...models import SecuredEntity, SecuredEntityAccessLog, SecuredEntityDailyStats
+
+
+class Command(BaseCommand):
+    help = 'Prints EXPLAIN plans and timings of the access, list and stats queries, so index regressions are ' \
+           'visible. Run it against PostgreSQL by pointing DATABASE_URL (or --database) at a local instance.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to explain the queries on.')
+        parser.add_argument('--repeat', type=int, default=100, help='Number of runs each query is timed with.')
+        parser.add_argument('--analyze', action='store_true', help='Use EXPLAIN ANALYZE (PostgreSQL only).')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        secured_entity = SecuredEntity.objects.using(database).order_by('-created').first()
+        if secured_entity is None:
+            self.stdout.write('There are no secured entities to explain the queries with.')
+            return
+
+        day_ago = timezone.now() - timedelta(days=1)
+        queries = (
+            ('access', SecuredEntity.objects.using(database).for_access().filter(pk=secured_entity.pk)),
+            ('list', SecuredEntity.objects.using(database).filter(
+                user_id=secured_entity.user_id).order_by('-created', '-id')[:50]),
+            ('accessible list', SecuredEntity.objects.using(database).accessible().filter(
+                user_id=secured_entity.user_id).order_by('-created', '-id')[:50]),
+            ('stats', SecuredEntityDailyStats.objects.using(database).filter(
+                date__gte=day_ago.date() - timedelta(days=30)).defer('sketch')),
+            ('stats rebuild', SecuredEntityAccessLog.objects.using(database).filter(
+                created__gte=day_ago).order_by().values_list('secured_entity_id', 'secured_entity__type').distinct()),
+            ('entity access logs', SecuredEntityAccessLog.objects.using(database).filter(
+                secured_entity_id=secured_entity.pk, created__gte=day_ago)),
+        )
+
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        self.stdout.write('Database: {} ({})'.format(database, connections[database].vendor))
+
+        for name, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING('\n{}'.format(name)))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                list(queryset.all())
+            self.stdout.write('{:.3f} ms per query'.format((time.perf_counter() - start) / options['repeat'] * 1000))
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ...constants import ExportFormat, ExportKind
+from ...export import EXPORT_CHUNK_SIZE, get_export_queryset, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Streams access logs or secured entities as CSV or JSON lines to a file (or the standard output) in ' \
+           'constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=[kind for kind, _ in ExportKind.get_choices()])
+        parser.add_argument('--format', dest='export_format', default=ExportFormat.CSV,
+                            choices=[export_format for export_format, _ in ExportFormat.get_choices()])
+        parser.add_argument('--from', dest='date_from', help='First day of the export (YYYY-MM-DD).')
+        parser.add_argument('--to', dest='date_to', help='Last day of the export (YYYY-MM-DD).')
+        parser.add_argument('--username', help='Export only secured entities of the user (and their access logs).')
+        parser.add_argument('--output', help='File to write, the standard output by default.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Number of rows read at once.')
+
+    def _parse_date(self, value):
+        if value is None:
+            return None
+
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+
+        if date is None:
+            raise CommandError('"{}" is not a valid YYYY-MM-DD date.'.format(value))
+        return date
+
+    def handle(self, *args, **options):
+        user = None
+        if options['username']:
+            user = get_user_model().objects.filter(username=options['username']).first()
+            if user is None:
+                raise CommandError('There is no user "{}".'.format(options['username']))
+
+        queryset = get_export_queryset(options['kind'], user, self._parse_date(options['date_from']),
+                                       self._parse_date(options['date_to']))
+        chunks = stream_export(options['kind'], queryset, options['export_format'], options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode('utf-8'), ending='')
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...reaper import count_expired, get_abandoned_uploads, reap_abandoned_uploads, reap_expired
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired secured entities with their access logs and files, and abandoned chunked uploads, in ' \
+           'small batches. Safe to run on a schedule.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=0, help='Keeps secured entities expired for less '
+                                                                      'than the given number of days.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of secured entities deleted at once.')
+        parser.add_argument('--log-batch-size', type=int, default=5000, help='Number of access logs deleted at once.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to wait between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Only reports what would be deleted.')
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - timedelta(days=options['grace_days'])
+        idle_before = timezone.now() - settings.SECURED_ENTITY_UPLOAD_MAX_IDLE_TIME
+
+        if options['dry_run']:
+            self.stdout.write('Would delete {} secured entities, {} access logs and {} files.'.format(
+                *count_expired(expired_before)))
+            self.stdout.write('Would delete {} abandoned uploads.'.format(get_abandoned_uploads(idle_before).count()))
+            return
+
+        deleted_secured_entities = deleted_access_logs = 0
+        start = time.perf_counter()
+        for batch_secured_entities, batch_access_logs in reap_expired(expired_before, options['batch_size'],
+                                                                      options['log_batch_size']):
+            deleted_secured_entities += batch_secured_entities
+            deleted_access_logs += batch_access_logs
+            if options['verbosity'] > 1:
+                self.stdout.write('Deleted {} secured entities, {} access logs.'.format(batch_secured_entities,
+                                                                                        batch_access_logs))
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = max(time.perf_counter() - start, 0.001)
+        self.stdout.write(self.style.SUCCESS(
+            'Deleted {} secured entities and {} access logs in {:.3f} s ({:.0f} secured entities/s, '
+            '{:.0f} access logs/s).'.format(deleted_secured_entities, deleted_access_logs, elapsed,
+                                            deleted_secured_entities / elapsed, deleted_access_logs / elapsed)))
+
+        deleted_uploads = sum(reap_abandoned_uploads(idle_before, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS('Deleted {} abandoned uploads.'.format(deleted_uploads)))
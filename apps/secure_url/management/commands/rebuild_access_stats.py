@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ...stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds (or backfills) the daily stats rollup from the access logs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from',
+                            help='First day to rebuild (YYYY-MM-DD), the oldest (archived) access log by default.')
+        parser.add_argument('--to', dest='date_to',
+                            help='Last day to rebuild (YYYY-MM-DD), the newest (archived) access log by default.')
+
+    def _parse_date(self, value):
+        if value is None:
+            return None
+
+        try:
+            date = parse_date(value)
+        except ValueError:
+            date = None
+
+        if date is None:
+            raise CommandError('"{}" is not a valid YYYY-MM-DD date.'.format(value))
+        return date
+
+    def handle(self, *args, **options):
+        rebuilt_days = rebuild_daily_stats(self._parse_date(options['date_from']), self._parse_date(options['date_to']))
+
+        self.stdout.write(self.style.SUCCESS('Rebuilt stats of {} days.'.format(len(rebuilt_days))))
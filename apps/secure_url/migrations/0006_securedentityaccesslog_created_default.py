@@ -0,0 +1,19 @@
+# Generated by Django 2.1.7 on 2026-10-18 13:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0005_securedentity_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='securedentityaccesslog',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
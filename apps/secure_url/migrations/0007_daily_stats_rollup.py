@@ -0,0 +1,42 @@
+# Generated by Django 2.1.7 on 2026-10-18 13:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0006_securedentityaccesslog_created_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuredEntityDailyStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('type', models.CharField(choices=[('links', 'Link'), ('files', 'File')], max_length=10)),
+                ('visits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='SecuredEntityDailyVisit',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('secured_entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='secure_url.SecuredEntity')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='securedentitydailystats',
+            unique_together={('date', 'type')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='securedentitydailyvisit',
+            unique_together={('date', 'secured_entity')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.7 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0007_daily_stats_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securedentitydailystats',
+            name='sketch',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.1.7 on 2026-10-18 13:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0008_securedentitydailystats_sketch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='securedentity',
+            index=models.Index(fields=['user', '-created'], name='secure_url__user_id_5e3610_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securedentityaccesslog',
+            index=models.Index(fields=['secured_entity', 'created'], name='secure_url__secured_1392c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securedentityaccesslog',
+            index=models.Index(fields=['created'], name='secure_url__created_b20d30_idx'),
+        ),
+        # the single column index is dropped only once the composite one, which covers it, exists
+        migrations.AlterField(
+            model_name='securedentityaccesslog',
+            name='secured_entity',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='secure_url.SecuredEntity'),
+        ),
+    ]
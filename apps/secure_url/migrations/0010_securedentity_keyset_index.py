@@ -0,0 +1,21 @@
+# Generated by Django 2.1.7 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0009_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='securedentity',
+            name='secure_url__user_id_5e3610_idx',
+        ),
+        migrations.AddIndex(
+            model_name='securedentity',
+            index=models.Index(fields=['user', '-created', '-id'], name='secure_url__user_id_bcd1ae_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.1.7 on 2026-10-18 14:03
+
+import apps.secure_url.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0011_securedentityupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuredFileBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('references', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='securedentity',
+            name='file',
+            field=models.FileField(blank=True, default=None, max_length=255, null=True, storage=apps.secure_url.storage.ContentAddressedStorage(), upload_to='secure_url/files'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 2.1.7 on 2026-10-18 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_expires_at(apps, schema_editor):
+    # in batches of short transactions (the migration is not atomic), so big tables are not locked for long
+    SecuredEntity = apps.get_model('secure_url', 'SecuredEntity')
+    while True:
+        pks = list(SecuredEntity.objects.filter(expires_at__isnull=True).values_list('pk', flat=True)
+                   [:BACKFILL_BATCH_SIZE])
+        if not pks:
+            break
+        SecuredEntity.objects.filter(pk__in=pks).update(
+            expires_at=F('created') + settings.SECURED_ENTITY_ACCESSIBLE_TIME)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('secure_url', '0012_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securedentity',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='securedentity',
+            name='expires_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='securedentity',
+            index=models.Index(fields=['user', 'expires_at'], name='secure_url__user_id_43fc95_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securedentity',
+            index=models.Index(fields=['expires_at'], name='secure_url__expires_fdb359_idx'),
+        ),
+    ]
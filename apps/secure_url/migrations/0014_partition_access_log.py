@@ -0,0 +1,102 @@
+from datetime import date
+
+from django.db import migrations
+
+TABLE = 'secure_url_securedentityaccesslog'
+UNPARTITIONED_TABLE = '{}_unpartitioned'.format(TABLE)
+# native declarative partitioning with foreign keys and a default partition needs PostgreSQL 11
+MIN_POSTGRESQL_VERSION = 110000
+
+
+def _months(first, last):
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _can_partition(schema_editor):
+    connection = schema_editor.connection
+    return connection.vendor == 'postgresql' and connection.pg_version >= MIN_POSTGRESQL_VERSION
+
+
+def _swap_table(apps, schema_editor, create_sql):
+    """
+    Replaces the access log table by the one created by `create_sql` with the same rows, sequence and indexes.
+    """
+    SecuredEntityAccessLog = apps.get_model('secure_url', 'SecuredEntityAccessLog')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE {} RENAME TO {}'.format(TABLE, UNPARTITIONED_TABLE))
+        # names of indexes (and of the constraints backed by them) are unique in the whole schema
+        cursor.execute('ALTER INDEX {}_pkey RENAME TO {}_pkey'.format(TABLE, UNPARTITIONED_TABLE))
+        for index in SecuredEntityAccessLog._meta.indexes:
+            cursor.execute('ALTER INDEX {0} RENAME TO {0}_old'.format(index.name))
+        for sql, params in create_sql(cursor):
+            cursor.execute(sql, params)
+
+        cursor.execute('INSERT INTO {} (id, created, secured_entity_id) '
+                       'SELECT id, created, secured_entity_id FROM {}'.format(TABLE, UNPARTITIONED_TABLE))
+        # the sequence would be dropped together with the old table
+        cursor.execute('ALTER SEQUENCE {0}_id_seq OWNED BY {0}.id'.format(TABLE))
+        cursor.execute('DROP TABLE {}'.format(UNPARTITIONED_TABLE))
+
+    for index in SecuredEntityAccessLog._meta.indexes:
+        schema_editor.add_index(SecuredEntityAccessLog, index)
+
+
+def partition_access_log(apps, schema_editor):
+    if not _can_partition(schema_editor):
+        # other databases keep the single table - closed months are archived and deleted from it in batches
+        return
+
+    def create_partitioned_table(cursor):
+        # the primary key of a partitioned table has to include the partition key
+        yield ('CREATE TABLE {0} ('
+               'id integer NOT NULL DEFAULT nextval(\'{0}_id_seq\'), '
+               'created timestamp with time zone NOT NULL, '
+               'secured_entity_id uuid NOT NULL REFERENCES secure_url_securedentity (id) '
+               'DEFERRABLE INITIALLY DEFERRED, '
+               'PRIMARY KEY (id, created)'
+               ') PARTITION BY RANGE (created)'.format(TABLE), ())
+        yield 'CREATE TABLE {0}_default PARTITION OF {0} DEFAULT'.format(TABLE), ()
+
+        cursor.execute('SELECT min(created), max(created) FROM {}'.format(UNPARTITIONED_TABLE))
+        first, last = cursor.fetchone()
+        today = date.today()
+        for month in _months(min(first.date(), today) if first else today, max(last.date(), today) if last else today):
+            next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            yield ('CREATE TABLE {0}_y{1:%Y}m{1:%m} PARTITION OF {0} FOR VALUES FROM (%s) TO (%s)'.format(TABLE, month),
+                   (month.isoformat(), next_month.isoformat()))
+
+    _swap_table(apps, schema_editor, create_partitioned_table)
+
+
+def unpartition_access_log(apps, schema_editor):
+    if not _can_partition(schema_editor):
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE relname = %s', (TABLE,))
+        if cursor.fetchone()[0] != 'p':
+            return
+
+    def create_table(cursor):
+        yield ('CREATE TABLE {0} ('
+               'id integer NOT NULL PRIMARY KEY DEFAULT nextval(\'{0}_id_seq\'), '
+               'created timestamp with time zone NOT NULL, '
+               'secured_entity_id uuid NOT NULL REFERENCES secure_url_securedentity (id) '
+               'DEFERRABLE INITIALLY DEFERRED'
+               ')'.format(TABLE), ())
+
+    _swap_table(apps, schema_editor, create_table)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('secure_url', '0013_securedentity_expires_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_access_log, unpartition_access_log),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.7 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('secure_url', '0014_partition_access_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securedentityupload',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
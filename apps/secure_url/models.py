@@ -1,3 +1,4 @@
+import secrets
 import uuid
 from hashlib import md5
 
@@ -5,10 +6,36 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import URLValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import urlencode
 
+from . import checks  # noqa: F401 - registers the system checks
 from .constants import SecuredEntityTypes
+from .db_router import pin_to_primary
+from .entity_cache import invalidate_secured_entities
+from .grants import make_download_grant
+from .storage import ContentAddressedStorage, get_blob_name
+
+
+class SecuredEntityQuerySet(models.QuerySet):
+    def for_access(self):
+        # Narrow projection of everything needed to validate the password, check accessibility and build the redirect
+        # url. The access views read secured entities through the entity cache, which keeps all the (few) fields, so
+        # they are shared with the detail views - a miss still costs a single SELECT.
+        return self.only('password_salt', 'type', 'url', 'file', 'expires_at')
+
+    def accessible(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def with_content(self, sha256):
+        # file secured entities referencing the blob of the content (whatever their file names are)
+        return self.filter(file__startswith='{}/'.format(get_blob_name(sha256)))
 
 
 class SecuredEntity(models.Model):
@@ -16,22 +43,33 @@ class SecuredEntity(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True)
     password_salt = models.CharField(max_length=32)
     url = models.TextField(null=True, default=None, blank=True, validators=[URLValidator()])
-    file = models.FileField(upload_to='secure_url/files', null=True, default=None, blank=True)
+    file = models.FileField(upload_to='secure_url/files', storage=ContentAddressedStorage(), max_length=255, null=True,
+                            default=None, blank=True)
     type = models.CharField(max_length=10, choices=SecuredEntityTypes.get_choices(), default=SecuredEntityTypes.LINK)
     created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    objects = SecuredEntityQuerySet.as_manager()
 
     @property
     def password(self):
-        return md5('{}-{}'.format(self.password_salt, self.pk).encode('utf-8')).hexdigest()[:12]
+        return self.make_password(self.password_salt, self.pk)
+
+    @staticmethod
+    def make_password(password_salt, pk):
+        return md5('{}-{}'.format(password_salt, pk).encode('utf-8')).hexdigest()[:12]
 
     @property
     def is_accessible(self):
-        return self.created + settings.SECURED_ENTITY_ACCESSIBLE_TIME > timezone.now()
+        return self.expires_at > timezone.now()
 
     def save(self, *args, **kwargs):
         if not self.password_salt:
             self.password_salt = self.generate_password_salt()
 
+        if not self.expires_at:
+            self.expires_at = timezone.now() + settings.SECURED_ENTITY_ACCESSIBLE_TIME
+
         self.type = SecuredEntityTypes.LINK if self.url else SecuredEntityTypes.FILE
 
         return super().save(*args, **kwargs)
@@ -40,12 +78,22 @@ class SecuredEntity(models.Model):
         return reverse('secure_url:secured-entity-detail-view', kwargs={'pk': self.pk})
 
     def get_redirect_url(self):
-        return self.url if self.url else self.file.url
+        if self.url:
+            return self.url
+
+        # files are not public, they are sent by the download view to holders of a valid grant
+        return '{}?{}'.format(reverse('secure_url:secured-entity-download-view', args=(self.pk,)),
+                              urlencode({'grant': make_download_grant(self)}))
 
     def regenerate_password(self):
         self.password_salt = self.generate_password_salt()
         self.save(update_fields=['password_salt'])
 
+    @staticmethod
+    def generate_password_salts(count):
+        # for bulk operations - random salts don't need a hash per secured entity to be unique
+        return [secrets.token_hex(16) for _ in range(count)]
+
     def generate_password_salt(self):
         return md5('SecureUrlHashing{}-z`xcvge-{}--{}'.format(settings.SECRET_KEY,
                                                               timezone.now(),
@@ -56,14 +104,114 @@ class SecuredEntity(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            # list views - user's entities from the newest, `id` makes the order stable for the keyset pagination
+            models.Index(fields=['user', '-created', '-id']),
+            # user's accessible (or expired) entities
+            models.Index(fields=['user', 'expires_at']),
+            # admin filtering and the reaper
+            models.Index(fields=['expires_at']),
+        ]
 
 
-class SecuredEntityAccessLog(models.Model):
-    secured_entity = models.ForeignKey(SecuredEntity, on_delete=models.CASCADE)
+# sent with `pks` by bulk updates of secured entities, which don't send `post_save`
+secured_entities_updated = Signal(providing_args=['pks'])
+
+
+@receiver(post_save, sender=SecuredEntity)
+@receiver(post_delete, sender=SecuredEntity)
+def invalidate_cached_secured_entity(sender, instance, **kwargs):
+    invalidate_secured_entities([instance.pk])
+    # the user reads their own change from the default database until the read replicas catch up
+    pin_to_primary(instance.user_id)
+
+
+@receiver(secured_entities_updated, sender=SecuredEntity)
+def invalidate_cached_secured_entities(sender, pks, **kwargs):
+    invalidate_secured_entities(pks)
+
+
+@receiver(post_delete, sender=SecuredEntity)
+def delete_secured_entity_file(sender, instance, **kwargs):
+    # drops the reference to the content - it's removed from the disk together with the last one
+    if instance.file:
+        instance.file.delete(save=False)
+
+
+class SecuredFileBlob(models.Model):
+    """
+    Content stored once by `ContentAddressedStorage` - `references` is the number of secured entities sharing it.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    references = models.PositiveIntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return '{} ({} references)'.format(self.sha256, self.references)
+
+
+class SecuredEntityAccessLog(models.Model):
+    # indexed by the (secured_entity, created) index below
+    secured_entity = models.ForeignKey(SecuredEntity, on_delete=models.CASCADE, db_index=False)
+    # not `auto_now_add` - access logs are written in batches and have to keep the time of the access itself
+    created = models.DateTimeField(default=timezone.now, editable=False)
+
     def __str__(self):
         return 'Secured item: {} visited: {}'.format(self.secured_entity, self.created)
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            # access history of a single entity and removing it together with the entity
+            models.Index(fields=['secured_entity', 'created']),
+            # stats rebuild and admin listing by time
+            models.Index(fields=['created']),
+        ]
+
+
+class SecuredEntityDailyVisit(models.Model):
+    """
+    Marks that a secured entity was visited at least once on a given (UTC) day.
+    """
+    date = models.DateField()
+    secured_entity = models.ForeignKey(SecuredEntity, on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('date', 'secured_entity')
+
+
+class SecuredEntityDailyStats(models.Model):
+    """
+    Number of distinct secured entities of a given type visited on a given (UTC) day.
+    """
+    date = models.DateField()
+    type = models.CharField(max_length=10, choices=SecuredEntityTypes.get_choices())
+    visits = models.PositiveIntegerField(default=0)
+    # HyperLogLog sketch of visited secured entities, merged to count distinct visits over longer periods
+    sketch = models.BinaryField(default=b'')
+
+    def __str__(self):
+        return '{} - {}: {}'.format(self.date, self.type, self.visits)
+
+    class Meta:
+        ordering = ('date',)
+        unique_together = ('date', 'type')
+
+
+class SecuredEntityUpload(models.Model):
+    """
+    Chunked upload of a file secured entity in progress - chunks are written straight into `file` (its final place in
+    the storage) and `offset` is the number of bytes received so far.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
+    file = models.FileField(upload_to='secure_url/files')
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    # time of the last written chunk - uploads idle for SECURED_ENTITY_UPLOAD_MAX_IDLE_TIME are removed by the reaper
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return '{} - {} ({}/{})'.format(self.user, self.file.name, self.offset, self.size)
@@ -0,0 +1,52 @@
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(secured_entity):
+    # secured entities can be also listed as `.values()` rows
+    if isinstance(secured_entity, dict):
+        created, pk = secured_entity['created'], secured_entity['id']
+    else:
+        created, pk = secured_entity.created, secured_entity.pk
+
+    position = json.dumps([created.isoformat(), str(pk)])
+    return urlsafe_b64encode(position.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        created, pk = json.loads(urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        created, pk = parse_datetime(created), uuid.UUID(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise InvalidCursor('Invalid cursor.')
+
+    if created is None:
+        raise InvalidCursor('Invalid cursor.')
+    return created, pk
+
+
+def paginate_by_keyset(queryset, cursor, page_size):
+    """
+    Returns a page of secured entities ordered by (-created, -id) which starts right after the `cursor` together with
+    the cursor of the next page (or None).
+
+    The page is found with an index range scan instead of OFFSET, so its cost does not depend on how deep it is.
+    """
+    queryset = queryset.order_by('-created', '-id')
+
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created__lt=created) | Q(created=created, pk__lt=pk))
+
+    secured_entities = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(secured_entities[page_size - 1]) if len(secured_entities) > page_size else None
+
+    return secured_entities[:page_size], next_cursor
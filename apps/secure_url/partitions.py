@@ -0,0 +1,273 @@
+import glob
+import gzip
+import itertools
+import json
+import os
+import re
+import tempfile
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import SecuredEntity, SecuredEntityAccessLog
+
+ARCHIVE_FILE_RE = re.compile(r'^access-log-(?P<period>\d{4}-\d{2})(\.\d+)?\.jsonl\.gz$')
+
+
+def get_period(day):
+    """
+    Returns the first day of the month of `day` - access logs are partitioned and archived by months.
+    """
+    return date(day.year, day.month, 1)
+
+
+def get_next_period(period):
+    return date(period.year + period.month // 12, period.month % 12 + 1, 1)
+
+
+def get_previous_period(period):
+    return get_period(period - timedelta(days=1))
+
+
+def get_period_range(period):
+    return (datetime.combine(period, time.min, tzinfo=timezone.utc),
+            datetime.combine(get_next_period(period), time.min, tzinfo=timezone.utc))
+
+
+def get_partition_name(period):
+    return '{}_y{:%Y}m{:%m}'.format(SecuredEntityAccessLog._meta.db_table, period, period)
+
+
+def is_partitioned():
+    """
+    Tells whether the access log table is natively partitioned (on PostgreSQL 11+, see migration 0014). Other
+    databases keep a single table.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE relname = %s', (SecuredEntityAccessLog._meta.db_table,))
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def get_upcoming_periods(months_ahead, today=None):
+    """
+    Returns the current period and `months_ahead` periods after it.
+    """
+    periods = [get_period(today or date.today())]
+    for _ in range(months_ahead):
+        periods.append(get_next_period(periods[-1]))
+    return periods
+
+
+def ensure_partitions(periods):
+    """
+    Creates missing monthly partitions, e.g. for the upcoming months. Rows of the period which got into the default
+    partition in the meantime are moved to the new one. Does nothing if the table is not partitioned.
+    """
+    if not is_partitioned():
+        return []
+
+    table = SecuredEntityAccessLog._meta.db_table
+    created = []
+    for period in periods:
+        partition = get_partition_name(period)
+        start, end = get_period_range(period)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_class WHERE relname = %s', (partition,))
+            if cursor.fetchone():
+                continue
+
+            # a partition can't be created next to default partition rows of its range - they are moved into it first
+            cursor.execute('CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(
+                partition, table))
+            cursor.execute('WITH moved AS (DELETE FROM {0}_default WHERE created >= %s AND created < %s RETURNING *) '
+                           'INSERT INTO {1} SELECT * FROM moved'.format(table, partition), (start, end))
+            cursor.execute('ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)'.format(table, partition),
+                           (start, end))
+        created.append(period)
+    return created
+
+
+def get_detached_periods(before):
+    """
+    Returns periods starting before `before` with partitions left detached by archives which failed before dropping
+    them, from the oldest. They're archived by the next archive of the period.
+    """
+    if not is_partitioned():
+        return []
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT c.relname FROM pg_class c LEFT JOIN pg_inherits i ON i.inhrelid = c.oid '
+                       'WHERE c.relname LIKE %s AND c.relkind = %s AND i.inhrelid IS NULL',
+                       ('{}\\_y____m__'.format(SecuredEntityAccessLog._meta.db_table), 'r'))
+        periods = [datetime.strptime(name[-7:], '%Ym%m').date() for name, in cursor.fetchall()]
+    return sorted(period for period in periods if period < before)
+
+
+def get_logged_periods(before):
+    """
+    Returns periods starting before `before` which still have access logs in the database, from the oldest.
+    """
+    periods = []
+    access_logs = SecuredEntityAccessLog.objects.order_by('created')
+    while True:
+        first = access_logs.filter(created__lt=datetime.combine(before, time.min, tzinfo=timezone.utc)) \
+            .values_list('created', flat=True).first()
+        if first is None:
+            return periods
+        periods.append(get_period(first.astimezone(timezone.utc)))
+        access_logs = access_logs.filter(created__gte=get_period_range(periods[-1])[1])
+
+
+def archive_period(period, archive_dir, batch_size=5000):
+    """
+    Writes access logs of `period` into a gzip'd JSON lines file in `archive_dir` and removes them from the database
+    - the partition is detached and dropped if the table is partitioned, otherwise they're deleted in batches.
+
+    The file is complete before anything is removed, and only the access logs in it are removed. Access logs written
+    into the period in the meantime (e.g. drained from a spool) are kept - their ids can be lower than archived ones,
+    ids are given on insert, not on commit - and go to another file of the period later. Returns the file path (`None`
+    if there was nothing to archive) and the number of archived access logs.
+    """
+    start, end = get_period_range(period)
+    access_logs = SecuredEntityAccessLog.objects.filter(created__gte=start, created__lt=end).order_by()
+
+    if not is_partitioned():
+        path, archived = _write_archive(_get_access_log_rows(access_logs, batch_size), period, archive_dir)
+        if path is not None:
+            # the ids are read back from the file, a whole month of them doesn't have to be kept in memory
+            _delete_in_batches(_read_archived_pks(path), batch_size)
+        return path, archived
+
+    # Detached first - the partition is archived and dropped as a table of its own, so the writes of access logs
+    # (into the parent table) wait only for the short detach and not for the archive to be written. Writes into the
+    # period go to the default partition from then on, they're archived together with the detached rows.
+    partition = _detach_partition(period)
+
+    # only the few rows written into the period after the detach (or before the partition was created)
+    default_rows = list(_get_access_log_rows(access_logs, batch_size))
+    rows = default_rows
+    if partition is not None:
+        rows = itertools.chain(_get_partition_rows(partition, batch_size), default_rows)
+    path, archived = _write_archive(rows, period, archive_dir)
+
+    if partition is not None:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE {}'.format(partition))
+    _delete_in_batches((pk for pk, *_ in default_rows), batch_size)
+    return path, archived
+
+
+def _detach_partition(period):
+    """
+    Detaches the partition of `period` if it's still attached, returns its name (`None` if there is no such table - it
+    was dropped already). A partition detached by an archive which failed later is archived by the next one.
+    """
+    table = SecuredEntityAccessLog._meta.db_table
+    partition = get_partition_name(period)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SELECT c.oid, i.inhparent IS NOT NULL FROM pg_class c '
+                       'LEFT JOIN pg_inherits i ON i.inhrelid = c.oid WHERE c.relname = %s', (partition,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        if row[1]:
+            cursor.execute('ALTER TABLE {} DETACH PARTITION {}'.format(table, partition))
+    return partition
+
+
+def _get_access_log_rows(access_logs, batch_size):
+    return access_logs.values_list('pk', 'secured_entity_id', 'secured_entity__type', 'created') \
+        .iterator(chunk_size=batch_size)
+
+
+def _get_partition_rows(partition, batch_size):
+    # a detached partition is not read through the model, its rows are streamed by a server side cursor
+    with connection.chunked_cursor() as cursor:
+        cursor.execute('SELECT l.id, l.secured_entity_id, e.type, l.created FROM {} l '
+                       'JOIN {} e ON e.id = l.secured_entity_id'.format(partition, SecuredEntity._meta.db_table))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+
+def _write_archive(rows, period, archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=archive_dir, suffix='.part')
+    archived, path = 0, None
+
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            with gzip.GzipFile(fileobj=temp_file, mode='wb') as archive_file:
+                for pk, secured_entity_id, entity_type, created in rows:
+                    # the type is kept, so the stats can be rebuilt even after the secured entity is deleted
+                    archive_file.write(json.dumps({
+                        'id': pk, 'secured_entity_id': str(secured_entity_id), 'type': entity_type,
+                        'created': created.isoformat()
+                    }).encode('utf-8') + b'\n')
+                    archived += 1
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        if archived:
+            path = _get_free_archive_path(archive_dir, period)
+            os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return path, archived
+
+
+def _get_free_archive_path(archive_dir, period):
+    path = os.path.join(archive_dir, 'access-log-{:%Y-%m}.jsonl.gz'.format(period))
+    part = 1
+    while os.path.exists(path):
+        part += 1
+        path = os.path.join(archive_dir, 'access-log-{:%Y-%m}.{}.jsonl.gz'.format(period, part))
+    return path
+
+
+def _read_archived_pks(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+        for line in archive_file:
+            yield json.loads(line)['id']
+
+
+def _delete_in_batches(pks, batch_size):
+    pks = iter(pks)
+    while True:
+        batch = list(itertools.islice(pks, batch_size))
+        if not batch:
+            return
+        SecuredEntityAccessLog.objects.filter(pk__in=batch).delete()
+
+
+def get_archived_periods(archive_dir):
+    if not os.path.isdir(archive_dir):
+        return []
+
+    return sorted({date(*map(int, match.group('period').split('-')), 1)
+                   for match in map(ARCHIVE_FILE_RE.match, os.listdir(archive_dir)) if match})
+
+
+def read_archived_period(period, archive_dir):
+    """
+    Yields (secured_entity_id, type, created) of the access logs archived from `period`.
+    """
+    for path in sorted(glob.glob(os.path.join(archive_dir, 'access-log-{:%Y-%m}*.jsonl.gz'.format(period)))):
+        if not ARCHIVE_FILE_RE.match(os.path.basename(path)):
+            continue
+        with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+            for line in archive_file:
+                access_log = json.loads(line)
+                yield (uuid.UUID(access_log['secured_entity_id']), access_log['type'],
+                       parse_datetime(access_log['created']))
@@ -0,0 +1,71 @@
+from django.db import transaction
+
+from .models import SecuredEntity, SecuredEntityAccessLog, SecuredEntityDailyVisit, SecuredEntityUpload
+
+
+def get_expired_secured_entities(expired_before):
+    return SecuredEntity.objects.filter(expires_at__lt=expired_before)
+
+
+def count_expired(expired_before):
+    """
+    Returns numbers of (secured entities, access logs, files) `reap_expired` would delete.
+    """
+    secured_entities = get_expired_secured_entities(expired_before)
+    return (secured_entities.count(),
+            SecuredEntityAccessLog.objects.filter(secured_entity__in=secured_entities).count(),
+            secured_entities.exclude(file__isnull=True).exclude(file='').count())
+
+
+def reap_expired(expired_before, batch_size=500, log_batch_size=5000):
+    """
+    Deletes secured entities expired before `expired_before` together with their access logs, daily visit markers and
+    files, `batch_size` secured entities at a time. Yields (secured entities, access logs) deleted by each batch.
+
+    Every statement deletes a bounded number of rows in its own short transaction, so rows used by the access views
+    are never locked for long. The daily stats rollup is kept - it does not reference the secured entities.
+    """
+    while True:
+        secured_entity_ids = list(get_expired_secured_entities(expired_before).order_by('expires_at')
+                                  .values_list('pk', flat=True)[:batch_size])
+        if not secured_entity_ids:
+            return
+
+        # access logs of popular entities may be many, so they go in bounded chunks before the entities
+        deleted_access_logs = 0
+        while True:
+            access_log_ids = list(SecuredEntityAccessLog.objects.filter(secured_entity_id__in=secured_entity_ids)
+                                  .order_by().values_list('pk', flat=True)[:log_batch_size])
+            if not access_log_ids:
+                break
+            deleted_access_logs += SecuredEntityAccessLog.objects.filter(pk__in=access_log_ids).delete()[0]
+
+        with transaction.atomic():
+            SecuredEntityDailyVisit.objects.filter(secured_entity_id__in=secured_entity_ids).delete()
+            # deleted one by one by the collector - `post_delete` drops the references to their files
+            deleted_secured_entities = SecuredEntity.objects.filter(pk__in=secured_entity_ids).delete()[1] \
+                .get(SecuredEntity._meta.label, 0)
+
+        yield deleted_secured_entities, deleted_access_logs
+
+
+def get_abandoned_uploads(idle_before):
+    return SecuredEntityUpload.objects.filter(updated__lt=idle_before)
+
+
+def reap_abandoned_uploads(idle_before, batch_size=500):
+    """
+    Deletes chunked uploads without a chunk written since `idle_before` together with their files, `batch_size` at a
+    time. Yields the number of uploads deleted by each batch.
+    """
+    while True:
+        with transaction.atomic():
+            # locked like by finalizing, so an upload being finalized right now is not removed under its hands
+            uploads = list(get_abandoned_uploads(idle_before).select_for_update().order_by('updated')[:batch_size])
+            if not uploads:
+                return
+            SecuredEntityUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+
+        for upload in uploads:
+            upload.file.delete(save=False)
+        yield len(uploads)
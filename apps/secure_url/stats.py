@@ -0,0 +1,209 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .constants import SecuredEntityTypes, StatsGranularity
+from .hll import HyperLogLog
+from .models import SecuredEntity, SecuredEntityAccessLog, SecuredEntityDailyStats, SecuredEntityDailyVisit
+from .partitions import get_archived_periods, get_next_period, get_period, read_archived_period
+
+ARCHIVED_ENTITIES_BATCH_SIZE = 500
+
+
+def get_visit_date(created):
+    return created.astimezone(timezone.utc).date()
+
+
+def record_daily_visits(visits):
+    """
+    Updates the daily stats rollup with (date, secured_entity_id, type) visits. Only the first visit of a secured
+    entity on a given day is counted.
+    """
+    visits = set(visits)
+    if not visits:
+        return
+
+    already_visited = set(SecuredEntityDailyVisit.objects.filter(
+        date__in={date for date, _, _ in visits},
+        secured_entity_id__in={secured_entity_id for _, secured_entity_id, _ in visits}
+    ).values_list('date', 'secured_entity_id'))
+
+    new_visits = _create_daily_visits([visit for visit in visits if visit[:2] not in already_visited])
+
+    visited_entities = {}
+    for date, secured_entity_id, entity_type in new_visits:
+        visited_entities.setdefault((date, entity_type), []).append(secured_entity_id)
+
+    for (date, entity_type), secured_entity_ids in visited_entities.items():
+        _update_daily_stats(date, entity_type, secured_entity_ids)
+
+
+def _create_daily_visits(visits):
+    try:
+        with transaction.atomic():
+            SecuredEntityDailyVisit.objects.bulk_create([
+                SecuredEntityDailyVisit(date=date, secured_entity_id=secured_entity_id)
+                for date, secured_entity_id, _ in visits])
+        return visits
+    except IntegrityError:
+        # another worker has recorded some of these visits in the meantime - only the rest of them is counted
+        created_visits = []
+        for date, secured_entity_id, entity_type in visits:
+            try:
+                with transaction.atomic():
+                    SecuredEntityDailyVisit.objects.create(date=date, secured_entity_id=secured_entity_id)
+                created_visits.append((date, secured_entity_id, entity_type))
+            except IntegrityError:
+                pass
+        return created_visits
+
+
+def _update_daily_stats(date, entity_type, secured_entity_ids):
+    with transaction.atomic():
+        daily_stats, _ = SecuredEntityDailyStats.objects.select_for_update().get_or_create(date=date, type=entity_type)
+
+        sketch = HyperLogLog.from_bytes(daily_stats.sketch)
+        for secured_entity_id in secured_entity_ids:
+            sketch.add(secured_entity_id.bytes)
+
+        daily_stats.visits += len(secured_entity_ids)
+        daily_stats.sketch = sketch.to_bytes()
+        daily_stats.save(update_fields=['visits', 'sketch'])
+
+
+def get_period_key(date, granularity, date_from=None, date_to=None):
+    if granularity == StatsGranularity.WEEK:
+        return (date - timedelta(days=date.weekday())).strftime('%Y-%m-%d')
+    if granularity == StatsGranularity.MONTH:
+        return date.strftime('%Y-%m')
+    if granularity == StatsGranularity.RANGE:
+        return '{}/{}'.format(date_from.strftime('%Y-%m-%d'), date_to.strftime('%Y-%m-%d'))
+    return date.strftime('%Y-%m-%d')
+
+
+def count_distinct_visits(daily_stats):
+    """
+    Number of distinct secured entities visited on any of the days. Exact for a single day, otherwise estimated by
+    merging the HyperLogLog sketches (see `HyperLogLog` for the error bound).
+    """
+    if len(daily_stats) == 1:
+        return daily_stats[0].visits
+
+    sketch = HyperLogLog()
+    for day_stats in daily_stats:
+        sketch.merge(HyperLogLog.from_bytes(day_stats.sketch))
+    return sketch.count()
+
+
+def prepare_stats(date_from=None, date_to=None, granularity=StatsGranularity.DAY):
+    """
+    Number of distinct visited secured entities per type in each period between `date_from` and `date_to`.
+    """
+    daily_stats = SecuredEntityDailyStats.objects.all()
+    if date_from:
+        daily_stats = daily_stats.filter(date__gte=date_from)
+    if date_to:
+        daily_stats = daily_stats.filter(date__lte=date_to)
+    if granularity == StatsGranularity.DAY:
+        daily_stats = daily_stats.defer('sketch')
+
+    daily_stats = list(daily_stats)
+    if not daily_stats:
+        return {}
+
+    date_from = date_from or daily_stats[0].date
+    date_to = date_to or daily_stats[-1].date
+
+    periods = {}
+    for day_stats in daily_stats:
+        period_key = get_period_key(day_stats.date, granularity, date_from, date_to)
+        periods.setdefault(period_key, {}).setdefault(day_stats.type, []).append(day_stats)
+
+    return {period_key: dict({SecuredEntityTypes.FILE: 0, SecuredEntityTypes.LINK: 0},
+                             **{entity_type: count_distinct_visits(period_stats)
+                                for entity_type, period_stats in period_types.items()})
+            for period_key, period_types in periods.items()}
+
+
+def rebuild_daily_stats(date_from=None, date_to=None, batch_size=None, archive_dir=None):
+    """
+    Recomputes the daily stats rollup from the access logs day by day, each day in its own transaction. Access logs of
+    periods archived to `archive_dir` (`SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR` by default) are read from the archives.
+
+    Returns the list of rebuilt days.
+    """
+    archive_dir = archive_dir or settings.SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR
+    archived_periods = get_archived_periods(archive_dir)
+
+    logs_range = SecuredEntityAccessLog.objects.order_by().aggregate(first=Min('created'), last=Max('created'))
+    first_days = [get_visit_date(logs_range['first'])] if logs_range['first'] else []
+    last_days = [get_visit_date(logs_range['last'])] if logs_range['last'] else []
+    if archived_periods:
+        first_days.append(archived_periods[0])
+        last_days.append(get_next_period(archived_periods[-1]) - timedelta(days=1))
+    if not first_days:
+        return []
+
+    date_from = date_from or min(first_days)
+    date_to = date_to or max(last_days)
+
+    rebuilt_days = []
+    archived_visits, archived_period = {}, None
+    date = date_from
+    while date <= date_to:
+        period = get_period(date)
+        if period != archived_period:
+            # every archive is read once, not once per day
+            archived_visits = _read_archived_visits(period, archive_dir) if period in archived_periods else {}
+            archived_period = period
+
+        _rebuild_day(date, batch_size, archived_visits.get(date, set()))
+        rebuilt_days.append(date)
+        date += timedelta(days=1)
+
+    return rebuilt_days
+
+
+def _read_archived_visits(period, archive_dir):
+    visits = {}
+    for secured_entity_id, entity_type, created in read_archived_period(period, archive_dir):
+        visits.setdefault(get_visit_date(created), set()).add((secured_entity_id, entity_type))
+    return visits
+
+
+def _rebuild_day(date, batch_size, archived_visits=()):
+    day_start = datetime.combine(date, time.min, tzinfo=timezone.utc)
+    visited_entities = set(
+        SecuredEntityAccessLog.objects
+        .filter(created__gte=day_start, created__lt=day_start + timedelta(days=1))
+        .order_by()
+        .values_list('secured_entity_id', 'secured_entity__type')
+        .distinct())
+
+    # secured entities of archived access logs may be deleted already - they are counted, but not marked as visited
+    existing_entity_ids = {secured_entity_id for secured_entity_id, _ in visited_entities}
+    archived_entity_ids = list({secured_entity_id for secured_entity_id, _ in archived_visits} - existing_entity_ids)
+    for start in range(0, len(archived_entity_ids), ARCHIVED_ENTITIES_BATCH_SIZE):
+        existing_entity_ids.update(SecuredEntity.objects.filter(
+            pk__in=archived_entity_ids[start:start + ARCHIVED_ENTITIES_BATCH_SIZE]).values_list('pk', flat=True))
+    visited_entities.update(archived_visits)
+
+    with transaction.atomic():
+        SecuredEntityDailyVisit.objects.filter(date=date).delete()
+        SecuredEntityDailyStats.objects.filter(date=date).delete()
+
+        SecuredEntityDailyVisit.objects.bulk_create([
+            SecuredEntityDailyVisit(date=date, secured_entity_id=secured_entity_id)
+            for secured_entity_id in existing_entity_ids], batch_size=batch_size)
+
+        sketches = {}
+        for secured_entity_id, entity_type in visited_entities:
+            sketches.setdefault(entity_type, HyperLogLog()).add(secured_entity_id.bytes)
+
+        SecuredEntityDailyStats.objects.bulk_create([
+            SecuredEntityDailyStats(date=date, type=entity_type, visits=count, sketch=sketches[entity_type].to_bytes())
+            for entity_type, count in Counter(entity_type for _, entity_type in visited_entities).items()])
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+BLOBS_DIR = 'secure_url/blobs'
+BLOB_NAME_RE = re.compile(r'^{}/[0-9a-f]{{2}}/(?P<sha256>[0-9a-f]{{64}})(/|$)'.format(BLOBS_DIR))
+# keeps names of stored files within the `max_length` of `SecuredEntity.file`
+MAX_FILE_NAME_LENGTH = 100
+
+
+def get_blob_name(sha256):
+    return '{}/{}/{}'.format(BLOBS_DIR, sha256[:2], sha256)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every distinct content once, under `secure_url/blobs/<sha256[:2]>/<sha256>`.
+
+    Saved names keep the original file name after the hash (`.../<sha256>/<file name>`), so downloads are still named
+    like the uploaded files. Every saved name is a reference to the blob and deleting it drops the reference - the
+    blob is removed together with the last one (from the disk once that is committed). Names outside of
+    `secure_url/blobs` (files stored before) are handled like by FileSystemStorage.
+    """
+    block_size = 64 * 1024
+
+    def path(self, name):
+        match = BLOB_NAME_RE.match(name)
+        return super().path(get_blob_name(match.group('sha256')) if match else name)
+
+    def _save(self, name, content):
+        blob_dir = super().path(BLOBS_DIR)
+        os.makedirs(blob_dir, exist_ok=True)
+
+        # the temporary file is on the same file system as the blobs, so it's moved in place without copying
+        fd, temp_path = tempfile.mkstemp(dir=blob_dir, suffix='.part')
+        digest = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as temp_file:
+            for chunk in content.chunks(self.block_size):
+                temp_file.write(chunk)
+                digest.update(chunk)
+
+        return self.store(temp_path, digest.hexdigest(), name)
+
+    def store(self, temp_path, sha256, name):
+        """
+        Stores the file under `temp_path` (already hashed, e.g. by a chunked upload) as a reference to its blob - the
+        file is moved in place if the content is new and removed otherwise.
+        """
+        from .models import SecuredFileBlob
+
+        blob_path = super().path(get_blob_name(sha256))
+        try:
+            with transaction.atomic():
+                _, created = SecuredFileBlob.objects.select_for_update().get_or_create(
+                    sha256=sha256, defaults={'size': os.path.getsize(temp_path)})
+                if created or not os.path.exists(blob_path):
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(temp_path, blob_path)
+                SecuredFileBlob.objects.filter(pk=sha256).update(references=F('references') + 1)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return self._get_name(sha256, name)
+
+    def reference(self, sha256, name):
+        """
+        Adds a reference to a blob stored before, so known content doesn't have to be uploaded again.
+        Raises FileNotFoundError if there is no such blob.
+        """
+        from .models import SecuredFileBlob
+
+        if not SecuredFileBlob.objects.filter(pk=sha256).update(references=F('references') + 1):
+            raise FileNotFoundError(sha256)
+
+        return self._get_name(sha256, name)
+
+    def delete(self, name):
+        from .models import SecuredFileBlob
+
+        match = BLOB_NAME_RE.match(name)
+        if match is None:
+            return super().delete(name)
+
+        sha256 = match.group('sha256')
+        with transaction.atomic():
+            # the lock makes concurrent `store` wait, so it doesn't count on a blob removed in the meantime
+            blob = SecuredFileBlob.objects.select_for_update().filter(pk=sha256).first()
+            if blob is None:
+                return
+
+            if blob.references > 1:
+                SecuredFileBlob.objects.filter(pk=sha256).update(references=F('references') - 1)
+            else:
+                blob.delete()
+                # the content is removed from the disk only once the deletion is committed - if an outer transaction
+                # (e.g. a reaper batch) rolls back, the blob row comes back and the file has to be still there
+                transaction.on_commit(lambda: self._delete_unreferenced_blob(sha256))
+
+    def _delete_unreferenced_blob(self, sha256):
+        from .models import SecuredFileBlob
+
+        with transaction.atomic():
+            # the same content may have been stored again after the deletion was committed
+            if not SecuredFileBlob.objects.select_for_update().filter(pk=sha256).exists():
+                super().delete(get_blob_name(sha256))
+
+    def _get_name(self, sha256, name):
+        file_root, file_ext = os.path.splitext(self.get_valid_name(os.path.basename(name)))
+        return '{}/{}{}'.format(get_blob_name(sha256), file_root[:MAX_FILE_NAME_LENGTH - len(file_ext)],
+                                file_ext)
@@ -0,0 +1,38 @@
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+
+
+class TemporaryMediaRootMixin:
+    """
+    Files saved by the tests of the class go to a temporary MEDIA_ROOT, which is removed after the last test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls._media_root_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls._media_root_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._media_root_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+@contextmanager
+def run_on_commit_callbacks(using=DEFAULT_DB_ALIAS):
+    """
+    Runs the `transaction.on_commit` callbacks registered within the block, which a TestCase never commits. Callbacks
+    of savepoints rolled back within the block are dropped by Django, so they are not run.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    for _, callback in connection.run_on_commit[start:]:
+        callback()
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import threading
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..access_log import (BufferedAccessLogSink, SpoolAccessLogSink, find_orphaned_spool_files, get_access_log_sink,
+                          write_access_logs)
+from ..models import SecuredEntity, SecuredEntityAccessLog
+
+
+class AccessLogTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='test', password='123qweasd')
+        self.secured_entity = SecuredEntity.objects.create(user=self.user, url='https://www.facebook.com/')
+        self.spool_dir = tempfile.mkdtemp()
+
+    def _get_sink(self, sink_class, **kwargs):
+        sink = sink_class(**kwargs)
+        # pending events have to be stored before the test database is gone, not at exit
+        self.addCleanup(sink.flush)
+        return sink
+
+    def _get_dead_pid(self):
+        pid = 999999
+        while os.path.exists('/proc/{}'.format(pid)):
+            pid -= 1
+        return pid
+
+    def test_write_access_logs_keeps_time_of_access(self):
+        created = timezone.now() - timezone.timedelta(hours=1)
+
+        write_access_logs([(self.secured_entity.pk, created)])
+
+        self.assertEqual(created, SecuredEntityAccessLog.objects.get().created)
+
+    def test_write_access_logs_skips_removed_secured_entities(self):
+        written = write_access_logs([(self.secured_entity.pk, timezone.now()), (uuid.uuid4(), timezone.now())])
+
+        self.assertEqual(1, written)
+        self.assertEqual(1, SecuredEntityAccessLog.objects.count())
+
+    def test_buffered_sink_does_not_write_before_batch_is_full(self):
+        sink = self._get_sink(BufferedAccessLogSink, batch_size=3, flush_interval=60)
+
+        with self.assertNumQueries(0):
+            sink.enqueue(self.secured_entity.pk)
+            sink.enqueue(self.secured_entity.pk)
+
+        self.assertEqual(0, SecuredEntityAccessLog.objects.count())
+
+    def test_buffered_sink_writes_full_batch(self):
+        sink = self._get_sink(BufferedAccessLogSink, batch_size=3, flush_interval=60)
+
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                sink.enqueue(self.secured_entity.pk)
+        sink.flush_if_due()
+
+        self.assertEqual(3, SecuredEntityAccessLog.objects.count())
+
+    def test_buffered_sink_writes_after_flush_interval(self):
+        sink = self._get_sink(BufferedAccessLogSink, batch_size=100, flush_interval=0)
+
+        sink.enqueue(self.secured_entity.pk)
+        sink.flush_if_due()
+
+        self.assertEqual(1, SecuredEntityAccessLog.objects.count())
+
+    def test_buffered_sink_does_not_write_events_which_are_not_due(self):
+        sink = self._get_sink(BufferedAccessLogSink, batch_size=100, flush_interval=60)
+
+        sink.enqueue(self.secured_entity.pk)
+        sink.flush_if_due()
+
+        self.assertEqual(0, SecuredEntityAccessLog.objects.count())
+
+    @override_settings(SECURED_ENTITY_ACCESS_LOG_SINK='apps.secure_url.access_log.BufferedAccessLogSink',
+                       SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS={'flush_interval': 0})
+    def test_due_events_are_written_when_request_is_finished(self):
+        self.addCleanup(get_access_log_sink().flush)
+        get_access_log_sink().enqueue(self.secured_entity.pk)
+
+        self.client.get('/login/')
+
+        self.assertEqual(1, SecuredEntityAccessLog.objects.count())
+
+    def test_background_flush_writes_due_events_without_requests(self):
+        flushed = threading.Event()
+
+        class RecordingSink(BufferedAccessLogSink):
+            # the flush thread has its own database connection, which doesn't see the test transaction
+            def flush(self):
+                with self._lock:
+                    self.flushed_events, self._events = self._events, []
+                    self.flush_interval = 3600
+                flushed.set()
+
+        sink = RecordingSink(batch_size=100, flush_interval=0.05, background_flush=True)
+        sink.enqueue(self.secured_entity.pk)
+
+        self.assertTrue(flushed.wait(timeout=5))
+        self.assertListEqual([self.secured_entity.pk], [event[0] for event in sink.flushed_events])
+
+    def test_spool_sink_appends_events_to_spool_file(self):
+        sink = self._get_sink(SpoolAccessLogSink, spool_dir=self.spool_dir, batch_size=3, flush_interval=60)
+
+        with self.assertNumQueries(0):
+            sink.enqueue(self.secured_entity.pk)
+            sink.enqueue(self.secured_entity.pk)
+
+        with open(sink.spool_path) as spool_file:
+            self.assertEqual(2, len(spool_file.readlines()))
+
+    def test_spool_sink_writes_full_batch_and_removes_spool_file(self):
+        sink = self._get_sink(SpoolAccessLogSink, spool_dir=self.spool_dir, batch_size=3, flush_interval=60)
+
+        for _ in range(3):
+            sink.enqueue(self.secured_entity.pk)
+        sink.flush_if_due()
+
+        self.assertEqual(3, SecuredEntityAccessLog.objects.count())
+        self.assertListEqual([], os.listdir(self.spool_dir))
+
+    def test_spool_sink_retries_spool_file_after_database_error(self):
+        sink = self._get_sink(SpoolAccessLogSink, spool_dir=self.spool_dir, batch_size=3, flush_interval=60)
+        for _ in range(3):
+            sink.enqueue(self.secured_entity.pk)
+
+        with mock.patch('apps.secure_url.access_log.write_access_logs', side_effect=DatabaseError()), \
+                self.assertLogs('apps.secure_url.access_log', 'ERROR'):
+            self.assertEqual(0, sink.flush_if_due())
+
+        self.assertEqual(0, SecuredEntityAccessLog.objects.count())
+        self.assertEqual(0, sink.get_flush_delay())
+
+        sink.enqueue(self.secured_entity.pk)
+        self.assertEqual(4, sink.flush_if_due())
+
+        self.assertEqual(4, SecuredEntityAccessLog.objects.count())
+        self.assertListEqual([], os.listdir(self.spool_dir))
+        self.assertIsNone(sink.get_flush_delay())
+
+    def test_spool_files_of_running_processes_are_not_orphaned(self):
+        sink = self._get_sink(SpoolAccessLogSink, spool_dir=self.spool_dir, batch_size=3, flush_interval=60)
+        sink.enqueue(self.secured_entity.pk)
+
+        self.assertListEqual([], find_orphaned_spool_files(self.spool_dir))
+
+    def test_drain_access_log_spool_command_stores_orphaned_spool_files(self):
+        spool_path = os.path.join(self.spool_dir, 'access-log-{}.spool'.format(self._get_dead_pid()))
+        with open(spool_path, 'w') as spool_file:
+            spool_file.write('{{"id": "{}", "created": "{}"}}\n'.format(
+                self.secured_entity.pk, timezone.now().isoformat()))
+            spool_file.write('{"id": "cut in the half')
+
+        with self.assertLogs('apps.secure_url.access_log', 'WARNING'):
+            call_command('drain_access_log_spool', spool_dir=self.spool_dir, stdout=StringIO())
+
+        self.assertEqual(1, SecuredEntityAccessLog.objects.count())
+        self.assertFalse(os.path.exists(spool_path))
@@ -0,0 +1,248 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock, skipIf, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import partitions
+from ..models import SecuredEntity, SecuredEntityAccessLog, SecuredEntityDailyStats, SecuredEntityDailyVisit
+from ..partitions import archive_period, ensure_partitions, get_archived_periods, get_logged_periods, \
+    get_next_period, get_partition_name, get_period, get_previous_period, get_upcoming_periods, is_partitioned, \
+    read_archived_period
+from ..stats import rebuild_daily_stats
+
+
+class AccessLogArchiveTestMixin:
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='test')
+        self.secured_entity = SecuredEntity.objects.create(user=self.user, url='https://example.com/')
+
+        self.current_period = get_period(date.today())
+        self.old_period = get_previous_period(get_previous_period(get_previous_period(get_previous_period(
+            self.current_period))))
+
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        self.archive_dir = archive_dir.name
+
+        settings_override = override_settings(SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR=self.archive_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _log_access(self, period, day=1, secured_entity=None):
+        return SecuredEntityAccessLog.objects.create(
+            secured_entity=secured_entity or self.secured_entity,
+            created=datetime(period.year, period.month, day, 12, tzinfo=timezone.utc))
+
+    def _archive_without(self, access_log):
+        # as if `access_log` was inserted (with its lower id) but committed only after the archive read the period
+        get_access_log_rows = partitions._get_access_log_rows
+        with mock.patch('apps.secure_url.partitions._get_access_log_rows', lambda access_logs, batch_size: (
+                row for row in get_access_log_rows(access_logs, batch_size) if row[0] != access_log.pk)):
+            return archive_period(self.old_period, self.archive_dir)
+
+    def _archive(self, **options):
+        stdout = StringIO()
+        call_command('archive_access_logs', stdout=stdout, **options)
+        return stdout.getvalue()
+
+
+class AccessLogArchiveTest(AccessLogArchiveTestMixin, TestCase):
+    def test_archive_writes_access_logs_to_json_lines_and_deletes_them(self):
+        access_log = self._log_access(self.old_period, day=2)
+
+        path, archived = archive_period(self.old_period, self.archive_dir)
+
+        self.assertEqual(1, archived)
+        self.assertEqual('access-log-{:%Y-%m}.jsonl.gz'.format(self.old_period), os.path.basename(path))
+        with gzip.open(path, 'rt') as archive_file:
+            self.assertEqual([{'id': access_log.pk, 'secured_entity_id': str(self.secured_entity.pk),
+                               'type': self.secured_entity.type, 'created': access_log.created.isoformat()}],
+                             [json.loads(line) for line in archive_file])
+        self.assertFalse(SecuredEntityAccessLog.objects.exists())
+
+    def test_archive_of_empty_period_writes_no_file(self):
+        self.assertEqual((None, 0), archive_period(self.old_period, self.archive_dir))
+        self.assertEqual([], os.listdir(self.archive_dir))
+
+    def test_access_logs_written_into_archived_period_go_to_another_file(self):
+        self._log_access(self.old_period)
+        archive_period(self.old_period, self.archive_dir)
+        self._log_access(self.old_period, day=3)
+
+        path, archived = archive_period(self.old_period, self.archive_dir, batch_size=1)
+
+        self.assertEqual('access-log-{:%Y-%m}.2.jsonl.gz'.format(self.old_period), os.path.basename(path))
+        self.assertEqual([self.old_period], get_archived_periods(self.archive_dir))
+        self.assertEqual(2, len(list(read_archived_period(self.old_period, self.archive_dir))))
+
+    def test_access_log_committed_after_the_read_is_kept_for_the_next_archive(self):
+        self._log_access(self.old_period)
+        late_access_log = self._log_access(self.old_period, day=2)
+        self._log_access(self.old_period, day=3)
+
+        path, archived = self._archive_without(late_access_log)
+
+        self.assertEqual(2, archived)
+        self.assertEqual([late_access_log.pk], list(SecuredEntityAccessLog.objects.values_list('pk', flat=True)))
+
+    def test_command_archives_only_months_before_kept_ones(self):
+        self._log_access(self.old_period)
+        self._log_access(get_previous_period(self.current_period))
+        self._log_access(self.current_period)
+
+        output = self._archive(keep_months=1)
+
+        self.assertIn('Archived 1 access logs of {:%Y-%m}'.format(self.old_period), output)
+        self.assertIn('Archived 1 months.', output)
+        self.assertEqual(2, SecuredEntityAccessLog.objects.count())
+        self.assertEqual([self.old_period], get_archived_periods(self.archive_dir))
+
+    def test_command_dry_run_keeps_access_logs(self):
+        self._log_access(self.old_period)
+
+        output = self._archive(keep_months=1, dry_run=True)
+
+        self.assertIn('Would archive {:%Y-%m}.'.format(self.old_period), output)
+        self.assertEqual(1, SecuredEntityAccessLog.objects.count())
+        self.assertEqual([], get_archived_periods(self.archive_dir))
+
+    def test_logged_periods_are_listed_from_the_oldest(self):
+        self._log_access(get_previous_period(self.current_period))
+        self._log_access(self.old_period, day=5)
+        self._log_access(self.old_period, day=1)
+
+        self.assertEqual([self.old_period, get_previous_period(self.current_period)],
+                         get_logged_periods(self.current_period))
+
+    def test_rebuild_reads_archived_access_logs(self):
+        deleted_secured_entity = SecuredEntity.objects.create(user=self.user, url='https://example.com/deleted')
+        self._log_access(self.old_period)
+        self._log_access(self.old_period, secured_entity=deleted_secured_entity)
+        self._log_access(self.current_period)
+        self._archive(keep_months=0)
+        deleted_secured_entity.delete()
+
+        rebuilt_days = rebuild_daily_stats()
+
+        self.assertEqual(self.old_period, rebuilt_days[0])
+        # visits of deleted secured entities are still counted
+        self.assertEqual(2, SecuredEntityDailyStats.objects.get(date=self.old_period).visits)
+        self.assertEqual([self.secured_entity.pk], list(
+            SecuredEntityDailyVisit.objects.filter(date=self.old_period).values_list('secured_entity_id', flat=True)))
+        self.assertEqual(1, SecuredEntityDailyStats.objects.get(date=self.current_period).visits)
+        self.assertEqual(0, SecuredEntityDailyStats.objects.filter(
+            date=self.old_period + timedelta(days=1)).count())
+
+    def test_upcoming_periods_start_with_the_current_one(self):
+        self.assertEqual([date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)],
+                         get_upcoming_periods(2, today=date(2026, 11, 15)))
+
+    @skipIf(connection.vendor == 'postgresql', 'The access log is partitioned on PostgreSQL.')
+    def test_create_partitions_command_without_partitioning_does_nothing(self):
+        stdout = StringIO()
+        call_command('create_access_log_partitions', stdout=stdout)
+
+        self.assertIn('The access log is not partitioned.', stdout.getvalue())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'The access log is partitioned only on PostgreSQL (11+).')
+class PartitionedAccessLogArchiveTest(AccessLogArchiveTestMixin, TestCase):
+    def _get_partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                           'WHERE i.inhparent = %s::regclass', (SecuredEntityAccessLog._meta.db_table,))
+            return {name for name, in cursor.fetchall()}
+
+    def _table_exists(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_class WHERE relname = %s', (name,))
+            return cursor.fetchone() is not None
+
+    def _detach_partition(self, period):
+        with connection.cursor() as cursor:
+            cursor.execute('ALTER TABLE {} DETACH PARTITION {}'.format(
+                SecuredEntityAccessLog._meta.db_table, get_partition_name(period)))
+
+    def _count_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM {}'.format(table))
+            return cursor.fetchone()[0]
+
+    def test_access_log_is_partitioned(self):
+        self.assertTrue(is_partitioned())
+        self.assertIn('{}_default'.format(SecuredEntityAccessLog._meta.db_table), self._get_partitions())
+
+    def test_create_partitions_command_creates_upcoming_months(self):
+        stdout = StringIO()
+        call_command('create_access_log_partitions', months_ahead=2, stdout=stdout)
+
+        partitions = self._get_partitions()
+        for period in get_upcoming_periods(2):
+            self.assertIn(get_partition_name(period), partitions)
+
+        call_command('create_access_log_partitions', months_ahead=2, stdout=stdout)
+        self.assertIn('Created 0 partitions.', stdout.getvalue())
+
+    def test_partition_created_later_takes_rows_of_default_partition(self):
+        period = get_next_period(get_upcoming_periods(6)[-1])
+        access_log = self._log_access(period)
+
+        self.assertEqual([period], ensure_partitions([period]))
+
+        self.assertEqual(1, self._count_rows(get_partition_name(period)))
+        self.assertEqual(access_log.pk, SecuredEntityAccessLog.objects.get().pk)
+
+    def test_archive_detaches_and_drops_partition(self):
+        ensure_partitions([self.old_period])
+        self._log_access(self.old_period)
+
+        path, archived = archive_period(self.old_period, self.archive_dir)
+
+        self.assertEqual(1, archived)
+        self.assertEqual(1, len(list(read_archived_period(self.old_period, self.archive_dir))))
+        self.assertFalse(self._table_exists(get_partition_name(self.old_period)))
+        self.assertFalse(SecuredEntityAccessLog.objects.exists())
+
+    def test_archive_includes_rows_of_default_partition(self):
+        ensure_partitions([self.old_period])
+        self._log_access(self.old_period)
+        self._detach_partition(self.old_period)
+        # written after the detach, so it goes to the default partition
+        self._log_access(self.old_period, day=2)
+
+        path, archived = archive_period(self.old_period, self.archive_dir)
+
+        self.assertEqual(2, archived)
+        self.assertFalse(SecuredEntityAccessLog.objects.exists())
+        self.assertFalse(self._table_exists(get_partition_name(self.old_period)))
+
+    def test_access_log_of_default_partition_committed_after_the_read_is_kept(self):
+        ensure_partitions([self.old_period])
+        self._log_access(self.old_period)
+        self._detach_partition(self.old_period)
+        late_access_log = self._log_access(self.old_period, day=2)
+        self._log_access(self.old_period, day=3)
+
+        path, archived = self._archive_without(late_access_log)
+
+        self.assertEqual(2, archived)
+        self.assertEqual([late_access_log.pk], list(SecuredEntityAccessLog.objects.values_list('pk', flat=True)))
+
+    def test_command_archives_partition_left_detached(self):
+        ensure_partitions([self.old_period])
+        self._log_access(self.old_period)
+        self._detach_partition(self.old_period)
+
+        output = self._archive(keep_months=1)
+
+        self.assertIn('Archived 1 access logs of {:%Y-%m}'.format(self.old_period), output)
+        self.assertFalse(self._table_exists(get_partition_name(self.old_period)))
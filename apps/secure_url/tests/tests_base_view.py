@@ -2,11 +2,21 @@ import tempfile
 
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls.base import reverse
 
+from .mixins import TemporaryMediaRootMixin
+from ..access_log import get_access_log_sink
 
-class BaseViewTest(TestCase):
+
+# throttling is tested on its own, other tests make many access attempts from the same address (buckets are kept in
+# the process, so they don't outlive the test run) - access logs are stored in the thread of the test (the test
+# database transaction is not visible to other threads)
+@override_settings(SECURED_ENTITY_ACCESS_LOG_SINK='apps.secure_url.access_log.BufferedAccessLogSink',
+                   SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS={}, SECURED_ENTITY_ACCESS_THROTTLE_RATES={},
+                   SECURED_ENTITY_ACCESS_THROTTLE='apps.secure_url.throttling.LocMemThrottle',
+                   SECURED_ENTITY_ACCESS_THROTTLE_OPTIONS={})
+class BaseViewTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.create_url = reverse('secure_url:secured-entity-create-view')
         self.login_url = reverse('accounts-login')
@@ -20,6 +30,9 @@ class BaseViewTest(TestCase):
             'url': 'https://www.facebook.com/'
         }
 
+    def tearDown(self):
+        get_access_log_sink().flush()
+
     def _get_tmp_file(self):
         tmp_file = tempfile.NamedTemporaryFile(suffix='.jpg')
 
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..management.commands.bench import compare_results, get_percentile
+from ..models import SecuredEntity
+
+
+class BenchCommandTest(TestCase):
+    def _bench(self, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('bench', entities=20, days=3, requests=5, warmup=1, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_bench_reports_every_endpoint_and_rolls_back(self):
+        output, _ = self._bench()
+
+        endpoints = json.loads(output)['endpoints']
+        self.assertEqual({'access', 'create', 'list', 'stats'}, set(endpoints))
+        self.assertEqual({'requests', 'throughput', 'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'max_queries'},
+                         set(endpoints['access']))
+        self.assertFalse(SecuredEntity.objects.exists())
+
+    def test_bench_fails_on_regression_against_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline_path = os.path.join(directory, 'baseline.json')
+            self._bench(output=baseline_path)
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+            baseline['endpoints']['list']['queries'] = 0
+            with open(baseline_path, 'w') as baseline_file:
+                json.dump(baseline, baseline_file)
+
+            with self.assertRaisesMessage(CommandError, 'regressions against'):
+                self._bench(baseline=baseline_path, tolerance=100)
+
+    def test_compare_results_reports_slower_endpoints(self):
+        baseline = {'endpoints': {'list': {'p95_ms': 10, 'throughput': 100, 'queries': 2}}}
+        results = {'endpoints': {'list': {'p95_ms': 13, 'throughput': 90, 'queries': 2}}}
+
+        self.assertEqual([], compare_results(baseline, results, tolerance=0.5))
+        self.assertEqual(['list: p95 latency 13 ms, was 10 ms'], compare_results(baseline, results, tolerance=0.2))
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(50, get_percentile(values, 50))
+        self.assertEqual(99, get_percentile(values, 99))
+        self.assertEqual(1, get_percentile([1], 95))
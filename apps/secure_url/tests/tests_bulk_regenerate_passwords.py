@@ -0,0 +1,53 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from .mixins import TemporaryMediaRootMixin
+from ..bulk import bulk_regenerate_passwords
+from ..models import SecuredEntity
+
+
+class BulkRegeneratePasswordsTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(username='admin', email='admin@example.com',
+                                                              password='123qweasd')
+        for index in range(5):
+            SecuredEntity.objects.create(user=self.user, url='https://example.com/{}'.format(index))
+        self.password_salts = dict(SecuredEntity.objects.values_list('pk', 'password_salt'))
+
+    def _assert_all_regenerated(self):
+        password_salts = dict(SecuredEntity.objects.values_list('pk', 'password_salt'))
+        self.assertEqual(len(self.password_salts), len(set(password_salts.values())))
+        for pk, password_salt in password_salts.items():
+            self.assertNotEqual(self.password_salts[pk], password_salt)
+
+    def test_bulk_regenerate_passwords_walks_all_batches(self):
+        with self.assertNumQueries(7):
+            # 3 batches of 2 (selection and update) and the empty selection at the end
+            self.assertEqual(5, bulk_regenerate_passwords(SecuredEntity.objects.all(), batch_size=2))
+
+        self._assert_all_regenerated()
+
+    def test_bulk_regenerate_passwords_of_files_takes_same_queries_as_links(self):
+        for _ in range(5):
+            SecuredEntity.objects.create(user=self.user, file=SimpleUploadedFile('test.bin', os.urandom(10)))
+
+        # grants of the files carry the password salt fingerprint, nothing is written per secured entity
+        with self.assertNumQueries(11):
+            # 5 batches of 2 (selection and update) and the empty selection at the end
+            self.assertEqual(10, bulk_regenerate_passwords(SecuredEntity.objects.all(), batch_size=2))
+
+    def test_bulk_regenerate_passwords_of_empty_queryset(self):
+        self.assertEqual(0, bulk_regenerate_passwords(SecuredEntity.objects.none()))
+
+    def test_admin_action_regenerates_passwords(self):
+        self.client.login(username='admin', password='123qweasd')
+
+        response = self.client.post(reverse('admin:secure_url_securedentity_changelist'), {
+            'action': 'regenerate_passwords', '_selected_action': list(map(str, self.password_salts))}, follow=True)
+
+        self.assertContains(response, 'Passwords have been regenerated for 5 secured entities.')
+        self._assert_all_regenerated()
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import check_access_throttle, check_entity_cache, check_read_replica_cache
+
+
+class SharedCacheChecksTest(SimpleTestCase):
+    def test_entity_cache_turned_off_passes(self):
+        self.assertListEqual([], check_entity_cache(None))
+
+    @override_settings(SECURED_ENTITY_CACHE='shared')
+    def test_entity_cache_shared_by_workers_passes(self):
+        self.assertListEqual([], check_entity_cache(None))
+
+    @override_settings(SECURED_ENTITY_CACHE='default')
+    def test_entity_cache_of_process_is_refused(self):
+        self.assertListEqual(['secure_url.E002'], [error.id for error in check_entity_cache(None)])
+
+    @override_settings(SECURED_ENTITY_READ_REPLICAS=['replica'])
+    def test_read_replica_cache_shared_by_workers_passes(self):
+        self.assertListEqual([], check_read_replica_cache(None))
+
+    @override_settings(SECURED_ENTITY_READ_REPLICA_CACHE='default')
+    def test_read_replica_cache_of_process_without_replicas_passes(self):
+        self.assertListEqual([], check_read_replica_cache(None))
+
+    @override_settings(SECURED_ENTITY_READ_REPLICAS=['replica'], SECURED_ENTITY_READ_REPLICA_CACHE='default')
+    def test_read_replica_cache_of_process_is_refused(self):
+        self.assertListEqual(['secure_url.E003'], [error.id for error in check_read_replica_cache(None)])
+
+    def test_access_throttle_shared_by_workers_passes(self):
+        self.assertListEqual([], check_access_throttle(None))
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE='apps.secure_url.throttling.LocMemThrottle')
+    def test_access_throttle_of_process_is_refused(self):
+        self.assertListEqual(['secure_url.E004'], [error.id for error in check_access_throttle(None)])
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE='apps.secure_url.throttling.CacheThrottle',
+                       SECURED_ENTITY_ACCESS_THROTTLE_OPTIONS={'cache_alias': 'default'})
+    def test_access_throttle_on_cache_of_process_is_refused(self):
+        self.assertListEqual(['secure_url.E004'], [error.id for error in check_access_throttle(None)])
+
+    @override_settings(DEBUG=True, SECURED_ENTITY_ACCESS_THROTTLE='apps.secure_url.throttling.LocMemThrottle')
+    def test_access_throttle_of_process_in_debug_passes(self):
+        self.assertListEqual([], check_access_throttle(None))
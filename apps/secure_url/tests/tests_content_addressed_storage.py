@@ -0,0 +1,107 @@
+import hashlib
+import os
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+
+from .mixins import TemporaryMediaRootMixin, run_on_commit_callbacks
+from ..constants import SecuredEntityTypes
+from ..models import SecuredEntity, SecuredFileBlob
+
+
+class ContentAddressedStorageTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='test')
+        self.content = os.urandom(100)
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+        self.storage = SecuredEntity._meta.get_field('file').storage
+
+    def _create_secured_entity(self, file_name='test.bin'):
+        return SecuredEntity.objects.create(user=self.user, file=SimpleUploadedFile(file_name, self.content))
+
+    def test_stored_file_is_named_by_its_content_and_keeps_the_file_name(self):
+        secured_entity = self._create_secured_entity()
+
+        self.assertEqual('secure_url/blobs/{}/{}/test.bin'.format(self.sha256[:2], self.sha256),
+                         secured_entity.file.name)
+        with secured_entity.file.open('rb') as file:
+            self.assertEqual(self.content, file.read())
+
+    def test_same_content_is_stored_once(self):
+        first_secured_entity = self._create_secured_entity('first.bin')
+        second_secured_entity = self._create_secured_entity('second.bin')
+
+        self.assertEqual(first_secured_entity.file.path, second_secured_entity.file.path)
+        self.assertEqual(2, SecuredFileBlob.objects.get(pk=self.sha256).references)
+        self.assertEqual('second.bin', os.path.basename(second_secured_entity.file.name))
+
+    def test_deleting_secured_entity_keeps_content_referenced_by_other_one(self):
+        secured_entity = self._create_secured_entity()
+        path = secured_entity.file.path
+        self._create_secured_entity()
+
+        secured_entity.delete()
+
+        self.assertEqual(1, SecuredFileBlob.objects.get(pk=self.sha256).references)
+        self.assertTrue(os.path.exists(path))
+
+    def test_deleting_last_secured_entity_removes_content(self):
+        secured_entity = self._create_secured_entity()
+        path = secured_entity.file.path
+
+        with run_on_commit_callbacks():
+            secured_entity.delete()
+
+        self.assertFalse(SecuredFileBlob.objects.filter(pk=self.sha256).exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_deleting_last_secured_entity_keeps_content_until_commit(self):
+        secured_entity = self._create_secured_entity()
+        path = secured_entity.file.path
+
+        with run_on_commit_callbacks():
+            with transaction.atomic():
+                secured_entity.delete()
+                self.assertTrue(os.path.exists(path))
+
+        self.assertFalse(os.path.exists(path))
+
+    def test_deleting_last_secured_entity_in_rolled_back_transaction_keeps_content(self):
+        secured_entity = self._create_secured_entity()
+        path = secured_entity.file.path
+
+        with run_on_commit_callbacks():
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    SecuredEntity.objects.get(pk=secured_entity.pk).delete()
+                    raise RuntimeError()
+
+        self.assertEqual(1, SecuredFileBlob.objects.get(pk=self.sha256).references)
+        self.assertTrue(os.path.exists(path))
+        with SecuredEntity.objects.get(pk=secured_entity.pk).file.open('rb') as file:
+            self.assertEqual(self.content, file.read())
+
+    def test_reference_of_unknown_content_raises_file_not_found(self):
+        with self.assertRaises(FileNotFoundError):
+            self.storage.reference(self.sha256, 'test.bin')
+
+    def test_deduplicate_secured_files_moves_files_into_content_addressed_storage(self):
+        legacy_storage = FileSystemStorage()
+        names = [legacy_storage.save('secure_url/files/test.bin', ContentFile(self.content)) for _ in range(2)]
+        for name in names:
+            secured_entity = SecuredEntity.objects.create(user=self.user, url='https://example.com/')
+            SecuredEntity.objects.filter(pk=secured_entity.pk).update(
+                url=None, file=name, type=SecuredEntityTypes.FILE)
+
+        out = StringIO()
+        call_command('deduplicate_secured_files', stdout=out)
+
+        self.assertIn('Moved 2 files, freed 100 bytes', out.getvalue())
+        self.assertEqual(2, SecuredFileBlob.objects.get(pk=self.sha256).references)
+        self.assertFalse(any(os.path.exists(self.storage.path(name)) for name in names))
@@ -0,0 +1,61 @@
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls.base import reverse
+
+from .tests_base_view import BaseViewTest
+from ..db_router import use_read_replica
+from ..models import SecuredEntity
+
+
+@override_settings(SECURED_ENTITY_READ_REPLICAS=['replica'])
+class ReadReplicaRouterTest(BaseViewTest):
+    # `replica` is a separate test database, so rows written to `default` only stand in for not yet replicated ones
+    multi_db = True
+
+    def setUp(self):
+        super().setUp()
+
+        self.user.save(using='replica')
+        self.secured_entity = SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        caches['shared'].clear()
+
+    def test_reads_outside_of_use_read_replica_go_to_default(self):
+        self.assertTrue(SecuredEntity.objects.filter(pk=self.secured_entity.pk).exists())
+
+    def test_reads_inside_of_use_read_replica_go_to_replica(self):
+        with use_read_replica(self.user):
+            self.assertFalse(SecuredEntity.objects.filter(pk=self.secured_entity.pk).exists())
+
+    def test_database_cache_inside_of_use_read_replica_is_read_from_default(self):
+        caches['shared'].set('key', 'value')
+
+        with use_read_replica(self.user):
+            self.assertEqual('value', caches['shared'].get('key'))
+
+    def test_instance_read_from_replica_is_saved_to_default(self):
+        SecuredEntity.objects.using('replica').bulk_create([SecuredEntity(**SecuredEntity.objects.filter(
+            pk=self.secured_entity.pk).values()[0])])
+        with use_read_replica(self.user):
+            secured_entity = SecuredEntity.objects.get(pk=self.secured_entity.pk)
+
+        secured_entity.regenerate_password()
+
+        self.assertEqual(secured_entity.password_salt,
+                         SecuredEntity.objects.using('default').get(pk=self.secured_entity.pk).password_salt)
+        self.assertNotEqual(secured_entity.password_salt,
+                            SecuredEntity.objects.using('replica').get(pk=self.secured_entity.pk).password_salt)
+
+    def test_list_view_reads_from_replica(self):
+        self._login_user()
+
+        response = self.client.get(reverse('secure_url:secured-entity-list-view'))
+
+        self.assertListEqual([], list(response.context['object_list']))
+
+    def test_list_view_after_create_reads_own_writes(self):
+        self._login_user()
+        self.client.post(reverse('secure_url:secured-entity-create-view'), self.data_with_url)
+
+        response = self.client.get(reverse('secure_url:secured-entity-list-view'))
+
+        self.assertEqual(2, len(response.context['object_list']))
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from ..bulk import bulk_regenerate_passwords
+from ..entity_cache import get_entity_cache, get_secured_entity_or_404
+from ..models import SecuredEntity
+
+
+@override_settings(CACHES=dict(settings.CACHES, default={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                                         'LOCATION': 'entity-cache-tests'}),
+                   SECURED_ENTITY_CACHE='default', SECURED_ENTITY_CACHE_OPTIONS={'stats_flush_interval': 1})
+class SecuredEntityCacheTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='test')
+        self.secured_entity = SecuredEntity.objects.create(user=self.user, url='https://example.com/')
+        get_entity_cache().cache.clear()
+
+    def test_cached_secured_entity_is_read_without_queries(self):
+        get_secured_entity_or_404(self.secured_entity.pk)
+
+        with self.assertNumQueries(0):
+            secured_entity = get_secured_entity_or_404(self.secured_entity.pk)
+
+        self.assertEqual(self.secured_entity.password, secured_entity.password)
+        self.assertEqual(self.secured_entity.expires_at, secured_entity.expires_at)
+        self.assertEqual(self.user.pk, secured_entity.user_id)
+
+    def test_regenerated_password_is_never_read_stale(self):
+        get_secured_entity_or_404(self.secured_entity.pk)
+
+        self.secured_entity.regenerate_password()
+
+        self.assertEqual(self.secured_entity.password, get_secured_entity_or_404(self.secured_entity.pk).password)
+
+    def test_bulk_regenerated_password_is_never_read_stale(self):
+        get_secured_entity_or_404(self.secured_entity.pk)
+
+        bulk_regenerate_passwords(SecuredEntity.objects.all())
+
+        self.assertEqual(SecuredEntity.objects.get(pk=self.secured_entity.pk).password,
+                         get_secured_entity_or_404(self.secured_entity.pk).password)
+
+    def test_deleted_secured_entity_is_not_found(self):
+        get_secured_entity_or_404(self.secured_entity.pk)
+
+        self.secured_entity.delete()
+
+        with self.assertRaises(Http404):
+            get_secured_entity_or_404(self.secured_entity.pk)
+
+    def test_secured_entity_of_other_user_is_not_found(self):
+        with self.assertRaises(Http404):
+            get_secured_entity_or_404(self.secured_entity.pk,
+                                      user=get_user_model().objects.create_user(username='other'))
+
+    def test_evicted_version_does_not_read_older_record(self):
+        get_secured_entity_or_404(self.secured_entity.pk)
+        SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(url='https://example.com/changed')
+        get_entity_cache().cache.delete('secure_url.entity.version.{}'.format(self.secured_entity.pk))
+
+        self.assertEqual('https://example.com/changed', get_secured_entity_or_404(self.secured_entity.pk).url)
+
+    def test_stats_count_hits_and_misses(self):
+        for _ in range(4):
+            get_secured_entity_or_404(self.secured_entity.pk)
+
+        self.assertEqual({'hits': 3, 'misses': 1, 'hit_ratio': 0.75}, get_entity_cache().get_stats())
+
+    @override_settings(SECURED_ENTITY_CACHE=None)
+    def test_secured_entity_is_read_from_database_without_cache(self):
+        get_secured_entity_or_404(self.secured_entity.pk)
+
+        with self.assertNumQueries(1):
+            get_secured_entity_or_404(self.secured_entity.pk)
@@ -0,0 +1,27 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import SecuredEntity
+
+
+class ExplainQueriesCommandTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='test', password='123qweasd')
+
+    def test_explain_queries_without_data(self):
+        stdout = StringIO()
+
+        call_command('explain_queries', stdout=stdout)
+
+        self.assertIn('There are no secured entities', stdout.getvalue())
+
+    def test_explain_queries_uses_list_index(self):
+        SecuredEntity.objects.create(user=self.user, url='https://www.facebook.com/')
+        stdout = StringIO()
+
+        call_command('explain_queries', repeat=1, stdout=stdout)
+
+        self.assertIn('secure_url__user_id_bcd1ae_idx', stdout.getvalue())
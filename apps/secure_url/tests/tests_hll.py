@@ -0,0 +1,43 @@
+import uuid
+
+from django.test import SimpleTestCase
+
+from ..hll import HyperLogLog
+
+
+class HyperLogLogTest(SimpleTestCase):
+    def _get_sketch(self, values):
+        sketch = HyperLogLog()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def test_empty_sketch_counts_zero(self):
+        self.assertEqual(0, HyperLogLog().count())
+
+    def test_duplicates_are_counted_once(self):
+        sketch = self._get_sketch(['a', 'b', 'a', 'b', 'a'])
+
+        self.assertEqual(2, sketch.count())
+
+    def test_estimate_is_within_error_bound(self):
+        sketch = self._get_sketch(uuid.uuid4().bytes for _ in range(100000))
+
+        # 4 standard errors of the default precision
+        self.assertAlmostEqual(100000, sketch.count(), delta=100000 * 0.065)
+
+    def test_merged_sketch_counts_union(self):
+        values = [uuid.uuid4().bytes for _ in range(3000)]
+
+        sketch = self._get_sketch(values[:2000]).merge(self._get_sketch(values[1000:]))
+
+        self.assertAlmostEqual(3000, sketch.count(), delta=3000 * 0.065)
+
+    def test_sketch_survives_serialization(self):
+        sketch = self._get_sketch(str(value) for value in range(1000))
+
+        self.assertEqual(sketch.count(), HyperLogLog.from_bytes(sketch.to_bytes()).count())
+
+    def test_sketches_of_different_precision_cannot_be_merged(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(10))
@@ -0,0 +1,114 @@
+import os
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .mixins import TemporaryMediaRootMixin, run_on_commit_callbacks
+from ..models import SecuredEntity, SecuredEntityAccessLog, SecuredEntityDailyStats, SecuredEntityDailyVisit, \
+    SecuredEntityUpload, SecuredFileBlob
+from ..stats import record_daily_visits
+from ..uploads import start_upload
+
+
+class ReapExpiredSecuredEntitiesCommandTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='test')
+        self.expired = timezone.now() - timedelta(hours=1)
+
+    def _create_secured_entity(self, expires_at=None, **kwargs):
+        secured_entity = SecuredEntity.objects.create(user=self.user, expires_at=expires_at,
+                                                      **(kwargs or {'url': 'https://example.com/'}))
+
+        SecuredEntityAccessLog.objects.bulk_create([SecuredEntityAccessLog(secured_entity=secured_entity)
+                                                    for _ in range(3)])
+        record_daily_visits([(timezone.now().date(), secured_entity.pk, secured_entity.type)])
+        return secured_entity
+
+    def _reap(self, **options):
+        stdout = StringIO()
+        call_command('reap_expired_secured_entities', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_reap_deletes_expired_secured_entities_with_access_logs(self):
+        expired_secured_entity = self._create_secured_entity(self.expired)
+        accessible_secured_entity = self._create_secured_entity()
+
+        output = self._reap()
+
+        self.assertIn('Deleted 1 secured entities and 3 access logs', output)
+        self.assertEqual([accessible_secured_entity.pk], list(SecuredEntity.objects.values_list('pk', flat=True)))
+        self.assertFalse(SecuredEntityAccessLog.objects.filter(secured_entity_id=expired_secured_entity.pk).exists())
+        self.assertFalse(SecuredEntityDailyVisit.objects.filter(secured_entity_id=expired_secured_entity.pk).exists())
+        self.assertEqual(3, SecuredEntityAccessLog.objects.count())
+
+    def test_reap_keeps_daily_stats(self):
+        self._create_secured_entity(self.expired)
+
+        self._reap()
+
+        self.assertEqual(1, SecuredEntityDailyStats.objects.get().visits)
+
+    def test_reap_deletes_files_of_expired_secured_entities(self):
+        secured_entity = self._create_secured_entity(self.expired,
+                                                     file=SimpleUploadedFile('test.bin', os.urandom(10)))
+        path = secured_entity.file.path
+
+        with run_on_commit_callbacks():
+            self._reap()
+
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(SecuredFileBlob.objects.exists())
+
+    def test_reap_deletes_in_batches(self):
+        for _ in range(3):
+            self._create_secured_entity(self.expired)
+
+        output = self._reap(batch_size=2, log_batch_size=2, verbosity=2)
+
+        self.assertIn('Deleted 2 secured entities, 6 access logs.', output)
+        self.assertIn('Deleted 1 secured entities, 3 access logs.', output)
+        self.assertFalse(SecuredEntity.objects.exists())
+
+    def test_reap_keeps_secured_entities_within_grace_days(self):
+        self._create_secured_entity(self.expired)
+
+        self._reap(grace_days=1)
+
+        self.assertTrue(SecuredEntity.objects.exists())
+
+    def test_reap_dry_run_does_not_delete(self):
+        self._create_secured_entity(self.expired, file=SimpleUploadedFile('test.bin', os.urandom(10)))
+        self._create_secured_entity()
+
+        output = self._reap(dry_run=True)
+
+        self.assertIn('Would delete 1 secured entities, 3 access logs and 1 files.', output)
+        self.assertEqual(2, SecuredEntity.objects.count())
+        self.assertEqual(6, SecuredEntityAccessLog.objects.count())
+
+    def test_reap_deletes_abandoned_uploads_with_their_files(self):
+        abandoned_upload = start_upload(self.user, 'abandoned.bin', 10)
+        SecuredEntityUpload.objects.filter(pk=abandoned_upload.pk).update(updated=timezone.now() - timedelta(days=2))
+        active_upload = start_upload(self.user, 'active.bin', 10)
+        self.addCleanup(active_upload.file.delete, save=False)
+
+        output = self._reap()
+
+        self.assertIn('Deleted 1 abandoned uploads.', output)
+        self.assertEqual([active_upload.pk], list(SecuredEntityUpload.objects.values_list('pk', flat=True)))
+        self.assertFalse(os.path.exists(abandoned_upload.file.path))
+        self.assertTrue(os.path.exists(active_upload.file.path))
+
+    def test_reap_dry_run_counts_abandoned_uploads(self):
+        upload = start_upload(self.user, 'abandoned.bin', 10)
+        SecuredEntityUpload.objects.filter(pk=upload.pk).update(updated=timezone.now() - timedelta(days=2))
+
+        output = self._reap(dry_run=True)
+
+        self.assertIn('Would delete 1 abandoned uploads.', output)
+        self.assertTrue(SecuredEntityUpload.objects.exists())
@@ -1,6 +1,6 @@
 from rest_framework import status
+from django.test import override_settings
 from django.urls.base import reverse
-from django.conf import settings
 from datetime import timedelta
 from .tests_base_view import BaseViewTest
 from ..models import SecuredEntity
@@ -83,7 +83,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -95,7 +95,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -107,7 +107,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -119,7 +119,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.get(self.access_url)
 
@@ -167,8 +167,8 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
 
-        self.assertIn(settings.MEDIA_URL, response['Location'])
-        self.assertIn(self.tmp_file.name.split('/')[-1], response['Location'])
+        self.assertIn('{}?grant='.format(reverse('secure_url:secured-entity-download-view',
+                                                 args=(self.secured_entity.pk,))), response['Location'])
 
 
     def test_access_secured_entity_from_file_correct_password_just_before_deadline_results_in_302__authorized(self):
@@ -176,7 +176,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -188,20 +188,20 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
 
-        self.assertIn(settings.MEDIA_URL, response['Location'])
-        self.assertIn(self.tmp_file.name.split('/')[-1], response['Location'])
+        self.assertIn('{}?grant='.format(reverse('secure_url:secured-entity-download-view',
+                                                 args=(self.secured_entity.pk,))), response['Location'])
 
     def test_access_secured_entity_from_file_correct_password_just_after_deadline_returns_correct_response__authorized(self):
         self._create_secured_entity_from_file()
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -213,7 +213,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._login_user()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.get(self.access_url)
 
@@ -263,7 +263,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -274,7 +274,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -285,7 +285,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -296,7 +296,7 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._create_secured_entity_from_url()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.get(self.access_url)
 
@@ -339,15 +339,15 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
 
-        self.assertIn(settings.MEDIA_URL, response['Location'])
-        self.assertIn(self.tmp_file.name.split('/')[-1], response['Location'])
+        self.assertIn('{}?grant='.format(reverse('secure_url:secured-entity-download-view',
+                                                 args=(self.secured_entity.pk,))), response['Location'])
 
 
     def test_access_secured_entity_from_file_correct_password_just_before_deadline_results_in_302__unauthorized(self):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -358,19 +358,19 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=self.secured_entity.created + timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
 
-        self.assertIn(settings.MEDIA_URL, response['Location'])
-        self.assertIn(self.tmp_file.name.split('/')[-1], response['Location'])
+        self.assertIn('{}?grant='.format(reverse('secure_url:secured-entity-download-view',
+                                                 args=(self.secured_entity.pk,))), response['Location'])
 
     def test_access_secured_entity_from_file_correct_password_just_after_deadline_returns_correct_response__unauthorized(self):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.post(self.access_url, {'id': self.secured_entity.pk,
                                                       'password': self.secured_entity.password})
@@ -381,8 +381,48 @@ class SecuredEntityAccessViewTest(BaseViewTest):
         self._create_secured_entity_from_file()
 
         SecuredEntity.objects.filter(pk=self.secured_entity.pk).update(
-            created=self.secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=self.secured_entity.created - timedelta(seconds=1))
 
         response = self.client.get(self.access_url)
 
         self.assertContains(response, 'Sorry, this secured entity is no longer available')
+
+    def test_access_secured_entity_from_url_correct_password_executes_one_query__unauthorized(self):
+        self._create_secured_entity_from_url()
+
+        # one narrow SELECT of the secured entity, the access log is only enqueued
+        with self.assertNumQueries(1):
+            self.client.post(self.access_url, {'password': self.secured_entity.password})
+
+    def test_access_secured_entity_from_url_wrong_password_executes_one_query__unauthorized(self):
+        self._create_secured_entity_from_url()
+
+        with self.assertNumQueries(1):
+            self.client.post(self.access_url, {'password': 'xxx'})
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_RATES={'secured_entity': (2, 60)})
+    def test_access_secured_entity_is_throttled_without_database_queries(self):
+        self._create_secured_entity_from_url()
+
+        for _ in range(2):
+            self.assertEqual(status.HTTP_200_OK, self.client.post(self.access_url, {'password': 'wrong'}).status_code)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.access_url, {'password': self.secured_entity.password})
+
+        self.assertEqual(status.HTTP_429_TOO_MANY_REQUESTS, response.status_code)
+        self.assertEqual('30', response['Retry-After'])
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_RATES={'secured_entity': (1, 60)})
+    def test_access_secured_entity_with_correct_password_is_not_throttled(self):
+        self._create_secured_entity_from_url()
+
+        for _ in range(3):
+            response = self.client.post(self.access_url, {'password': self.secured_entity.password})
+            self.assertEqual(status.HTTP_302_FOUND, response.status_code)
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_RATES={'secured_entity': (1, 60)})
+    def test_access_secured_entity_form_is_not_throttled(self):
+        self._create_secured_entity_from_url()
+
+        for _ in range(2):
+            self.assertEqual(status.HTTP_200_OK, self.client.get(self.access_url).status_code)
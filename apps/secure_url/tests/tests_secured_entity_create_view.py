@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import status
 
 from .tests_base_view import BaseViewTest
@@ -129,3 +132,20 @@ class SecuredEntityCreateViewTest(BaseViewTest):
             response = self.client.post(self.create_url, dict(self.data_with_url, file=file))
 
         self.assertContains(response, 'You cannot provide both url or file.')
+
+    def test_create_secured_entity_with_accessible_time_sets_expires_at(self):
+        self._login_user()
+        before = timezone.now()
+
+        self.client.post(self.create_url, dict(self.data_with_url, accessible_time='2 00:00:00'))
+
+        expires_at = SecuredEntity.objects.get().expires_at
+        self.assertTrue(before + timedelta(days=2) <= expires_at <= timezone.now() + timedelta(days=2))
+
+    def test_create_secured_entity_with_accessible_time_out_of_bounds_returns_correct_response(self):
+        self._login_user()
+
+        response = self.client.post(self.create_url, dict(self.data_with_url, accessible_time='30 00:00:00'))
+
+        self.assertContains(response, 'Secured entity can be accessible from 1:00:00 to 7 days, 0:00:00.')
+        self.assertFalse(SecuredEntity.objects.exists())
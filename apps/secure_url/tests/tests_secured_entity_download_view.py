@@ -0,0 +1,202 @@
+import hashlib
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls.base import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from .tests_base_view import BaseViewTest
+from ..bulk import bulk_regenerate_passwords
+from ..entity_cache import get_entity_cache
+from ..models import SecuredEntity
+
+# the grants are compared with the secured entities cached here
+ENTITY_CACHE_SETTINGS = {
+    'CACHES': dict(settings.CACHES, default={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                             'LOCATION': 'download-view-tests'}),
+    'SECURED_ENTITY_CACHE': 'default',
+}
+
+
+class SecuredEntityDownloadViewTest(BaseViewTest):
+    def setUp(self):
+        super().setUp()
+
+        self.content = b'0123456789' * 10
+        self.secured_entity = SecuredEntity.objects.create(user=self.user,
+                                                           file=SimpleUploadedFile('test.txt', self.content))
+        self.download_url = self.secured_entity.get_redirect_url()
+
+    def _get_content(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_download_secured_entity_returns_whole_file(self):
+        response = self.client.get(self.download_url)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(self.content, self._get_content(response))
+        self.assertEqual(str(len(self.content)), response['Content-Length'])
+        self.assertEqual('bytes', response['Accept-Ranges'])
+
+    def test_download_secured_entity_sends_file_as_attachment(self):
+        response = self.client.get(self.download_url)
+        self._get_content(response)
+
+        self.assertEqual('text/plain', response['Content-Type'])
+        self.assertTrue(response['Content-Disposition'].startswith('attachment;'))
+
+    def test_download_secured_entity_returns_requested_range(self):
+        response = self.client.get(self.download_url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(status.HTTP_206_PARTIAL_CONTENT, response.status_code)
+        self.assertEqual(self.content[10:20], self._get_content(response))
+        self.assertEqual('bytes 10-19/100', response['Content-Range'])
+        self.assertEqual('10', response['Content-Length'])
+
+    def test_download_secured_entity_returns_requested_suffix_range(self):
+        response = self.client.get(self.download_url, HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(status.HTTP_206_PARTIAL_CONTENT, response.status_code)
+        self.assertEqual(self.content[-5:], self._get_content(response))
+
+    def test_download_secured_entity_with_unsatisfiable_range_results_in_416(self):
+        response = self.client.get(self.download_url, HTTP_RANGE='bytes=1000-')
+
+        self.assertEqual(status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, response.status_code)
+        self.assertEqual('bytes */100', response['Content-Range'])
+
+    def test_download_secured_entity_with_matching_if_range_returns_requested_range(self):
+        etag = self.client.get(self.download_url)['ETag']
+
+        response = self.client.get(self.download_url, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE=etag)
+
+        self.assertEqual(status.HTTP_206_PARTIAL_CONTENT, response.status_code)
+        self.assertEqual(self.content[10:], self._get_content(response))
+
+    def test_download_secured_entity_with_changed_if_range_returns_whole_file(self):
+        response = self.client.get(self.download_url, HTTP_RANGE='bytes=10-', HTTP_IF_RANGE='"changed"')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(self.content, self._get_content(response))
+
+    def test_download_secured_entity_without_grant_results_in_403(self):
+        response = self.client.get(reverse('secure_url:secured-entity-download-view', args=(self.secured_entity.pk,)))
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    @override_settings(**ENTITY_CACHE_SETTINGS)
+    def test_download_secured_entity_after_password_regeneration_results_in_403(self):
+        self.secured_entity.regenerate_password()
+
+        response = self.client.get(self.download_url)
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_download_secured_entity_after_password_regeneration_without_entity_cache_until_grant_ttl(self):
+        self.secured_entity.regenerate_password()
+
+        response = self.client.get(self.download_url)
+        self.assertEqual(self.content, self._get_content(response))
+
+        with mock.patch('time.time', return_value=time.time() + settings.SECURED_ENTITY_DOWNLOAD_GRANT_TTL.seconds + 1):
+            response = self.client.get(self.download_url)
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_download_secured_entity_after_deadline_results_in_403(self):
+        # grants are not valid longer than the secured entity is accessible
+        self.secured_entity.expires_at = timezone.now() + timedelta(seconds=1)
+        download_url = self.secured_entity.get_redirect_url()
+
+        with mock.patch('time.time', return_value=time.time() + 2):
+            response = self.client.get(download_url)
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    @override_settings(SECURED_ENTITY_DOWNLOAD_GRANT_TTL=timedelta(seconds=1))
+    def test_download_secured_entity_after_grant_ttl_results_in_403(self):
+        download_url = self.secured_entity.get_redirect_url()
+
+        with mock.patch('time.time', return_value=time.time() + 2):
+            response = self.client.get(download_url)
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_download_secured_entity_does_not_query_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.download_url)
+
+        self.assertEqual(self.content, self._get_content(response))
+
+    @override_settings(**ENTITY_CACHE_SETTINGS)
+    def test_download_secured_entity_with_entity_cache_does_not_query_database(self):
+        # the secured entity was cached by the access, which issued the grant
+        get_entity_cache().get(self.secured_entity.pk)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.download_url)
+
+        self.assertEqual(self.content, self._get_content(response))
+
+    def test_download_secured_entity_with_grant_of_other_secured_entity_results_in_403(self):
+        other_secured_entity = SecuredEntity.objects.create(user=self.user,
+                                                            file=SimpleUploadedFile('other.txt', self.content))
+
+        response = self.client.get('{}?{}'.format(
+            reverse('secure_url:secured-entity-download-view', args=(other_secured_entity.pk,)),
+            self.download_url.split('?')[1]))
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_download_secured_entity_with_tampered_grant_results_in_403(self):
+        response = self.client.get('{}x'.format(self.download_url))
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    @override_settings(**ENTITY_CACHE_SETTINGS)
+    def test_download_secured_entity_after_bulk_password_regeneration_results_in_403(self):
+        bulk_regenerate_passwords(SecuredEntity.objects.filter(pk=self.secured_entity.pk))
+
+        response = self.client.get(self.download_url)
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_download_secured_entity_with_grant_issued_after_password_regeneration(self):
+        self.secured_entity.regenerate_password()
+
+        response = self.client.get(self.secured_entity.get_redirect_url())
+
+        self.assertEqual(self.content, self._get_content(response))
+
+    @override_settings(**ENTITY_CACHE_SETTINGS)
+    def test_download_deleted_secured_entity_results_in_403(self):
+        # the content is still stored for the other secured entity
+        SecuredEntity.objects.create(user=self.user, file=SimpleUploadedFile('test.txt', self.content))
+        self.secured_entity.delete()
+
+        response = self.client.get(self.download_url)
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    @override_settings(SECURED_ENTITY_FILE_DELIVERY='apps.secure_url.delivery.XAccelRedirectFileDelivery',
+                       SECURED_ENTITY_FILE_DELIVERY_OPTIONS={'internal_prefix': '/protected-media/'})
+    def test_download_secured_entity_with_x_accel_redirect_delegates_to_nginx(self):
+        sha256 = hashlib.sha256(self.content).hexdigest()
+
+        response = self.client.get(self.download_url)
+
+        self.assertEqual('/protected-media/secure_url/blobs/{}/{}'.format(sha256[:2], sha256),
+                         response['X-Accel-Redirect'])
+        self.assertEqual(b'', response.content)
+
+    @override_settings(SECURED_ENTITY_FILE_DELIVERY='apps.secure_url.delivery.XSendfileFileDelivery')
+    def test_download_secured_entity_with_x_sendfile_delegates_to_web_server(self):
+        response = self.client.get(self.download_url)
+
+        self.assertEqual(self.secured_entity.file.path, response['X-Sendfile'])
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+from django.urls.base import reverse
+from rest_framework import status
+
+from .tests_base_view import BaseViewTest
+from ..models import SecuredEntity
+
+
+@override_settings(SECURED_ENTITY_LIST_PAGE_SIZE=2)
+class SecuredEntityListViewTest(BaseViewTest):
+    def setUp(self):
+        super().setUp()
+
+        self.list_url = reverse('secure_url:secured-entity-list-view')
+        for _ in range(3):
+            SecuredEntity.objects.create(user=self.user, url=self.data_with_url['url'])
+        self.expected_ids = list(SecuredEntity.objects.order_by('-created', '-id').values_list('pk', flat=True))
+
+        self._login_user()
+
+    def test_list_secured_entities_shows_first_page(self):
+        response = self.client.get(self.list_url)
+
+        self.assertListEqual(self.expected_ids[:2], [item.pk for item in response.context['object_list']])
+        self.assertContains(response, 'Next page')
+
+    def test_list_secured_entities_shows_next_page(self):
+        response = self.client.get(self.list_url)
+        response = self.client.get(self.list_url, {'cursor': response.context['next_cursor']})
+
+        self.assertListEqual(self.expected_ids[2:], [item.pk for item in response.context['object_list']])
+        self.assertNotContains(response, 'Next page')
+
+    def test_list_secured_entities_with_invalid_cursor_results_in_404(self):
+        response = self.client.get(self.list_url, {'cursor': 'xxx'})
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_list_accessible_secured_entities(self):
+        SecuredEntity.objects.filter(pk=self.expected_ids[0]).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        accessible_response = self.client.get(self.list_url, {'accessible': '1'})
+        expired_response = self.client.get(self.list_url, {'accessible': '0'})
+
+        self.assertListEqual(self.expected_ids[1:], [item.pk for item in accessible_response.context['object_list']])
+        self.assertListEqual(self.expected_ids[:1], [item.pk for item in expired_response.context['object_list']])
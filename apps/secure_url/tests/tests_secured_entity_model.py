@@ -1,7 +1,6 @@
 import tempfile
 from datetime import timedelta
 
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls.base import reverse
@@ -62,7 +61,7 @@ class SecuredEntityModelTest(TestCase):
         secured_entity.save()
 
         SecuredEntity.objects.filter(pk=secured_entity.pk).update(
-            created=secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=secured_entity.created + timedelta(seconds=1))
 
         secured_entity = SecuredEntity.objects.get(pk=secured_entity.pk)
 
@@ -74,7 +73,7 @@ class SecuredEntityModelTest(TestCase):
         secured_entity.save()
 
         SecuredEntity.objects.filter(pk=secured_entity.pk).update(
-            created=secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=secured_entity.created - timedelta(seconds=1))
 
         secured_entity = SecuredEntity.objects.get(pk=secured_entity.pk)
 
@@ -147,7 +146,7 @@ class SecuredEntityModelTest(TestCase):
         secured_entity.save()
 
         SecuredEntity.objects.filter(pk=secured_entity.pk).update(
-            created=secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME + timedelta(seconds=1))
+            expires_at=secured_entity.created + timedelta(seconds=1))
 
         secured_entity = SecuredEntity.objects.get(pk=secured_entity.pk)
 
@@ -159,7 +158,7 @@ class SecuredEntityModelTest(TestCase):
         secured_entity.save()
 
         SecuredEntity.objects.filter(pk=secured_entity.pk).update(
-            created=secured_entity.created - settings.SECURED_ENTITY_ACCESSIBLE_TIME - timedelta(seconds=1))
+            expires_at=secured_entity.created - timedelta(seconds=1))
 
         secured_entity = SecuredEntity.objects.get(pk=secured_entity.pk)
 
@@ -178,8 +177,8 @@ class SecuredEntityModelTest(TestCase):
                                        file=self.tmp_file.name)
         secured_entity.save()
 
-        self.assertEqual(secured_entity.get_redirect_url(),
-                         '{}{}'.format(settings.MEDIA_URL.rstrip('/'), self.tmp_file.name))
+        self.assertTrue(secured_entity.get_redirect_url().startswith('{}?grant='.format(
+            reverse('secure_url:secured-entity-download-view', args=(secured_entity.pk,)))))
 
     def test_new_model_instance_regenerates_password_properly__file(self):
         secured_entity = SecuredEntity(user=self.user,
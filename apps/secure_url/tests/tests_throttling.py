@@ -0,0 +1,123 @@
+import os
+import tempfile
+import time
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..throttling import CacheThrottle, FileThrottle, LocMemThrottle, get_client_ip
+
+
+class ThrottleTestMixin:
+    def _get_throttle(self):
+        raise NotImplementedError
+
+    def test_throttle_allows_burst_of_capacity(self):
+        throttle = self._get_throttle()
+
+        self.assertEqual([0, 0, 0], [throttle.consume('key', 3, 60, now=100) for _ in range(3)])
+        self.assertEqual(20, throttle.consume('key', 3, 60, now=100))
+
+    def test_throttle_refills_over_period(self):
+        throttle = self._get_throttle()
+        for _ in range(3):
+            throttle.consume('key', 3, 60, now=100)
+
+        self.assertAlmostEqual(10, throttle.consume('key', 3, 60, now=110))
+        self.assertEqual(0, throttle.consume('key', 3, 60, now=120))
+        self.assertEqual(0, throttle.consume('key', 3, 60, now=1000))
+        self.assertEqual(0, throttle.consume('key', 3, 60, now=1000))
+
+    def test_throttle_peek_does_not_take_token(self):
+        throttle = self._get_throttle()
+
+        self.assertEqual([0, 0], [throttle.peek('key', 1, 60, now=100) for _ in range(2)])
+        throttle.consume('key', 1, 60, now=100)
+        self.assertEqual(60, throttle.peek('key', 1, 60, now=100))
+        self.assertAlmostEqual(30, throttle.peek('key', 1, 60, now=130))
+
+    def test_throttle_keeps_buckets_of_keys_apart(self):
+        throttle = self._get_throttle()
+        throttle.consume('key', 1, 60, now=100)
+
+        self.assertEqual(0, throttle.consume('other-key', 1, 60, now=100))
+        self.assertEqual(60, throttle.consume('key', 1, 60, now=100))
+
+
+class LocMemThrottleTest(ThrottleTestMixin, SimpleTestCase):
+    def _get_throttle(self):
+        return LocMemThrottle()
+
+    def test_throttle_forgets_least_recently_used_buckets(self):
+        throttle = LocMemThrottle(max_keys=2)
+        for key in ('a', 'b', 'a', 'c'):
+            throttle.consume(key, 1, 60, now=100)
+
+        self.assertEqual(0, throttle.consume('b', 1, 60, now=100))
+        self.assertEqual(60, throttle.consume('c', 1, 60, now=100))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'throttle-tests'}})
+class CacheThrottleTest(ThrottleTestMixin, SimpleTestCase):
+    def _get_throttle(self):
+        return CacheThrottle(key_prefix=self.id())
+
+
+class FileThrottleTest(ThrottleTestMixin, SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _get_throttle(self):
+        return FileThrottle(self.directory.name)
+
+    def test_throttle_shares_buckets_between_instances(self):
+        self._get_throttle().consume('key', 1, 60, now=100)
+
+        self.assertEqual(60, self._get_throttle().consume('key', 1, 60, now=100))
+
+    def _age_bucket(self, throttle, key, seconds):
+        path = throttle._get_path(key)
+        updated = time.time() - seconds
+        os.utime(path, (updated, updated))
+        return path
+
+    def test_prune_deletes_only_full_buckets(self):
+        throttle = self._get_throttle()
+        throttle.consume('old', 1, 60)
+        throttle.consume('new', 1, 60)
+        old_path = self._age_bucket(throttle, 'old', 61)
+
+        self.assertEqual(1, throttle.prune(60))
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(throttle._get_path('new')))
+        self.assertEqual(0, throttle.consume('old', 1, 60))
+
+    def test_writes_prune_old_buckets(self):
+        throttle = FileThrottle(self.directory.name, prune_every=1)
+        throttle.consume('old', 1, 60)
+        old_path = self._age_bucket(throttle, 'old', 61)
+
+        # every write prunes the next subdirectory
+        for _ in range(256):
+            throttle.consume('new', 1, 60)
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(throttle._get_path('new')))
+
+
+class ClientIpTest(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1',
+                                            HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 3.3.3.3')
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_NUM_PROXIES=0)
+    def test_client_ip_is_remote_address_without_proxies(self):
+        self.assertEqual('10.0.0.1', get_client_ip(self.request))
+
+    @override_settings(SECURED_ENTITY_ACCESS_THROTTLE_NUM_PROXIES=2)
+    def test_client_ip_is_taken_from_entry_of_outermost_proxy(self):
+        self.assertEqual('2.2.2.2', get_client_ip(self.request))
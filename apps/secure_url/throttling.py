@@ -0,0 +1,252 @@
+import fcntl
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class TokenBucketThrottle:
+    """
+    Base class of token bucket throttles. A bucket holds up to `capacity` tokens and gets `capacity` new ones every
+    `period` seconds - every attempt takes one, so bursts of `capacity` attempts are allowed, but no more than
+    `capacity` per `period` in the long run.
+
+    Subclasses only decide where the buckets are kept.
+    """
+
+    def consume(self, key, capacity, period, now=None):
+        """
+        Takes a token from the bucket of `key`. Returns 0 if there was one, otherwise the number of seconds until
+        there is.
+        """
+        raise NotImplementedError
+
+    def peek(self, key, capacity, period, now=None):
+        """
+        Like `consume`, but the token is left in the bucket.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _refill(bucket, capacity, period, now):
+        tokens, updated = bucket if bucket else (capacity, now)
+        return min(capacity, tokens + max(now - updated, 0) * capacity / period)
+
+    @classmethod
+    def _take(cls, bucket, capacity, period, now):
+        tokens = cls._refill(bucket, capacity, period, now)
+        if tokens >= 1:
+            return (tokens - 1, now), 0
+        return (tokens, now), (1 - tokens) * period / capacity
+
+    @classmethod
+    def _get_wait(cls, bucket, capacity, period, now):
+        return max(0, 1 - cls._refill(bucket, capacity, period, now)) * period / capacity
+
+
+class LocMemThrottle(TokenBucketThrottle):
+    """
+    Keeps buckets in the memory of the process, so every worker throttles on its own. Only the `max_keys` most
+    recently used buckets are kept - a forgotten bucket is a full one.
+    """
+
+    def __init__(self, max_keys=10000, **kwargs):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, period, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._buckets[key], wait = self._take(self._buckets.pop(key, None), capacity, period, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def peek(self, key, capacity, period, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+        return self._get_wait(bucket, capacity, period, now)
+
+
+class CacheThrottle(TokenBucketThrottle):
+    """
+    Keeps buckets in a Django cache shared by the workers (e.g. memcached or redis). The read and the write are not
+    atomic, so concurrent attempts may sometimes take the same token - good enough for throttling.
+    """
+
+    def __init__(self, cache_alias='default', key_prefix='secure_url.throttle', **kwargs):
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    def consume(self, key, capacity, period, now=None):
+        now = time.time() if now is None else now
+        cache = caches[self.cache_alias]
+        cache_key = '{}:{}'.format(self.key_prefix, key)
+
+        bucket, wait = self._take(cache.get(cache_key), capacity, period, now)
+        # an untouched bucket is full again after `period`, it doesn't have to be kept any longer
+        cache.set(cache_key, bucket, timeout=math.ceil(period))
+        return wait
+
+    def peek(self, key, capacity, period, now=None):
+        now = time.time() if now is None else now
+        return self._get_wait(caches[self.cache_alias].get('{}:{}'.format(self.key_prefix, key)), capacity, period,
+                              now)
+
+
+class FileThrottle(TokenBucketThrottle):
+    """
+    Keeps every bucket in a small file under `directory`, locked while it's updated - shared by the workers of one
+    machine without any extra service. Files of buckets untouched for longer than their period are full, every
+    `prune_every` writes one of the 256 subdirectories is pruned of them, so attempts from many addresses don't fill
+    the disk.
+    """
+
+    def __init__(self, directory, prune_every=100, **kwargs):
+        self.directory = directory
+        self.prune_every = prune_every
+        self._max_period = 0
+        self._writes = 0
+
+    def consume(self, key, capacity, period, now=None):
+        now = time.time() if now is None else now
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            bucket, wait = self._take(self._read_bucket(fd), capacity, period, now)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, '{!r} {!r}'.format(*bucket).encode('ascii'))
+        finally:
+            os.close(fd)
+
+        self._max_period = max(self._max_period, period)
+        self._writes += 1
+        if self.prune_every and self._writes % self.prune_every == 0:
+            # one subdirectory at a time (all of them in turn), so the request doing it doesn't wait long
+            self.prune(self._max_period, subdirectory='{:02x}'.format(self._writes // self.prune_every % 256))
+        return wait
+
+    def prune(self, max_age, subdirectory=None):
+        """
+        Deletes files of buckets untouched for longer than `max_age` seconds (at least the longest period of the
+        rates) - a missing file is a full bucket, just like theirs. Returns the number of deleted files.
+        """
+        deleted_before = time.time() - max_age
+        if subdirectory is None:
+            subdirectories = os.listdir(self.directory) if os.path.isdir(self.directory) else []
+        else:
+            subdirectories = [subdirectory]
+
+        deleted = 0
+        for subdirectory in subdirectories:
+            try:
+                entries = list(os.scandir(os.path.join(self.directory, subdirectory)))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.stat().st_mtime < deleted_before:
+                        os.remove(entry.path)
+                        deleted += 1
+                except FileNotFoundError:
+                    # pruned by another worker meanwhile
+                    pass
+        return deleted
+
+    def peek(self, key, capacity, period, now=None):
+        now = time.time() if now is None else now
+        try:
+            fd = os.open(self._get_path(key), os.O_RDONLY)
+        except FileNotFoundError:
+            return 0
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            return self._get_wait(self._read_bucket(fd), capacity, period, now)
+        finally:
+            os.close(fd)
+
+    def _get_path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    @staticmethod
+    def _read_bucket(fd):
+        try:
+            tokens, updated = map(float, os.read(fd, 64).split())
+            return tokens, updated
+        except ValueError:
+            return None
+
+
+def get_client_ip(request):
+    """
+    Returns the IP address of the client. Behind `SECURED_ENTITY_ACCESS_THROTTLE_NUM_PROXIES` reverse proxies it is
+    taken from `X-Forwarded-For` - from the entry added by the outermost trusted proxy, the ones before it could be
+    forged by the client.
+    """
+    num_proxies = settings.SECURED_ENTITY_ACCESS_THROTTLE_NUM_PROXIES
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded_for:
+        addresses = [address.strip() for address in forwarded_for.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_access_wait(request, secured_entity_id):
+    """
+    Takes a token from the bucket of the client IP and checks (without taking one) the bucket of the secured entity.
+    Returns 0 if the access attempt is allowed, otherwise the number of seconds to wait before the next one. No
+    database queries are made.
+    """
+    throttle = get_access_throttle()
+    rates = settings.SECURED_ENTITY_ACCESS_THROTTLE_RATES
+
+    if rates.get('ip'):
+        wait = throttle.consume('ip:{}'.format(get_client_ip(request)), *rates['ip'])
+        if wait:
+            return wait
+    if rates.get('secured_entity'):
+        return throttle.peek('secured_entity:{}'.format(secured_entity_id), *rates['secured_entity'])
+    return 0
+
+
+def record_failed_access(secured_entity_id):
+    """
+    Takes a token from the bucket of the secured entity after a wrong password - only failed guesses count, so
+    visitors of a popular link who know the password are never throttled by it.
+    """
+    rate = settings.SECURED_ENTITY_ACCESS_THROTTLE_RATES.get('secured_entity')
+    if rate:
+        get_access_throttle().consume('secured_entity:{}'.format(secured_entity_id), *rate)
+
+
+def get_retry_after(wait):
+    return str(max(math.ceil(wait), 1))
+
+
+@lru_cache(maxsize=None)
+def get_access_throttle():
+    throttle_class = import_string(settings.SECURED_ENTITY_ACCESS_THROTTLE)
+    return throttle_class(**settings.SECURED_ENTITY_ACCESS_THROTTLE_OPTIONS)
+
+
+@receiver(setting_changed)
+def reset_access_throttle(setting, **kwargs):
+    if setting.startswith('SECURED_ENTITY_ACCESS_THROTTLE'):
+        get_access_throttle.cache_clear()
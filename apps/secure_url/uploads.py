@@ -0,0 +1,186 @@
+import fcntl
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SecuredEntity, SecuredEntityUpload
+
+UPLOAD_BLOCK_SIZE = 64 * 1024
+# number of in-progress uploads the running SHA-256 of the whole file is kept for in this process
+UPLOAD_DIGESTS_CACHE_SIZE = 1000
+
+
+class UploadError(ValueError):
+    pass
+
+
+class UploadOffsetMismatch(UploadError):
+    pass
+
+
+class ChecksumMismatch(UploadError):
+    pass
+
+
+class UploadIncomplete(UploadError):
+    pass
+
+
+class UploadInterrupted(UploadError):
+    pass
+
+
+class _UploadDigests:
+    """
+    Running SHA-256 of uploads keyed by (upload id, offset). hashlib objects can't be stored in the database, so
+    chunks of an upload landing on another worker (or after a restart) drop the running digest and finalizing falls
+    back to reading the file once.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.digests = OrderedDict()
+        self.lock = threading.Lock()
+
+    def pop(self, upload_id, offset):
+        with self.lock:
+            digest_offset, digest = self.digests.pop(upload_id, (None, None))
+
+        if digest_offset == offset:
+            return digest
+        return hashlib.sha256() if offset == 0 else None
+
+    def put(self, upload_id, offset, digest):
+        with self.lock:
+            self.digests[upload_id] = (offset, digest)
+            while len(self.digests) > self.size:
+                self.digests.popitem(last=False)
+
+
+_upload_digests = _UploadDigests(UPLOAD_DIGESTS_CACHE_SIZE)
+
+
+def file_sha256(path, block_size=UPLOAD_BLOCK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def start_upload(user, file_name, size):
+    upload = SecuredEntityUpload(user=user, size=size)
+    upload.file.name = _reserve_file_name(upload.file.storage, upload.file.field.generate_filename(upload, file_name),
+                                          SecuredEntity._meta.get_field('file').max_length)
+    upload.save()
+    return upload
+
+
+def _reserve_file_name(storage, name, max_length):
+    while True:
+        name = storage.get_available_name(name, max_length=max_length)
+        path = storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # exclusive create - concurrent uploads of files with the same name can't pick the same one
+            with open(path, 'xb'):
+                return name
+        except FileExistsError:
+            continue
+
+
+def write_chunk(upload, stream, start, length, checksum=None):
+    """
+    Writes `length` bytes read from `stream` in blocks at `start` of the upload file and moves the upload offset.
+
+    Without `checksum` (hex SHA-256 of the chunk) bytes received before the connection dropped are kept, so the
+    client resumes from the offset - UploadInterrupted is raised after they are written if reading the chunk failed.
+    With `checksum` an incomplete or corrupted chunk is discarded.
+
+    Chunks of an upload are written one at a time - a chunk arriving while another one is being written gets
+    UploadOffsetMismatch right away, without touching the file.
+    """
+    if start != upload.offset:
+        raise UploadOffsetMismatch()
+    if start + length > upload.size:
+        raise UploadError()
+
+    with open(upload.file.path, 'r+b') as file:
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadOffsetMismatch()
+
+        # the chunk could have been written by another request since `upload` was read
+        if SecuredEntityUpload.objects.filter(pk=upload.pk).values_list('offset', flat=True).first() != start:
+            raise UploadOffsetMismatch()
+
+        chunk_digest = hashlib.sha256()
+        upload_digest = _upload_digests.pop(upload.pk, start)
+        written, read_error = 0, None
+
+        file.seek(start)
+        while written < length:
+            try:
+                block = stream.read(min(UPLOAD_BLOCK_SIZE, length - written))
+            except OSError as e:
+                # e.g. the client disconnected - errors of writing the file are not caught
+                read_error = e
+                break
+            if not block:
+                break
+            file.write(block)
+            chunk_digest.update(block)
+            if upload_digest is not None:
+                upload_digest.update(block)
+            written += len(block)
+
+        if checksum and (written < length or checksum.lower() != chunk_digest.hexdigest()):
+            file.truncate(start)
+            raise ChecksumMismatch()
+
+        file.flush()
+        os.fsync(file.fileno())
+
+        # still under the lock, so the next chunk sees the new offset
+        SecuredEntityUpload.objects.filter(pk=upload.pk).update(offset=start + written, updated=timezone.now())
+        upload.offset = start + written
+        if upload_digest is not None:
+            _upload_digests.put(upload.pk, upload.offset, upload_digest)
+
+    if read_error is not None:
+        raise UploadInterrupted() from read_error
+    return upload.offset
+
+
+def finalize_upload(upload, checksum=None):
+    """
+    Turns a complete upload into a file secured entity, returns it together with the hex SHA-256 of the file.
+    Raises SecuredEntityUpload.DoesNotExist if the upload was finalized (or removed) in the meantime.
+    """
+    with transaction.atomic():
+        # concurrent finalizing of the same upload waits here and doesn't find it anymore
+        upload = SecuredEntityUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.offset != upload.size:
+            raise UploadIncomplete()
+
+        upload_digest = _upload_digests.pop(upload.pk, upload.offset)
+        sha256 = upload_digest.hexdigest() if upload_digest is not None else file_sha256(upload.file.path)
+        if checksum and checksum.lower() != sha256:
+            raise ChecksumMismatch()
+
+        # the uploaded file is moved into the content addressed storage (or dropped if the content is stored already)
+        name = SecuredEntity._meta.get_field('file').storage.store(upload.file.path, sha256, upload.file.name)
+        secured_entity = SecuredEntity.objects.create(user=upload.user, file=name)
+        upload.delete()
+
+    return secured_entity, sha256
+
+
+def abort_upload(upload):
+    upload.file.delete(save=False)
+    upload.delete()
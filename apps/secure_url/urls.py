@@ -1,7 +1,7 @@
 from django.urls import path, re_path
 
 from .views import SecuredEntityCreateView, SecuredEntityDetailView, SecuredEntityListView, \
-    SecuredEntityAccessView, SecuredEntityRegeneratePasswordView
+    SecuredEntityAccessView, SecuredEntityRegeneratePasswordView, SecuredEntityDownloadView
 
 app_name = 'secure_url'
 
@@ -10,6 +10,8 @@ urlpatterns = [
             name='secured-entity-detail-view'),
     re_path(r'^get-access/(?P<pk>[a-zA-Z0-9-]{36})/?$', SecuredEntityAccessView.as_view(),
             name='secured-entity-access-view'),
+    re_path(r'^download/(?P<pk>[a-zA-Z0-9-]{36})/?$', SecuredEntityDownloadView.as_view(),
+            name='secured-entity-download-view'),
     re_path(r'^regenerate-password/(?P<pk>[a-zA-Z0-9-]{36})/?$', SecuredEntityRegeneratePasswordView.as_view(),
             name='secured-entity-regenerate-password-view'),
     path('create/', SecuredEntityCreateView.as_view(), name='secured-entity-create-view'),
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
 
@@ -19,3 +20,14 @@ def validate_secured_entity(data):
         raise ValidationError(_('You cannot provide both url or file.'))
 
     return data
+
+
+def validate_accessible_time(accessible_time):
+    min_accessible_time = settings.SECURED_ENTITY_MIN_ACCESSIBLE_TIME
+    max_accessible_time = settings.SECURED_ENTITY_MAX_ACCESSIBLE_TIME
+
+    if not min_accessible_time <= accessible_time <= max_accessible_time:
+        raise ValidationError(_('Secured entity can be accessible from %(min)s to %(max)s.') % {
+            'min': min_accessible_time, 'max': max_accessible_time})
+
+    return accessible_time
@@ -1,14 +1,24 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseRedirect
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.urls.base import reverse
+from django.utils.translation import gettext as _
+from django.views.generic.base import View
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, FormView, UpdateView
 from django.views.generic.list import ListView
 
+from .access_log import get_access_log_sink
+from .delivery import get_file_delivery
+from .db_router import use_read_replica
+from .entity_cache import get_secured_entity_or_404
 from .forms import SecuredEntityAccessForm, SecuredEntityForm
+from .grants import verify_download_grant
 from .mixins import EditOnlyOwnSecuredEntitiesMixin
-from .models import SecuredEntity, SecuredEntityAccessLog
+from .models import SecuredEntity
+from .pagination import InvalidCursor, paginate_by_keyset
+from .throttling import get_access_wait, get_retry_after, record_failed_access
 
 
 class SecuredEntityCreateView(LoginRequiredMixin, CreateView):
@@ -27,6 +37,9 @@ class SecuredEntityCreateView(LoginRequiredMixin, CreateView):
 class SecuredEntityDetailView(LoginRequiredMixin, EditOnlyOwnSecuredEntitiesMixin, DetailView):
     model = SecuredEntity
 
+    def get_object(self, queryset=None):
+        return get_secured_entity_or_404(self.kwargs['pk'])
+
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
         context['url'] = self.request.build_absolute_uri(
@@ -38,9 +51,11 @@ class SecuredEntityRegeneratePasswordView(LoginRequiredMixin, EditOnlyOwnSecured
     model = SecuredEntity
     fields = []
 
+    def get_object(self, queryset=None):
+        return get_secured_entity_or_404(self.kwargs['pk'])
+
     def get(self, request, *args, **kwargs):
-        secured_entity = get_object_or_404(SecuredEntity, pk=kwargs['pk'])
-        return HttpResponseRedirect(secured_entity.get_absolute_url())
+        return HttpResponseRedirect(self.get_object().get_absolute_url())
 
     def form_valid(self, form):
         self.object.regenerate_password()
@@ -50,9 +65,32 @@ class SecuredEntityRegeneratePasswordView(LoginRequiredMixin, EditOnlyOwnSecured
 class SecuredEntityListView(LoginRequiredMixin, ListView):
     model = SecuredEntity
 
+    def get(self, request, *args, **kwargs):
+        # the page is evaluated in `get_context_data`, the template doesn't query the database
+        with use_read_replica(request.user):
+            return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.filter(user=self.request.user)
+        queryset = super().get_queryset().filter(user=self.request.user)
+
+        accessible = self.request.GET.get('accessible')
+        if accessible == '1':
+            queryset = queryset.accessible()
+        elif accessible == '0':
+            queryset = queryset.expired()
+
+        return queryset
+
+    def get_context_data(self, *args, **kwargs):
+        try:
+            object_list, next_cursor = paginate_by_keyset(self.object_list, self.request.GET.get('cursor'),
+                                                          settings.SECURED_ENTITY_LIST_PAGE_SIZE)
+        except InvalidCursor as e:
+            raise Http404(str(e))
+
+        context = super().get_context_data(*args, object_list=object_list, **kwargs)
+        context['next_cursor'] = next_cursor
+        return context
 
 
 class SecuredEntityAccessView(FormView):
@@ -60,9 +98,22 @@ class SecuredEntityAccessView(FormView):
     template_name = 'secure_url/securedentity_access.html'
 
     def dispatch(self, request, *args, **kwargs):
-        self.object = get_object_or_404(SecuredEntity, pk=self.kwargs['pk'])
+        # password guesses are throttled before the secured entity is loaded
+        wait = get_access_wait(request, self.kwargs['pk']) if request.method == 'POST' else 0
+        if wait:
+            response = HttpResponse(_('Too many attempts, please try again later.'), status=429,
+                                    content_type='text/plain')
+            response['Retry-After'] = get_retry_after(wait)
+            return response
+
+        self.object = get_secured_entity_or_404(self.kwargs['pk'])
         return super().dispatch(request, *args, **kwargs)
 
+    def get_form_kwargs(self):
+        form_kwargs = super().get_form_kwargs()
+        form_kwargs['secured_entity'] = self.object
+        return form_kwargs
+
     def get_context_data(self, *args, **kwargs):
         context_data = super().get_context_data(*args, **kwargs)
         context_data['object'] = self.object
@@ -72,5 +123,25 @@ class SecuredEntityAccessView(FormView):
         return self.object.get_redirect_url()
 
     def form_valid(self, form):
-        SecuredEntityAccessLog.objects.create(secured_entity=self.object)
+        get_access_log_sink().enqueue(self.object.pk)
         return super().form_valid(form)
+
+    def form_invalid(self, form):
+        if form.has_error('password'):
+            record_failed_access(self.object.pk)
+        return super().form_invalid(form)
+
+
+class SecuredEntityDownloadView(View):
+    def get(self, request, *args, **kwargs):
+        # the grant is verified without loading the secured entity from the database, so repeated (or parallel)
+        # downloads by holders of a grant don't query it
+        grant = verify_download_grant(self.kwargs['pk'], request.GET.get('grant', ''))
+        if grant is None:
+            raise PermissionDenied
+
+        storage = SecuredEntity._meta.get_field('file').storage
+        try:
+            return get_file_delivery().serve(request, storage.path(grant.file_name), grant.file_name)
+        except FileNotFoundError:
+            raise Http404
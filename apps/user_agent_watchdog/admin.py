@@ -5,6 +5,8 @@ from .models import UserAgentLog
 
 @admin.register(UserAgentLog)
 class UserAgentLogAdmin(admin.ModelAdmin):
+    list_display = ('user', 'user_agent', 'created', 'last_seen', 'hits')
+
     def has_change_permission(self, request, obj=None):
         return False
 
@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ...middlewares import UserAgentLogMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Measures the per request overhead of UserAgentLogMiddleware with and without the logging window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000, help='Number of requests per mode.')
+        parser.add_argument('--user-agents', type=int, default=3, help='Number of distinct user agents.')
+        parser.add_argument('--window', type=int, default=15 * 60, help='Logging window in seconds.')
+
+    def handle(self, *args, **options):
+        modes = (
+            ('every request', None),
+            ('{}s window'.format(options['window']), timedelta(seconds=options['window'])),
+        )
+
+        for name, window in modes:
+            duration, queries = self._run(window, options['requests'], options['user_agents'])
+            self.stdout.write('{:<20} {:>10.1f} us/request {:>8.3f} queries/request'.format(
+                name, duration / options['requests'] * 1e6, queries / options['requests']))
+
+    def _run(self, window, requests, user_agents):
+        middleware = UserAgentLogMiddleware(lambda request: HttpResponse())
+        request_factory = RequestFactory()
+
+        # everything is rolled back, the benchmark does not leave any data behind
+        with transaction.atomic(), override_settings(USER_AGENT_LOG_WINDOW=window):
+            user = get_user_model().objects.create_user(username='bench-user-agent-log-{}'.format(time.time()))
+            caches[settings.USER_AGENT_LOG_CACHE].clear()
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for index in range(requests):
+                    request = request_factory.get('/', HTTP_USER_AGENT='Bench Browser {}'.format(index % user_agents))
+                    request.user = user
+                    middleware(request)
+                duration = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+        return duration, len(queries)
@@ -1,3 +1,11 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from apps.metrics.metrics import USER_AGENT_LOGS_WRITTEN
 from .models import UserAgentLog
 
 
@@ -12,7 +20,30 @@ class UserAgentLogMiddleware:
         # live cycle and request.user is always anonymous here before calling `self.get_response`.
         # https://stackoverflow.com/questions/26240832/django-and-middleware-which-uses-request-user-is-always-anonymous
         if request.user.is_authenticated and 'HTTP_USER_AGENT' in request.META:
-            UserAgentLog.objects.create(user=request.user,
-                                        user_agent=request.META['HTTP_USER_AGENT'])
+            user_agent = request.META['HTTP_USER_AGENT'][:UserAgentLog._meta.get_field('user_agent').max_length]
+
+            if settings.USER_AGENT_LOG_WINDOW is None:
+                UserAgentLog.objects.create(user=request.user, user_agent=user_agent)
+                USER_AGENT_LOGS_WRITTEN.labels('create').inc()
+            else:
+                self._log_once_per_window(request.user, user_agent)
 
         return response
+
+    def _log_once_per_window(self, user, user_agent):
+        marker_key = 'user-agent-log:{}:{}'.format(user.pk, md5(user_agent.encode('utf-8')).hexdigest())
+
+        # `add` is atomic - only the first request in the window (of the worker with a cache of the process) writes
+        window_cache = caches[settings.USER_AGENT_LOG_CACHE]
+        if not window_cache.add(marker_key, True, settings.USER_AGENT_LOG_WINDOW.total_seconds()):
+            return
+
+        latest_log = UserAgentLog.objects.filter(user=user, user_agent=user_agent).order_by('-last_seen')
+        updated = UserAgentLog.objects.filter(pk__in=latest_log.values('pk')[:1]).update(
+            last_seen=timezone.now(), hits=F('hits') + 1)
+
+        if updated:
+            USER_AGENT_LOGS_WRITTEN.labels('update').inc()
+        else:
+            UserAgentLog.objects.create(user=user, user_agent=user_agent)
+            USER_AGENT_LOGS_WRITTEN.labels('create').inc()
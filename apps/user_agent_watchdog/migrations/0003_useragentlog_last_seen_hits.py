@@ -0,0 +1,34 @@
+# Generated by Django 2.1.7 on 2026-10-18 13:39
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_last_seen(apps, schema_editor):
+    UserAgentLog = apps.get_model('user_agent_watchdog', 'UserAgentLog')
+    UserAgentLog.objects.update(last_seen=models.F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_agent_watchdog', '0002_auto_20190227_2305'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useragentlog',
+            name='hits',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='useragentlog',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='useragentlog',
+            index=models.Index(fields=['user', 'user_agent', '-last_seen'], name='user_agent__user_id_9c390e_idx'),
+        ),
+        migrations.RunPython(backfill_last_seen, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,21 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 
 class UserAgentLog(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     user_agent = models.CharField(max_length=256)
     created = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+    # number of `USER_AGENT_LOG_WINDOW` windows in which the user agent was seen
+    hits = models.PositiveIntegerField(default=1)
 
     def __str__(self):
         return '{} - {} - {}'.format(self.user, self.user_agent, self.created)
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['user', 'user_agent', '-last_seen']),
+        ]
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls.base import reverse
+
+from ..models import UserAgentLog
+
+
+class UserAgentLogMiddlewareTest(TestCase):
+    def setUp(self):
+        username = 'test'
+        password = '123qweasd'
+
+        self.home_url = reverse('home')
+        self.user = get_user_model().objects.create_user(username=username, password=password)
+        self.client.login(username=username, password=password)
+        self.extra = {
+            'HTTP_USER_AGENT': 'Test Browser'
+        }
+
+        caches[settings.USER_AGENT_LOG_CACHE].clear()
+
+    def test_anonymous_request_is_not_logged(self):
+        self.client.logout()
+
+        self.client.get(self.home_url, **self.extra)
+
+        self.assertFalse(UserAgentLog.objects.exists())
+
+    @override_settings(USER_AGENT_LOG_WINDOW=None)
+    def test_every_request_is_logged_without_window(self):
+        self.client.get(self.home_url, **self.extra)
+        self.client.get(self.home_url, **self.extra)
+
+        self.assertEqual(2, UserAgentLog.objects.filter(user=self.user, user_agent='Test Browser').count())
+
+    @override_settings(USER_AGENT_LOG_WINDOW=timedelta(minutes=15))
+    def test_first_request_in_window_is_logged(self):
+        self.client.get(self.home_url, **self.extra)
+
+        user_agent_log = UserAgentLog.objects.get()
+        self.assertEqual((self.user, 'Test Browser', 1),
+                         (user_agent_log.user, user_agent_log.user_agent, user_agent_log.hits))
+
+    @override_settings(USER_AGENT_LOG_WINDOW=timedelta(minutes=15))
+    def test_repeated_request_in_window_does_not_touch_database(self):
+        self.client.get(self.home_url, **self.extra)
+
+        user_agent_log_count_before = UserAgentLog.objects.count()
+        self.client.get(self.home_url, **self.extra)
+
+        self.assertEqual(user_agent_log_count_before, UserAgentLog.objects.count())
+        self.assertEqual(1, UserAgentLog.objects.get().hits)
+
+    @override_settings(USER_AGENT_LOG_WINDOW=timedelta(minutes=15))
+    def test_request_in_next_window_updates_latest_log(self):
+        self.client.get(self.home_url, **self.extra)
+        first_seen = UserAgentLog.objects.get().last_seen
+
+        caches[settings.USER_AGENT_LOG_CACHE].clear()
+        self.client.get(self.home_url, **self.extra)
+
+        user_agent_log = UserAgentLog.objects.get()
+        self.assertEqual(2, user_agent_log.hits)
+        self.assertGreater(user_agent_log.last_seen, first_seen)
+
+    @override_settings(USER_AGENT_LOG_WINDOW=timedelta(minutes=15))
+    def test_different_user_agents_are_logged_separately(self):
+        self.client.get(self.home_url, **self.extra)
+        self.client.get(self.home_url, HTTP_USER_AGENT='Other Browser')
+
+        self.assertEqual(2, UserAgentLog.objects.count())
+
+    @override_settings(USER_AGENT_LOG_WINDOW=timedelta(minutes=15), USER_AGENT_LOG_CACHE='markers',
+                       CACHES=dict(settings.CACHES, markers={'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                                             'LOCATION': 'user-agent-log-tests'}))
+    def test_window_is_kept_in_configured_cache(self):
+        self.client.get(self.home_url, **self.extra)
+        caches['markers'].clear()
+        self.client.get(self.home_url, **self.extra)
+
+        self.assertEqual(2, UserAgentLog.objects.get().hits)
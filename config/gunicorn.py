@@ -0,0 +1,24 @@
+"""
+Gunicorn settings - `gunicorn config.wsgi -c config/gunicorn.py`.
+
+Every worker writes its Prometheus metrics to files in `prometheus_multiproc_dir`, so `/metrics` served by any of them
+reports the totals of all of them. The directory has to be set before the app (and `prometheus_client`) is imported
+and emptied on every start, otherwise the counters of the previous run would be added.
+"""
+import os
+import shutil
+import tempfile
+
+metrics_dir = os.environ.setdefault('prometheus_multiproc_dir',
+                                    os.path.join(tempfile.gettempdir(), 'secure-url-metrics'))
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
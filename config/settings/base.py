@@ -0,0 +1,279 @@
+"""
+Django settings for settings project - shared by the development (`config.settings.development`) and the production
+(`config.settings.production`) profiles.
+
+Generated by 'django-admin startproject' using Django 2.1.7.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.1/ref/settings/
+"""
+
+import os
+import dj_database_url
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+from datetime import timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'b!f#(x8)o^+@_7$sm5wc2+&poxe=&(!=8-jojfhm%@8+%qi^vy'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+
+    'material',
+    'rest_framework',
+
+    'apps.secure_url',
+    'apps.secure_url.api',
+    'apps.user_agent_watchdog',
+    'apps.metrics',
+    'apps.profiling',
+]
+
+MIDDLEWARE = [
+    'apps.metrics.middlewares.MetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.profiling.middlewares.ProfilingMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+
+    'apps.user_agent_watchdog.middlewares.UserAgentLogMiddleware',
+]
+
+ROOT_URLCONF = 'config.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': ['templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'config.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.1/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'secure-url.sqlite3'),
+    },
+    # Locally the "replica" is the same file (so it's always in sync) - in tests it's a separate database standing in
+    # for a lagging replica. `REPLICA_DATABASE_URL` configures a real one (see below).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'secure-url.sqlite3'),
+    },
+}
+DATABASE_ROUTERS = ['apps.secure_url.db_router.ReadReplicaRouter']
+
+# The stats and list views read from these databases, a user's reads go to `default` for STICKINESS after they change
+# their secured entities (the pins are kept in the CACHE cache - the next request can come to any worker, so a system
+# check refuses caches of the process).
+SECURED_ENTITY_READ_REPLICAS = []
+SECURED_ENTITY_READ_REPLICA_STICKINESS = timedelta(seconds=10)
+SECURED_ENTITY_READ_REPLICA_CACHE = 'shared'
+
+
+# Caches
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# `shared` is seen by all the workers and dynos - what one of them writes there (e.g. read replica pins) the others
+# have to see. Its table is created by `python manage.py createcachetable` (on release, see the `Procfile`).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'secure_url_cache',
+        'OPTIONS': {
+            # entries are only culled above this, so read replica pins are not dropped before they expire
+            'MAX_ENTRIES': 1000000,
+        },
+    },
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated'
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework.authentication.BasicAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.MultiPartParser',
+    )
+}
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.1/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'Europe/Warsaw'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.1/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+LOGIN_URL = '/login/'
+LOGIN_REDIRECT_URL = '/'
+LOGOUT_REDIRECT_URL = LOGIN_URL
+
+# Default time a secured entity is accessible for, it can be set per entity within the MIN / MAX bounds.
+SECURED_ENTITY_ACCESSIBLE_TIME = timedelta(hours=24)
+SECURED_ENTITY_MIN_ACCESSIBLE_TIME = timedelta(hours=1)
+SECURED_ENTITY_MAX_ACCESSIBLE_TIME = timedelta(days=7)
+
+# Secured entities looked up by id (access, detail and regenerate password views) can be cached in this cache - it has
+# to be shared by the workers, so a regenerated password is seen by all of them right away (a system check refuses
+# caches of the process). Use a fast one like memcached, the database cache would only add queries. `None` (the
+# default) turns the cache off.
+SECURED_ENTITY_CACHE = None
+SECURED_ENTITY_CACHE_OPTIONS = {
+    'timeout': 3600,
+}
+
+SECURED_ENTITY_LIST_PAGE_SIZE = 50
+# Chunked uploads - the largest file which can be uploaded (in bytes) and how long an upload can go without a chunk
+# before `python manage.py reap_expired_secured_entities` removes it together with its file.
+SECURED_ENTITY_UPLOAD_MAX_SIZE = 5 * 1024 ** 3
+SECURED_ENTITY_UPLOAD_MAX_IDLE_TIME = timedelta(days=1)
+SECURED_ENTITY_BULK_CREATE_MAX_ITEMS = 10000
+SECURED_ENTITY_BULK_REGENERATE_MAX_IDS = 10000
+
+# Files are sent only by the download view - to holders of a grant issued after providing the correct password.
+# Behind nginx use 'apps.secure_url.delivery.XAccelRedirectFileDelivery' with an `internal` location aliased to
+# MEDIA_ROOT (OPTIONS: {'internal_prefix': '/protected-media/'}), behind Apache 'XSendfileFileDelivery'.
+SECURED_ENTITY_FILE_DELIVERY = 'apps.secure_url.delivery.StreamingFileDelivery'
+SECURED_ENTITY_FILE_DELIVERY_OPTIONS = {}
+# Grants are verified without a database query - they carry a fingerprint of the password salt, which is compared with
+# the SECURED_ENTITY_CACHE if it's on (so regenerated passwords and deleted secured entities revoke them right away).
+# Without the entity cache they stay valid until they expire.
+SECURED_ENTITY_DOWNLOAD_GRANT_TTL = timedelta(minutes=1)
+
+# Access logs are written in batches by the sink (after the response is sent or by a thread of the worker when idle),
+# leftovers of crashed workers are stored by `python manage.py drain_access_log_spool`.
+SECURED_ENTITY_ACCESS_LOG_SINK = 'apps.secure_url.access_log.SpoolAccessLogSink'
+SECURED_ENTITY_ACCESS_LOG_SINK_OPTIONS = {
+    'batch_size': 500,
+    'flush_interval': 5,
+    'background_flush': True,
+    'spool_dir': os.path.join(BASE_DIR, 'spool', 'access-log'),
+}
+# Closed months of access logs are moved out of the database by `python manage.py archive_access_logs` into gzip'd JSON
+# lines files here (keep them on a backed up volume) - `rebuild_access_stats` reads them as well.
+SECURED_ENTITY_ACCESS_LOG_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive', 'access-log')
+
+# Password guesses on the access views are throttled by token buckets - (capacity, period in seconds) each - before any
+# database query: every attempt takes a token of the client IP, only failed ones a token of the secured entity (so a
+# popular link isn't throttled and locking it out takes many addresses). The buckets are shared by the workers of the
+# machine in files here (the workers prune full ones as they write) - use 'apps.secure_url.throttling.CacheThrottle'
+# (OPTIONS: {'cache_alias': ...}) on memcached to share them between machines. Buckets of the process
+# ('LocMemThrottle') are refused unless DEBUG is on.
+SECURED_ENTITY_ACCESS_THROTTLE = 'apps.secure_url.throttling.FileThrottle'
+SECURED_ENTITY_ACCESS_THROTTLE_OPTIONS = {
+    'directory': os.path.join(BASE_DIR, 'throttle'),
+}
+SECURED_ENTITY_ACCESS_THROTTLE_RATES = {
+    'ip': (30, 60),
+    'secured_entity': (120, 60),
+}
+# Number of reverse proxies adding to X-Forwarded-For in front of the app (the Heroku router on dynos).
+SECURED_ENTITY_ACCESS_THROTTLE_NUM_PROXIES = 1 if 'DYNO' in os.environ else 0
+
+# A (user, user agent) pair is written to the database at most once per window, repeated sightings only bump
+# `last_seen` and `hits` of the latest log. `None` logs every single request. The markers of the windows are kept in
+# the cache of the process, so every worker writes a pair at most once per window - the database cache `shared` would
+# cost more queries on every request than the write it saves. Point it to memcached to write once for all workers.
+USER_AGENT_LOG_WINDOW = timedelta(minutes=15)
+USER_AGENT_LOG_CACHE = 'default'
+
+# Prometheus scrapes of `/metrics` have to send `Authorization: Bearer <token>` (without a token `/metrics` is a 404
+# unless DEBUG is on). Under gunicorn the metrics of all workers are aggregated through the `prometheus_multiproc_dir`
+# directory, see `config/gunicorn.py`.
+METRICS_BEARER_TOKEN = os.environ.get('METRICS_BEARER_TOKEN')
+
+# Requests of staff users with `?_profile=1` (or `X-Profile: 1`), requests with an `X-Profile` token issued in the admin
+# and a random PROFILING_SAMPLE_RATE share of all requests are profiled (cProfile, stacks sampled every
+# PROFILING_SAMPLE_INTERVAL seconds, SQL). Only the newest PROFILING_MAX_PROFILES profiles are kept in PROFILING_DIR.
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_PROFILES = 100
+PROFILING_SAMPLE_RATE = 0
+PROFILING_SAMPLE_INTERVAL = 0.005
+PROFILING_TOKEN_MAX_AGE = timedelta(hours=1)
+
+if 'REPLICA_DATABASE_URL' in os.environ:
+    DATABASES['replica'] = dj_database_url.parse(os.environ['REPLICA_DATABASE_URL'], conn_max_age=600)
+    SECURED_ENTITY_READ_REPLICAS = ['replica']
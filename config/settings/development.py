@@ -0,0 +1,16 @@
+"""
+Development profile (the default one) - the shared settings plus developer tools, the API docs and the Heroku
+defaults of django-heroku. Workers serving production traffic use the leaner `config.settings.production`.
+"""
+import django_heroku
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS
+
+INSTALLED_APPS += [
+    'django_extensions',
+    'rest_framework_swagger',
+]
+
+# Activate Django-Heroku.
+django_heroku.settings(locals())
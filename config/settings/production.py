@@ -0,0 +1,33 @@
+"""
+Production profile - only what serving requests needs, so every gunicorn worker boots faster and takes less memory
+(`python manage.py bench_startup` compares it with the development profile):
+* no django-extensions and no API docs (rest_framework_swagger),
+* the parts of django-heroku used in production are set up here, without importing it (it pulls in the test runner).
+
+Select it with `DJANGO_SETTINGS_MODULE=config.settings.production` (see the `Procfile`).
+"""
+import os
+
+import dj_database_url
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, MIDDLEWARE
+
+DEBUG = False
+
+# required (a KeyError on boot without it) - the key committed in `base` is public, sessions and download grants
+# must never be signed with it
+SECRET_KEY = os.environ['SECRET_KEY']
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '*').split(',')
+
+if 'DATABASE_URL' in os.environ:
+    DATABASES['default'] = dj_database_url.config(conn_max_age=600, ssl_require=True)
+
+# static files are collected to `staticfiles` on deploy and served compressed by whitenoise
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+MIDDLEWARE = MIDDLEWARE.copy()
+MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                  'whitenoise.middleware.WhiteNoiseMiddleware')
+# the workers index all static files on boot - the unhashed copies are never served
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
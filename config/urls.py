@@ -13,6 +13,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from functools import lru_cache
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -20,13 +22,24 @@ from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.urls import path, include
 from django.views.generic.base import TemplateView
-from rest_framework_swagger.views import get_swagger_view
 
-api_schema_view = get_swagger_view(title='Secure URL - API')
+from apps.metrics.views import metrics_view
+
+
+@lru_cache(maxsize=None)
+def get_api_schema_view():
+    from rest_framework_swagger.views import get_swagger_view
+
+    return get_swagger_view(title='Secure URL - API')
+
+
+def api_schema_view(request, *args, **kwargs):
+    # the docs (and coreapi with them) are imported by the first request to them, not by every worker on boot
+    return get_api_schema_view()(request, *args, **kwargs)
+
 
 urlpatterns = [
     path('api/secure-url/', include('apps.secure_url.api.urls')),
-    path('api/', api_schema_view),
 
     path('secure-url/', include('apps.secure_url.urls')),
 
@@ -35,11 +48,16 @@ urlpatterns = [
          name='accounts-login'),
     path('logout/', auth_views.LogoutView.as_view(), name='accounts-logout'),
 
+    path('admin/profiles/', include('apps.profiling.urls')),
     path('admin/', admin.site.urls),
 
+    path('metrics', metrics_view, name='metrics'),
+
     path('', login_required(TemplateView.as_view(template_name='static/home.html')), name='home'),
 ]
 
+if 'rest_framework_swagger' in settings.INSTALLED_APPS:
+    urlpatterns.append(path('api/', api_schema_view))
+
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)